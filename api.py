@@ -0,0 +1,354 @@
+"""
+Headless HTTP API for the resume pipeline.
+
+Run with:  python api.py --port 8080
+
+Endpoints:
+    GET  /health                 Liveness check
+    POST /parse                  multipart "file" (.pdf/.docx) -> {"text"}
+                                 (413 over RESUME_MAX_UPLOAD_MB, 422 {"error", "reason"}
+                                 if the file is over the page limit or hits a sandbox limit)
+    POST /score                  {"resume_text", "job_description", "ai"?, "reuse_duplicates"?} -> scores
+    POST /enhance                {"resume_text", "job_description", "missing_keywords"?}
+                                 -> NDJSON stream of chunk events, then a result event
+    POST /render                 {"resume", "template"?, "formats"?} -> artifact ids
+    GET  /artifacts/{id}         Download a rendered file by content hash
+    POST /export                 {"results": [{"title", "pdf"?, "docx"?, "resume"?, "score_before"?, ...}]}
+                                 -> ZIP of files, JSON and summary.csv, streamed as it is built
+    GET  /usage                  Model tokens and cost for the caller and for today
+    GET  /metrics                Prometheus metrics
+    GET  /models                 Model routes, SLOs and observed latency/error rates
+    GET  /candidates             ?q=kubernetes,go&min_score=60&job=<hash> -> stored candidates
+    GET  /candidates/{hash}      Everything stored for one resume
+
+The /candidates routes return stored resume text, names and emails and have no
+authentication of their own. They are only served when RESUME_STORE_PATH is set;
+expose them only behind an authenticating proxy or on a trusted network.
+"""
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+
+from modules.accounting import day_usage, session_usage, usage_scope, user_usage
+from modules.artifacts import CONTENT_TYPES, artifact_path
+from modules.config import load_environment
+from modules.enhancer import stream_resume_enhancement
+from modules.export import stream_zip
+from modules.model import ResumeDocument
+from modules.pipeline import RESUME_PIPELINE
+from modules.sandbox import SandboxError, extract_text
+from modules.scorer import calculate_ats_score
+from modules.uploads import SpooledUpload, UploadRejected
+from modules import router, store, telemetry
+
+load_environment()
+MAX_BODY_BYTES = int(float(os.getenv("RESUME_API_MAX_BODY_MB", "5")) * 1024 * 1024)
+TEMPLATES = ("modern", "professional", "twocolumn")
+
+# Parsing, Gemini calls and pdflatex all block, so they run off the event loop
+_executor = ThreadPoolExecutor(max_workers=int(os.getenv("RESUME_API_WORKERS", "8")),
+                               thread_name_prefix="resume-api")
+
+
+async def _blocking(fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    # Executor threads do not inherit contextvars; carry the usage scope across
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(_executor, lambda: ctx.run(fn, *args, **kwargs))
+
+
+@web.middleware
+async def usage_scope_middleware(request, handler):
+    """Bills model calls to X-Session-Id / X-User-Id (user defaults to the client address)."""
+    with usage_scope(session=request.headers.get("X-Session-Id"),
+                     user=request.headers.get("X-User-Id") or request.remote):
+        return await handler(request)
+
+
+async def _json_body(request, *required):
+    try:
+        body = await request.json()
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        raise web.HTTPBadRequest(text="Request body must be JSON")
+    if not isinstance(body, dict):
+        raise web.HTTPBadRequest(text="Request body must be a JSON object")
+    missing = [k for k in required if not body.get(k)]
+    if missing:
+        raise web.HTTPBadRequest(text=f"Missing field(s): {', '.join(missing)}")
+    return body
+
+
+def _require_strings(body, *fields):
+    wrong = [k for k in fields if not isinstance(body[k], str)]
+    if wrong:
+        raise web.HTTPBadRequest(text=f"Field(s) must be strings: {', '.join(wrong)}")
+
+
+# --- HANDLERS ---
+async def health(request):
+    return web.json_response({"status": "ok"})
+
+
+async def parse(request):
+    if not request.content_type.startswith("multipart/"):
+        raise web.HTTPBadRequest(text="Upload the resume as multipart field 'file'")
+    reader = await request.multipart()
+    field = await reader.next()
+    while field is not None and field.name != "file":
+        field = await reader.next()
+    if field is None or not field.filename:
+        raise web.HTTPBadRequest(text="Missing multipart field 'file'")
+
+    try:
+        upload = SpooledUpload(field.filename)
+    except UploadRejected:
+        raise web.HTTPUnsupportedMediaType(text="Only .pdf and .docx files are supported")
+    # Multipart parts are not covered by client_max_size, so the upload enforces its own
+    # limit; large files are spooled to disk rather than held in memory
+    while True:
+        chunk = await field.read_chunk()
+        if not chunk:
+            break
+        try:
+            upload.write(chunk)
+        except UploadRejected:
+            raise web.HTTPRequestEntityTooLarge(max_size=upload.max_bytes, actual_size=upload.size)
+    upload.finish()
+    try:
+        text = await _blocking(extract_text, upload)
+    except SandboxError as e:
+        # Structured, so clients can tell a hostile or broken file from a server fault
+        return web.json_response({"error": str(e), "reason": e.reason}, status=422)
+    finally:
+        upload.close()
+    return web.json_response({"text": text})
+
+
+async def score(request):
+    body = await _json_body(request, "resume_text", "job_description")
+    _require_strings(body, "resume_text", "job_description")
+    targets = ["score_before", "missing"] + (["ai_score", "ai_missing"] if body.get("ai") else [])
+    # Entered as parsed text so near-duplicates are flagged; with reuse_duplicates a
+    # resubmission with the same email and phone reuses the earlier results
+    run = await _blocking(RESUME_PIPELINE.run,
+                          {"parsed_text": body["resume_text"], "job_desc": body["job_description"],
+                           "reuse_duplicates": body.get("reuse_duplicates") is True}, targets)
+    response = {"score": run["score_before"], "missing": run["missing"]}
+    if run.get("duplicate_of"):
+        # The match may be another candidate's resume, so only its similarity is returned
+        response["duplicate_of"] = {"similarity": run["duplicate_of"]["similarity"]}
+    if body.get("ai"):
+        response.update(ai_score=run.get("ai_score", 0), ai_missing=run.get("ai_missing", []))
+    return web.json_response(response)
+
+
+async def enhance(request):
+    body = await _json_body(request, "resume_text", "job_description")
+    _require_strings(body, "resume_text", "job_description")
+    resume_text, job_desc = body["resume_text"], body["job_description"]
+    missing = body.get("missing_keywords")
+    if missing is not None and (not isinstance(missing, list) or not all(isinstance(k, str) for k in missing)):
+        raise web.HTTPBadRequest(text="missing_keywords must be a list of strings")
+    if missing is None:
+        _, missing = await _blocking(calculate_ats_score, resume_text, job_desc)
+
+    response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+    await response.prepare(request)
+
+    # Bridge the blocking Gemini stream into the event loop through a queue
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+
+    def produce():
+        try:
+            for event in stream_resume_enhancement(resume_text, job_desc, missing_keywords=missing):
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+        except Exception as e:
+            # Nothing awaits this thread, so report the failure in the stream itself
+            telemetry.logger.error("Enhancement stream failed: %s: %s", type(e).__name__, e)
+            error = {"error": f"Enhancement failed: {type(e).__name__}: {e}"}
+            loop.call_soon_threadsafe(queue.put_nowait, ("result", error))
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, None)
+
+    loop.run_in_executor(_executor, contextvars.copy_context().run, produce)
+    while True:
+        event = await queue.get()
+        if event is None:
+            break
+        kind, payload = event
+        if kind == "chunk":
+            line = {"event": "chunk", "text": payload}
+        elif isinstance(payload, dict):
+            line = {"event": "error", "error": payload["error"], "raw": payload.get("raw", "")[:1000]}
+        else:
+            line = {"event": "result", "resume": payload.to_dict()}
+        await response.write((json.dumps(line) + "\n").encode("utf-8"))
+    await response.write_eof()
+    return response
+
+
+async def render(request):
+    body = await _json_body(request, "resume")
+    template = body.get("template", "modern")
+    formats = body.get("formats", ["pdf", "docx"])
+    if template not in TEMPLATES:
+        raise web.HTTPBadRequest(text=f"Unknown template '{template}'. Choose from: {', '.join(TEMPLATES)}")
+    if not isinstance(formats, list) or not all(isinstance(f, str) for f in formats):
+        raise web.HTTPBadRequest(text="formats must be a list of strings")
+    if not set(formats) <= {"pdf", "docx"}:
+        raise web.HTTPBadRequest(text="formats may only contain 'pdf' and 'docx'")
+    try:
+        doc = ResumeDocument.from_dict(body["resume"])
+    except ValueError as e:
+        raise web.HTTPBadRequest(text=str(e))
+
+    # PDF and DOCX render concurrently; identical requests are served from the stage memo
+    run = await _blocking(RESUME_PIPELINE.run, {"resume": doc, "template_name": template},
+                          [f"{fmt}_path" for fmt in formats])
+    failed = {fmt: run.errors[fmt] for fmt in formats if fmt in run.errors}
+    if failed:
+        raise web.HTTPUnprocessableEntity(text=f"Resume generation failed: {failed}")
+    artifacts = {fmt: os.path.basename(run[f"{fmt}_path"]) for fmt in formats}
+    return web.json_response({
+        fmt: {"id": artifact_id, "url": f"/artifacts/{artifact_id}"}
+        for fmt, artifact_id in artifacts.items()
+    })
+
+
+async def download_artifact(request):
+    artifact_id = request.match_info["artifact_id"]
+    path = artifact_path(artifact_id)
+    if path is None:
+        raise web.HTTPNotFound(text="Unknown artifact")
+    ext = os.path.splitext(artifact_id)[1]
+    return web.FileResponse(path, headers={
+        "Content-Type": CONTENT_TYPES[ext],
+        # Content-addressed, so the bytes behind a URL never change
+        "Cache-Control": "public, max-age=31536000, immutable",
+    })
+
+
+def _export_row(result):
+    paths = {}
+    for fmt in ("pdf", "docx"):
+        if result.get(fmt):
+            paths[fmt] = artifact_path(result[fmt])
+            if paths[fmt] is None:
+                raise web.HTTPBadRequest(text=f"Unknown {fmt} artifact '{result[fmt]}'")
+    return {
+        'title': result.get("title", ""),
+        'score_python_before': result.get("score_before"),
+        'score_python_after': result.get("score_after"),
+        'missing': result.get("missing", []),
+        'keywords_added': result.get("keywords_added", []),
+        'resume_data': result.get("resume"),
+        'pdf_path': paths.get("pdf"),
+        'docx_path': paths.get("docx"),
+        'error': result.get("error"),
+    }
+
+
+async def export(request):
+    body = await _json_body(request, "results")
+    if not isinstance(body["results"], list) or not all(isinstance(r, dict) for r in body["results"]):
+        raise web.HTTPBadRequest(text="results must be a list of objects")
+    rows = [_export_row(result) for result in body["results"]]
+
+    response = web.StreamResponse(headers={
+        "Content-Type": CONTENT_TYPES[".zip"],
+        "Content-Disposition": 'attachment; filename="resume-export.zip"',
+    })
+    await response.prepare(request)
+    # The archive is written by a generator that reads files; pull it chunk by chunk off the loop
+    chunks = stream_zip(rows)
+    while True:
+        chunk = await _blocking(next, chunks, None)
+        if chunk is None:
+            break
+        if chunk:
+            await response.write(chunk)
+    await response.write_eof()
+    return response
+
+
+async def usage(request):
+    session = request.headers.get("X-Session-Id")
+    user = request.headers.get("X-User-Id") or request.remote
+    return web.json_response({
+        "session": session_usage(session) if session else None,
+        "user": user_usage(user),
+        "day": day_usage(),
+    })
+
+
+async def metrics(request):
+    return web.Response(text=telemetry.prometheus_text(),
+                        headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+
+async def candidates(request):
+    if not store.enabled():
+        raise web.HTTPNotFound(text="The candidate store is disabled")
+    query = request.query
+    terms = [t for t in query.get("q", "").replace(",", " ").split() if t]
+    try:
+        min_score = float(query["min_score"]) if "min_score" in query else None
+        limit = min(int(query.get("limit", "50")), 500)
+    except ValueError:
+        raise web.HTTPBadRequest(text="min_score and limit must be numbers")
+    kind = query.get("kind", "ats")
+    if kind not in store.SCORE_KINDS.values():
+        raise web.HTTPBadRequest(text=f"kind must be one of: {', '.join(store.SCORE_KINDS.values())}")
+    try:
+        rows = await _blocking(store.search, terms, min_score=min_score, job=query.get("job"),
+                               kind=kind, limit=limit)
+    except ValueError as e:
+        raise web.HTTPBadRequest(text=str(e))
+    return web.json_response({"candidates": rows})
+
+
+async def candidate(request):
+    if not store.enabled():
+        raise web.HTTPNotFound(text="The candidate store is disabled")
+    record = await _blocking(store.get_resume, request.match_info["content_hash"])
+    if record is None:
+        raise web.HTTPNotFound(text="Unknown candidate")
+    return web.json_response(record)
+
+
+async def models(request):
+    return web.json_response(router.snapshot())
+
+
+def create_app():
+    app = web.Application(client_max_size=MAX_BODY_BYTES, middlewares=[usage_scope_middleware])
+    app.add_routes([
+        web.get("/health", health),
+        web.post("/parse", parse),
+        web.post("/score", score),
+        web.post("/enhance", enhance),
+        web.post("/render", render),
+        web.get("/artifacts/{artifact_id}", download_artifact),
+        web.post("/export", export),
+        web.get("/usage", usage),
+        web.get("/metrics", metrics),
+        web.get("/models", models),
+        web.get("/candidates", candidates),
+        web.get("/candidates/{content_hash}", candidate),
+    ])
+    telemetry.start_exporters()
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless HTTP API for the resume pipeline")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+    web.run_app(create_app(), host=args.host, port=args.port)
@@ -1,11 +1,15 @@
+import uuid
 import streamlit as st
 import modules.ui as ui
-from modules.parser import extract_text_from_pdf, extract_text_from_docx
-from modules.enhancer import enhance_resume_content
-from modules.converter import convert_resume_data_to_text
-# Note: We now import BOTH scoring functions
-from modules.scorer import calculate_ats_score, calculate_ai_score
-from modules.generator import generate_resume_pdf, generate_resume_docx
+from modules.jobs import submit_job, get_job
+from modules.pipeline import (
+    run_resume_pipeline, run_multi_target_pipeline, prefetch_analysis,
+    STAGES, STAGE_LABELS, MULTI_TARGET_STAGES, MAX_TARGETS,
+)
+from modules.telemetry import start_exporters
+
+# Metrics endpoint / file export (once per process; no-op unless configured)
+start_exporters()
 
 # 1. Setup UI
 ui.setup_page()
@@ -19,96 +23,171 @@ if 'score_python_before' not in st.session_state: st.session_state.score_python_
 if 'score_python_after' not in st.session_state: st.session_state.score_python_after = None
 if 'pdf_path' not in st.session_state: st.session_state.pdf_path = None
 if 'docx_path' not in st.session_state: st.session_state.docx_path = None
+if 'draft_html' not in st.session_state: st.session_state.draft_html = None
 if 'missing' not in st.session_state: st.session_state.missing = []
 if 'keywords_added' not in st.session_state: st.session_state.keywords_added = []
 if 'keywords_skipped' not in st.session_state: st.session_state.keywords_skipped = []
+# Id of the background analysis job, while one is running
+if 'job_id' not in st.session_state: st.session_state.job_id = None
+if 'timings' not in st.session_state: st.session_state.timings = {}
+if 'usage' not in st.session_state: st.session_state.usage = None
+# Comparison rows of the last multi-job run
+if 'multi_targets' not in st.session_state: st.session_state.multi_targets = None
+# Analyze clicks so far; each new click asks the model for a fresh rewrite
+if 'generation' not in st.session_state: st.session_state.generation = 0
+# Model calls (tokens, cost, budgets) are accounted to this id
+if 'session_id' not in st.session_state: st.session_state.session_id = uuid.uuid4().hex
 
 # 3. Main Logic Flow
 # Step A: Choose Input Method
 method = ui.select_input_method()
-raw_text = ""
+resume_inputs = None
 
 # Step B: Render Forms
+# Uploads are parsed by the pipeline's (memoized) parse stage, not on every rerun
 if method == "Upload Existing Resume":
     uploaded_file = ui.render_upload_form()
-    if uploaded_file:
-        if uploaded_file.name.endswith(".pdf"):
-            raw_text = extract_text_from_pdf(uploaded_file)
-        elif uploaded_file.name.endswith(".docx"):
-            raw_text = extract_text_from_docx(uploaded_file)
+    if uploaded_file and uploaded_file.name.endswith((".pdf", ".docx")):
+        upload = ui.get_spooled_upload(uploaded_file)
+        if upload is not None:
+            resume_inputs = {'upload': upload}
 else:
     raw_text = ui.render_manual_form()
+    if raw_text:
+        resume_inputs = {'raw_text': raw_text}
+
+# Step C: Job Description (Always needed), or several in multi-job mode
+multi_target = ui.select_target_mode()
+if multi_target:
+    job_descs = ui.render_multi_jd_input(MAX_TARGETS)
+    job_desc = job_descs[0] if job_descs else ""
+else:
+    job_descs = None
+    job_desc = ui.render_jd_input()
 
-# Step C: Job Description (Always needed)
-job_desc = ui.render_jd_input()
+# Speculatively parse and pre-score in the background as soon as both inputs exist
+if resume_inputs and job_desc and not multi_target and st.session_state.job_id is None:
+    prefetch_analysis(resume_inputs, job_desc, session_id=st.session_state.session_id,
+                      generation=st.session_state.generation)
 
 # Step D: The "Analyze" Button (Always Visible)
 st.markdown("<br>", unsafe_allow_html=True)
 
-if st.button("🚀 Analyze & Generate Resume"):
+template_map = {
+    "Modern (Blue)": "modern",
+    "Professional (Harvard/Google)": "professional",
+    "Two Column": "twocolumn"
+}
+
+if st.button("🚀 Analyze & Generate Resume", disabled=st.session_state.job_id is not None):
     # Validation
-    if not raw_text:
+    if not resume_inputs:
         st.error("⚠️ Please upload a resume or fill in the manual details first.")
     elif not job_desc:
         st.error("⚠️ Please paste the Job Description.")
+    elif multi_target and len(job_descs) > MAX_TARGETS:
+        st.error(f"⚠️ Please paste at most {MAX_TARGETS} job descriptions.")
     else:
-        with st.spinner("🔍 Analyzing your resume against the job description..."):
-            
-            # 1. BEFORE OPTIMIZATION: Score the original resume
-            score_python_before, missing_python = calculate_ats_score(raw_text, job_desc)
-            
-        with st.spinner("✨ Enhancing your resume with AI optimization..."):
-            # 2. Enhance Content with Keyword Injection
-            # Pass missing keywords to the enhancer for intelligent injection
-            ai_data = enhance_resume_content(raw_text, job_desc, missing_keywords=missing_python)
-            
-            # 3. Check for Errors
-            if "error" in ai_data:
-                st.error(f"❌ AI Enhancement Error: {ai_data['error']}")
-                if 'raw' in ai_data:
-                    with st.expander("🔍 Debug Info"):
-                        st.text(ai_data['raw'][:1000])
-            else:
-                # 4. AFTER OPTIMIZATION: Score the enhanced resume
-                enhanced_text = convert_resume_data_to_text(ai_data)
-                score_python_after, _ = calculate_ats_score(enhanced_text, job_desc)
-                
-        with st.spinner("📄 Generating professional resume files..."):
-            try:
-                # 5. Generate Files
-                template_map = {
-                    "Modern (Blue)": "modern",
-                    "Professional (Harvard/Google)": "professional",
-                    "Two Column": "twocolumn"
-                }
-                fname = template_map.get(selected_template, "modern")
-                
-                pdf_path = generate_resume_pdf(ai_data, template_name=fname)
-                docx_path = generate_resume_docx(ai_data)
-                
-                # 6. Save to Session State
-                st.session_state.score_python_before = score_python_before
-                st.session_state.score_python_after = score_python_after
-                st.session_state.missing = missing_python
-                st.session_state.keywords_added = ai_data.get('keywords_added', [])
-                st.session_state.keywords_skipped = ai_data.get('keywords_skipped', [])
-                st.session_state.pdf_path = pdf_path
-                st.session_state.docx_path = docx_path
-                st.session_state.resume_data = ai_data
-                
-                st.success("✅ Resume optimization complete!")
-                
-            except Exception as e:
-                st.error(f"❌ Resume generation failed: {str(e)}")
-                st.info("💡 The resume was enhanced successfully, but file generation encountered an error.")
+        # Queue the whole pipeline on the worker pool; this run returns immediately
+        fname = template_map.get(selected_template, "modern")
+        if multi_target:
+            job = submit_job(run_multi_target_pipeline, resume_inputs, job_descs, fname,
+                             session_id=st.session_state.session_id, generation=st.session_state.generation,
+                             stages=MULTI_TARGET_STAGES)
+        else:
+            job = submit_job(run_resume_pipeline, resume_inputs, job_desc, fname,
+                             session_id=st.session_state.session_id, generation=st.session_state.generation,
+                             stages=STAGES)
+        st.session_state.job_id = job.id
+        st.session_state.generation += 1
+
+# Step D2: Poll the running job
+# Only this fragment reruns while the job is in progress; once the job ends it
+# stores the outcome and reruns the whole app to show the results.
+def apply_job_result(snapshot):
+    """Copies a finished job's outcome into the session and queues its messages."""
+    notices = st.session_state.job_notices = []
+    if snapshot is None:
+        notices.append(("error", "❌ The analysis job was lost (the server may have restarted). Please try again.", None))
+    elif snapshot['status'] == "failed":
+        notices.append(("error", f"❌ {snapshot['error']}", snapshot['details']))
+    elif 'targets' in snapshot['result']:
+        result = snapshot['result']
+        st.session_state.multi_targets = result['targets']
+        st.session_state.score_python_before = None
+        st.session_state.timings = result['timings']
+        st.session_state.usage = result['usage']
+        failed = sum(1 for row in result['targets'] if row['error'])
+        if failed:
+            notices.append(("warning", f"⚠️ {failed} of {len(result['targets'])} jobs could not be tailored.", None))
+        else:
+            notices.append(("success", f"✅ Tailored your resume to {len(result['targets'])} jobs!", None))
+    else:
+        st.session_state.multi_targets = None
+        result = snapshot['result']
+        for key in ('score_python_before', 'score_python_after', 'missing', 'keywords_added',
+                    'keywords_skipped', 'pdf_path', 'docx_path', 'resume_data', 'draft_html', 'timings',
+                    'usage'):
+            st.session_state[key] = result[key]
+        duplicate = result['duplicate_of']
+        if duplicate:
+            # Only the similarity: the earlier resume may be someone else's
+            reused = ", so those results were reused" if duplicate['reused'] else ""
+            notices.append(("info", f"♻️ This resume is {duplicate['similarity']:.0%} similar to "
+                                    f"one analysed earlier{reused}.", None))
+        if result['render_error']:
+            notices.append(("error", f"❌ Resume generation failed: {result['render_error']}", None))
+            notices.append(("info", "💡 The resume was enhanced successfully, but file generation encountered an error.", None))
+        else:
+            notices.append(("success", "✅ Resume optimization complete!", None))
+
+
+@st.fragment(run_every=0.5)
+def poll_job():
+    job_id = st.session_state.job_id
+    if job_id is None:
+        return
+    job = get_job(job_id)
+    snapshot = job.snapshot() if job else None
+    if snapshot is None or snapshot['status'] in ("done", "failed"):
+        st.session_state.job_id = None
+        apply_job_result(snapshot)
+        st.rerun(scope="app")
+
+    ui.display_job_progress(snapshot, STAGE_LABELS)
+    if snapshot['partial'].get('targets_total'):
+        st.caption(f"{snapshot['partial']['targets_done']} of {snapshot['partial']['targets_total']} jobs tailored")
+    # Show the instant HTML draft as soon as the enhancer has produced it
+    if snapshot['partial'].get('draft_html'):
+        ui.display_html_preview(snapshot['partial']['draft_html'])
+
+
+if st.session_state.job_id is not None:
+    poll_job()
+
+# Messages from the job that just finished (shown once)
+for level, message, details in st.session_state.pop('job_notices', []):
+    getattr(st, level)(message)
+    if details:
+        with st.expander("🔍 Debug Info"):
+            st.text(details[:1000])
+
+# Step E0: Multi-job results (comparison table instead of a single preview)
+if st.session_state.multi_targets is not None:
+    ui.display_multi_target_results(st.session_state.multi_targets)
+    ui.display_export(st.session_state.multi_targets, "multi")
+    ui.display_stage_timings(st.session_state.timings)
+    ui.display_model_usage(st.session_state.usage)
 
 # Step E: Display Results
 # We check if 'score_python_before' is not None to know if analysis ran
 if st.session_state.score_python_before is not None:
     
-    # 1. Show Preview FIRST
+    # 1. Show Preview FIRST (fall back to the HTML draft if the PDF failed)
     if st.session_state.pdf_path:
         ui.display_pdf_preview(st.session_state.pdf_path)
+    elif st.session_state.draft_html:
+        ui.display_html_preview(st.session_state.draft_html)
     
     # 2. Show Optimization Results (Before/After Comparison)
     ui.display_results(
@@ -120,6 +199,19 @@ if st.session_state.score_python_before is not None:
         st.session_state.pdf_path,
         st.session_state.docx_path
     )
+    ui.display_export([{
+        'title': "Optimized Resume",
+        'score_python_before': st.session_state.score_python_before,
+        'score_python_after': st.session_state.score_python_after,
+        'missing': st.session_state.missing,
+        'keywords_added': st.session_state.keywords_added,
+        'resume_data': st.session_state.resume_data,
+        'pdf_path': st.session_state.pdf_path,
+        'docx_path': st.session_state.docx_path,
+    }], "single")
     
     with st.expander("👀 Peek at AI Data"):
-        st.json(st.session_state.resume_data)
\ No newline at end of file
+        st.json(st.session_state.resume_data.to_dict())
+    
+    ui.display_stage_timings(st.session_state.timings)
+    ui.display_model_usage(st.session_state.usage)
\ No newline at end of file
@@ -0,0 +1,191 @@
+"""
+Synthetic resume and job-description corpus for the benchmarks.
+
+Everything is generated from a seed, so two runs (or two commits) time exactly
+the same inputs. PDFs are written by hand (one Helvetica text stream per page),
+so no PDF library is needed to build the corpus.
+"""
+import io
+import random
+
+# name -> (experience entries, bullets per entry, projects)
+RESUME_SIZES = {
+    "small": (1, 3, 1),
+    "medium": (3, 5, 2),
+    "large": (8, 8, 5),
+}
+# name -> approximate word count
+JD_LENGTHS = {
+    "short": 80,
+    "medium": 300,
+    "long": 1200,
+}
+
+TECH = [
+    "Python", "Java", "Go", "Rust", "TypeScript", "React", "Django", "Flask", "FastAPI",
+    "Kubernetes", "Docker", "Terraform", "AWS", "GCP", "Azure", "PostgreSQL", "Redis",
+    "Kafka", "Spark", "Airflow", "GraphQL", "gRPC", "Linux", "CI/CD", "Jenkins",
+    "TensorFlow", "PyTorch", "Pandas", "Elasticsearch", "MongoDB", "Snowflake",
+]
+VERBS = ["Built", "Designed", "Led", "Migrated", "Optimized", "Automated", "Scaled", "Shipped"]
+OBJECTS = [
+    "a billing service", "the data platform", "an internal API", "the deployment pipeline",
+    "a search index", "the recommendation engine", "customer dashboards", "an event bus",
+]
+FILLER = [
+    "collaborate", "stakeholders", "ownership", "reliability", "distributed", "systems",
+    "mentoring", "product", "roadmap", "observability", "latency", "availability",
+    "requirements", "design", "reviews", "scalable", "infrastructure", "customers",
+]
+
+
+def synthetic_resume(size="medium", seed=0):
+    """
+    Builds a resume dict in the enhancer's output shape.
+
+    Args:
+        size (str): Key of RESUME_SIZES
+        seed (int): Random seed
+
+    Returns:
+        dict: Resume data
+    """
+    jobs, bullets, projects = RESUME_SIZES[size]
+    rng = random.Random(f"resume-{size}-{seed}")
+    return {
+        "name": "Alex Example",
+        "email": "alex@example.com",
+        "phone": "+1 555 010 2030",
+        "linkedin": "alex-example",
+        "github": "alexexample",
+        "website": "https://alex.example.com",
+        "summary": f"Engineer with {jobs + 2} years of experience in "
+                   f"{', '.join(rng.sample(TECH, 4))} & large-scale systems.",
+        "experience": [
+            {
+                "title": rng.choice(["Software Engineer", "Senior Engineer", "Staff Engineer"]),
+                "company": f"Company {i + 1}",
+                "dates": f"{2024 - 2 * i - 2} - {2024 - 2 * i}",
+                "bullets": [
+                    f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} using {rng.choice(TECH)} and "
+                    f"{rng.choice(TECH)}, cutting p95 latency by {rng.randint(10, 70)}%"
+                    for _ in range(bullets)
+                ],
+            }
+            for i in range(jobs)
+        ],
+        "education": [
+            {"school": "State University", "degree": "B.S. Computer Science", "year": "2016", "gpa": "3.7"},
+        ],
+        "skills": [
+            {"category": "Languages", "items": ", ".join(rng.sample(TECH[:5], 3))},
+            {"category": "Infrastructure", "items": ", ".join(rng.sample(TECH[9:20], 5))},
+        ],
+        "projects": [
+            {
+                "name": f"Project {i + 1}",
+                "link": f"https://github.com/alexexample/project-{i + 1}",
+                "description": f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} with {rng.choice(TECH)}",
+            }
+            for i in range(projects)
+        ],
+    }
+
+
+def resume_lines(resume):
+    """Plain-text lines of a resume dict, laid out like an uploaded resume."""
+    lines = [resume["name"], f"{resume['email']} | {resume['phone']}", "", "Summary", resume["summary"], "", "Experience"]
+    for job in resume["experience"]:
+        lines.append(f"{job['title']} - {job['company']} ({job['dates']})")
+        lines.extend(f"- {b}" for b in job["bullets"])
+    lines += ["", "Education"]
+    lines.extend(f"{e['degree']}, {e['school']}, {e['year']}" for e in resume["education"])
+    lines += ["", "Skills"]
+    lines.extend(f"{s['category']}: {s['items']}" for s in resume["skills"])
+    lines += ["", "Projects"]
+    lines.extend(f"{p['name']}: {p['description']} {p['link']}" for p in resume["projects"])
+    return lines
+
+
+def synthetic_job_description(length="medium", seed=0):
+    """
+    Builds a job description of roughly JD_LENGTHS[length] words.
+
+    Returns:
+        str: Job description text
+    """
+    rng = random.Random(f"jd-{length}-{seed}")
+    words = JD_LENGTHS[length]
+    stack = rng.sample(TECH, 8)
+    sentences = [f"We are hiring a backend engineer experienced with {', '.join(stack[:4])}."]
+    count = len(sentences[0].split())
+    while count < words:
+        sentence = " ".join(rng.choice(FILLER) for _ in range(rng.randint(6, 14)))
+        sentence += f" with {rng.choice(stack)}."
+        sentences.append(sentence[0].upper() + sentence[1:])
+        count += len(sentence.split())
+    return " ".join(sentences)
+
+
+# --- FILE WRITERS ---
+def _pdf_escape(text):
+    text = text.encode("latin-1", "replace").decode("latin-1")
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def pdf_bytes(lines, lines_per_page=50):
+    """
+    Writes text lines as a minimal multi-page PDF.
+
+    Args:
+        lines (list): Text lines
+        lines_per_page (int): Lines before a page break
+
+    Returns:
+        bytes: PDF file contents
+    """
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    # Object ids: 1 catalog, 2 page tree, 3 font, then a (page, content) pair per page
+    page_ids = [4 + 2 * i for i in range(len(pages))]
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        2: f"<< /Type /Pages /Kids [{' '.join(f'{p} 0 R' for p in page_ids)}] /Count {len(pages)} >>".encode(),
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    }
+    for page_id, page_lines in zip(page_ids, pages):
+        ops = ["BT", "/F1 10 Tf", "14 TL", "50 760 Td"]
+        ops.extend(f"({_pdf_escape(line)}) Tj T*" for line in page_lines)
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1")
+        objects[page_id] = (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>").encode()
+        objects[page_id + 1] = b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = {}
+    for obj_id in sorted(objects):
+        offsets[obj_id] = out.tell()
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (obj_id, objects[obj_id]))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for obj_id in sorted(objects):
+        out.write(b"%010d 00000 n \n" % offsets[obj_id])
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def docx_bytes(lines):
+    """
+    Writes text lines as a DOCX (one paragraph per line).
+
+    Returns:
+        bytes: DOCX file contents
+    """
+    from docx import Document
+    doc = Document()
+    for line in lines:
+        doc.add_paragraph(line)
+    out = io.BytesIO()
+    doc.save(out)
+    return out.getvalue()
@@ -0,0 +1,209 @@
+"""
+Concurrent-session load test for the analysis pipeline.
+
+Simulates users of the Streamlit app: each session arrives (Poisson arrivals at
+a given rate, or all at once), uploads a resume, submits the analysis job the
+Analyze button submits and polls it until it finishes. Gemini is replaced by
+the offline backend with a configurable delay and failure rate, so the test
+measures our own contention (job workers, pdflatex, memory) and not Google's.
+
+Usage:
+    python benchmarks/load_test.py --sessions 50 --rate 2
+    python benchmarks/load_test.py --sessions 100 --rate 1 2 4 8 --workers 8
+    python benchmarks/load_test.py --sessions 20 --rate 0 --llm-latency-ms 3000 --llm-error-rate 0.05
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import resource
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+TEMPLATES = ("modern", "professional", "twocolumn")
+
+
+def _configure(args):
+    # Read by modules.jobs and modules.offline_model at import, so set them first
+    os.environ["RESUME_AI_BACKEND"] = "offline"
+    os.environ["RESUME_JOB_WORKERS"] = str(args.workers)
+    os.environ["RESUME_OFFLINE_LATENCY_MS"] = str(args.llm_latency_ms)
+    os.environ["RESUME_OFFLINE_MS_PER_TOKEN"] = str(args.llm_ms_per_token)
+    os.environ["RESUME_OFFLINE_ERROR_RATE"] = str(args.llm_error_rate)
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list (None if empty)."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * p // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def _summary(values):
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 50) * 1000, 1) if values else None,
+        "p95_ms": round(percentile(values, 95) * 1000, 1) if values else None,
+        "p99_ms": round(percentile(values, 99) * 1000, 1) if values else None,
+        "max_ms": round(values[-1] * 1000, 1) if values else None,
+    }
+
+
+def _peak_rss_mb(who):
+    peak = resource.getrusage(who).ru_maxrss
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def build_inputs(count, seed):
+    """Distinct (resume_inputs, job_desc, template) tuples, as uploads."""
+    from corpus import JD_LENGTHS, RESUME_SIZES, pdf_bytes, resume_lines, synthetic_job_description, synthetic_resume
+    from modules.uploads import from_bytes
+    rng = random.Random(seed)
+    inputs = []
+    for i in range(count):
+        resume = synthetic_resume(rng.choice(list(RESUME_SIZES)), seed=seed * 100000 + i)
+        inputs.append((
+            {"upload": from_bytes(pdf_bytes(resume_lines(resume)), f"resume-{i}.pdf")},
+            synthetic_job_description(rng.choice(list(JD_LENGTHS)), seed=seed * 100000 + i),
+            TEMPLATES[i % len(TEMPLATES)],
+        ))
+    return inputs
+
+
+# --- SCENARIO ---
+def run_scenario(sessions, rate, inputs, poll_interval, with_ai_score, seed):
+    """
+    Runs `sessions` simulated users arriving at `rate` per second (0 = all at once).
+
+    Returns:
+        dict: Throughput, end-to-end and per-stage latency percentiles, error counts
+    """
+    from modules.jobs import get_job, submit_job
+    from modules.pipeline import STAGES, run_resume_pipeline
+
+    rng = random.Random(seed)
+    arrivals, t = [], 0.0
+    for _ in range(sessions):
+        arrivals.append(t)
+        if rate > 0:
+            t += rng.expovariate(rate)
+
+    lock = threading.Lock()
+    e2e, stage_times = [], defaultdict(list)
+    failures, stage_errors = Counter(), Counter()
+    start = time.perf_counter()
+
+    def session(i):
+        time.sleep(max(0.0, start + arrivals[i] - time.perf_counter()))
+        resume_inputs, job_desc, template = inputs[i % len(inputs)]
+        submitted = time.time()
+        job = submit_job(run_resume_pipeline, resume_inputs, job_desc, template_name=template,
+                         with_ai_score=with_ai_score, stages=STAGES)
+        # Poll like the UI does; the job's own timestamp gives the exact finish time
+        while not get_job(job.id).done:
+            get_job(job.id).snapshot()
+            time.sleep(poll_interval)
+        snap = job.snapshot()
+        with lock:
+            e2e.append(job.finished - submitted)
+            if snap["status"] == "failed":
+                failures[(snap["error"] or "").splitlines()[0][:120]] += 1
+                return
+            for stage, seconds in snap["result"]["timings"].items():
+                stage_times[stage].append(seconds)
+            for stage in snap["result"]["stage_errors"]:
+                stage_errors[stage] += 1
+
+    threads = [threading.Thread(target=session, args=(i,), daemon=True) for i in range(sessions)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+    wall = time.perf_counter() - start
+
+    completed = sessions - sum(failures.values())
+    return {
+        "sessions": sessions,
+        "arrival_rate": rate,
+        "wall_s": round(wall, 2),
+        "throughput_per_s": round(completed / wall, 3) if wall else None,
+        "completed": completed,
+        "failed": sum(failures.values()),
+        "error_rate": round(sum(failures.values()) / sessions, 4),
+        "failures": dict(failures),
+        "end_to_end": _summary(e2e),
+        "stages": {stage: _summary(times) for stage, times in sorted(stage_times.items())},
+        # Optional stages (ai_score, pdf, docx) fail without failing the session
+        "stage_error_rate": {stage: round(n / sessions, 4) for stage, n in sorted(stage_errors.items())},
+        "peak_rss_mb": _peak_rss_mb(resource.RUSAGE_SELF),
+        "peak_child_rss_mb": _peak_rss_mb(resource.RUSAGE_CHILDREN),
+    }
+
+
+def _print_scenario(result):
+    e2e = result["end_to_end"]
+    print(f"\n🚦 {result['sessions']} sessions at "
+          f"{result['arrival_rate'] or 'burst'}{'/s' if result['arrival_rate'] else ''}: "
+          f"{result['throughput_per_s']} sessions/s, {result['error_rate']:.1%} failed, "
+          f"peak RSS {result['peak_rss_mb']} MB (children {result['peak_child_rss_mb']} MB)")
+    print(f"{'stage':<14} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    empty = _summary([])
+    stages = sorted(set(result["stages"]) | set(result["stage_error_rate"]))
+    rows = [("end-to-end", e2e, None)] + [
+        (stage, result["stages"].get(stage, empty), result["stage_error_rate"].get(stage)) for stage in stages
+    ]
+    for name, stats, err in rows:
+        print(f"{name:<14} {stats['count']:>6} {stats['p50_ms'] or 0:>9.1f} {stats['p95_ms'] or 0:>9.1f} "
+              f"{stats['p99_ms'] or 0:>9.1f} {f'{err:.0%}' if err else '':>7}")
+    for message, count in result["failures"].items():
+        print(f"  ❌ {count}x {message}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the analysis pipeline with simulated sessions")
+    parser.add_argument("--sessions", type=int, default=20, help="simulated users per scenario")
+    parser.add_argument("--rate", type=float, nargs="+", default=[1.0],
+                        help="arrival rates in sessions/s to sweep (0 = all at once)")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("RESUME_JOB_WORKERS", "4")),
+                        help="job worker threads (RESUME_JOB_WORKERS)")
+    parser.add_argument("--unique", type=int, help="distinct resume/JD pairs (default: one per session)")
+    parser.add_argument("--ai-score", action="store_true", help="also run the AI scorer per session")
+    parser.add_argument("--llm-latency-ms", type=float, default=1500, help="offline model delay per call")
+    parser.add_argument("--llm-ms-per-token", type=float, default=0, help="offline model delay per output token")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="fraction of model calls that fail")
+    parser.add_argument("--poll-interval", type=float, default=0.5, help="UI polling interval in seconds")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="result file (default: benchmarks/results/load-<timestamp>.json)")
+    args = parser.parse_args()
+    _configure(args)
+
+    print(f"🏁 Load test: {args.sessions} sessions per rate, {args.workers} job workers, "
+          f"model delay {args.llm_latency_ms:.0f} ms, model error rate {args.llm_error_rate:.0%}")
+    report = {"config": vars(args), "scenarios": []}
+    for n, rate in enumerate(args.rate):
+        # Fresh inputs per scenario, so the stage memo does not turn later runs into cache hits
+        inputs = build_inputs(args.unique or args.sessions, seed=args.seed + n)
+        result = run_scenario(args.sessions, rate, inputs, args.poll_interval, args.ai_score, args.seed + n)
+        report["scenarios"].append(result)
+        _print_scenario(result)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"load-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📄 Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
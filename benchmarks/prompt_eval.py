@@ -0,0 +1,229 @@
+"""
+Prompt evaluation for the enhancer.
+
+Runs a fixed corpus of resume / job-description pairs through each enhancer
+prompt version (modules/prompts.py) and reports, per version: prompt and output
+tokens, model latency, the share of replies that fail to parse into a resume,
+and the ATS score uplift (calculate_ats_score after enhancement minus before).
+
+Backends:
+    offline   the local stand-in (deterministic; latency from --llm-ms-per-token)
+    gemini    the real model; add --record to save the replies for replay
+    recorded  replays replies saved with --record, keyed by prompt hash, so a
+              real-model run can be re-scored without calling the API again
+
+Usage:
+    python benchmarks/prompt_eval.py
+    python benchmarks/prompt_eval.py --backend gemini --record benchmarks/recordings/enhance.jsonl
+    python benchmarks/prompt_eval.py --backend recorded --recordings benchmarks/recordings/enhance.jsonl
+"""
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+
+def _configure(args):
+    # Read by modules.offline_model at import, so set them first
+    os.environ["RESUME_AI_BACKEND"] = "gemini" if args.backend == "gemini" else "offline"
+    os.environ["RESUME_OFFLINE_LATENCY_MS"] = str(args.llm_latency_ms)
+    os.environ["RESUME_OFFLINE_MS_PER_TOKEN"] = str(args.llm_ms_per_token)
+    os.environ["RESUME_OFFLINE_ERROR_RATE"] = "0"
+    # Every prompt must reach the backend; repeats would otherwise be cache hits
+    os.environ["RESUME_LLM_CACHE_SIZE"] = "0"
+
+
+def prompt_key(prompt):
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+def build_cases(count, seed):
+    """Fixed (name, resume text, job description) triples covering every size and JD length."""
+    from corpus import JD_LENGTHS, RESUME_SIZES, resume_lines, synthetic_job_description, synthetic_resume
+    cases = []
+    sizes, lengths = list(RESUME_SIZES), list(JD_LENGTHS)
+    for i in range(count):
+        size, length = sizes[i % len(sizes)], lengths[(i // len(sizes)) % len(lengths)]
+        resume = synthetic_resume(size, seed=seed * 1000 + i)
+        cases.append((f"{i:02d}-{size}-jd{length}", "\n".join(resume_lines(resume)),
+                      synthetic_job_description(length, seed=seed * 1000 + i)))
+    return cases
+
+
+# --- BACKENDS ---
+def _live_call(prompt):
+    from modules import llm
+    start = time.perf_counter()
+    reply = llm.generate("enhance", prompt)
+    return {
+        "text": reply.text,
+        "model": reply.model,
+        "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+        "prompt_tokens": reply.prompt_tokens,
+        "output_tokens": reply.output_tokens,
+    }
+
+
+def load_recordings(path):
+    """Recorded replies by prompt hash."""
+    recordings = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                recordings[entry["prompt_sha256"]] = entry
+    return recordings
+
+
+# --- EVALUATION ---
+def evaluate(version, cases, call, record=None, concurrency=8):
+    """
+    Runs every case through one prompt version.
+
+    Args:
+        version (str): Key of modules.prompts.ENHANCE_PROMPTS
+        cases (list): (name, resume text, job description) triples
+        call (callable): prompt -> reply dict, or None if there is no reply for it
+        record (file): Open JSONL file that replies are appended to
+        concurrency (int): Cases run at once
+
+    Returns:
+        dict: Aggregates for the version plus one row per case
+    """
+    from modules.converter import convert_resume_data_to_text
+    from modules.enhancer import build_enhancement_prompt, parse_enhancement_response
+    from modules.parser import extract_contact
+    from modules.scorer import calculate_ats_score
+
+    def run_case(case):
+        name, resume_text, job_desc = case
+        before, missing = calculate_ats_score(resume_text, job_desc)
+        prompt = build_enhancement_prompt(resume_text, job_desc, missing, version=version)
+        row = {"case": name, "score_before": before, "prompt_chars": len(prompt)}
+        try:
+            reply = call(prompt)
+        except Exception as e:
+            reply, row["error"] = None, f"{type(e).__name__}: {e}"
+        if reply is None:
+            row.setdefault("error", "No recorded reply for this prompt")
+            return row, None
+        result = parse_enhancement_response(reply["text"], extract_contact(resume_text))
+        row.update(model=reply.get("model"), latency_ms=reply["latency_ms"],
+                   prompt_tokens=reply["prompt_tokens"], output_tokens=reply["output_tokens"],
+                   parsed=not isinstance(result, dict))
+        if row["parsed"]:
+            row["score_after"] = calculate_ats_score(convert_resume_data_to_text(result), job_desc)[0]
+            row["uplift"] = round(row["score_after"] - before, 1)
+        return row, dict(reply, prompt_sha256=prompt_key(prompt), version=version, case=name)
+
+    # Cases are independent; latency is measured per call, so running them side by side is fair
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(run_case, cases))
+    rows = [row for row, _ in outcomes]
+    if record is not None:
+        for _, recorded in outcomes:
+            if recorded is not None:
+                record.write(json.dumps(recorded) + "\n")
+    return {"version": version, **summarize(rows), "per_case": rows}
+
+
+def summarize(rows):
+    answered = [r for r in rows if "latency_ms" in r]
+    parsed = [r for r in answered if r["parsed"]]
+
+    def mean(values):
+        return round(statistics.fmean(values), 1) if values else None
+
+    latencies = sorted(r["latency_ms"] for r in answered)
+    return {
+        "cases": len(rows),
+        "answered": len(answered),
+        "json_failure_rate": round(1 - len(parsed) / len(answered), 3) if answered else None,
+        "prompt_tokens_mean": mean([r["prompt_tokens"] for r in answered]),
+        "output_tokens_mean": mean([r["output_tokens"] for r in answered]),
+        "latency_p50_ms": latencies[len(latencies) // 2] if latencies else None,
+        "latency_p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else None,
+        "score_before_mean": mean([r["score_before"] for r in parsed]),
+        "score_after_mean": mean([r["score_after"] for r in parsed]),
+        "uplift_mean": mean([r["uplift"] for r in parsed]),
+    }
+
+
+def _print_report(results):
+    print(f"\n{'version':<8} {'cases':>6} {'json fail':>10} {'in tok':>8} {'out tok':>8} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'uplift':>7}")
+    for r in results:
+        fail = f"{r['json_failure_rate']:.0%}" if r['json_failure_rate'] is not None else "–"
+        uplift = f"{r['uplift_mean']:+.1f}" if r['uplift_mean'] is not None else "–"
+        print(f"{r['version']:<8} {r['answered']:>3}/{r['cases']:<2} {fail:>10} {r['prompt_tokens_mean'] or 0:>8.0f} "
+              f"{r['output_tokens_mean'] or 0:>8.0f} {r['latency_p50_ms'] or 0:>9.1f} "
+              f"{r['latency_p95_ms'] or 0:>9.1f} {uplift:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare enhancer prompt versions on a fixed corpus")
+    parser.add_argument("--versions", nargs="+", help="prompt versions to evaluate (default: all)")
+    parser.add_argument("--backend", choices=["offline", "gemini", "recorded"], default="offline")
+    parser.add_argument("--recordings", help="JSONL of recorded replies (--backend recorded)")
+    parser.add_argument("--record", help="append every reply to this JSONL file for later replay")
+    parser.add_argument("--cases", type=int, default=9, help="resume/JD pairs in the corpus")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--llm-latency-ms", type=float, default=0, help="offline model delay per call")
+    parser.add_argument("--llm-ms-per-token", type=float, default=5,
+                        help="offline model delay per output token (default ~ Gemini Flash throughput)")
+    parser.add_argument("--concurrency", type=int, default=8, help="cases evaluated at once")
+    parser.add_argument("--output", help="result file (default: benchmarks/results/prompts-<timestamp>.json)")
+    args = parser.parse_args()
+    if args.backend == "recorded" and not args.recordings:
+        parser.error("--backend recorded needs --recordings")
+    _configure(args)
+
+    from modules.prompts import ENHANCE_PROMPTS
+    versions = args.versions or list(ENHANCE_PROMPTS)
+    unknown = [v for v in versions if v not in ENHANCE_PROMPTS]
+    if unknown:
+        parser.error(f"unknown prompt version(s): {', '.join(unknown)}")
+
+    if args.backend == "recorded":
+        recordings = load_recordings(args.recordings)
+
+        def call(prompt):
+            return recordings.get(prompt_key(prompt))
+    else:
+        call = _live_call
+
+    cases = build_cases(args.cases, args.seed)
+    print(f"🏁 Evaluating enhancer prompts {', '.join(versions)} on {len(cases)} cases "
+          f"(backend: {args.backend})")
+    results = []
+    record = open(args.record, "a", encoding="utf-8") if args.record else None
+    try:
+        for version in versions:
+            # Stage functions print progress; keep it out of the report
+            with contextlib.redirect_stdout(io.StringIO()):
+                results.append(evaluate(version, cases, call, record, args.concurrency))
+    finally:
+        if record is not None:
+            record.close()
+    _print_report(results)
+
+    report = {"config": vars(args), "results": results}
+    output = args.output or os.path.join(RESULTS_DIR, f"prompts-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📄 Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
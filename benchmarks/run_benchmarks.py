@@ -0,0 +1,230 @@
+"""
+Stage benchmarks over a synthetic resume / job-description corpus.
+
+Times the hot paths one by one (parsing, keyword extraction, ATS scoring,
+text conversion, PDF and DOCX generation per template) and the LLM stages
+against the offline model stand-in, then writes the results as JSON so two
+commits can be compared.
+
+Usage:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --repeat 20 --output before.json
+    python benchmarks/run_benchmarks.py --compare before.json --threshold 0.15
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# LLM stages run against the local stand-in unless explicitly overridden
+os.environ.setdefault("RESUME_AI_BACKEND", "offline")
+
+from corpus import (  # noqa: E402
+    JD_LENGTHS, RESUME_SIZES, docx_bytes, pdf_bytes, resume_lines,
+    synthetic_job_description, synthetic_resume,
+)
+from modules import converter, llm  # noqa: E402
+from modules.converter import convert_resume_data_to_text  # noqa: E402
+from modules.enhancer import enhance_resume_content  # noqa: E402
+from modules.generator import generate_resume_docx, generate_resume_pdf  # noqa: E402
+from modules.parser import extract_text_from_docx, extract_text_from_pdf  # noqa: E402
+from modules.scorer import (  # noqa: E402
+    AI_BATCH_SIZE, calculate_ai_score, calculate_ai_scores_batch, calculate_ats_score,
+    extract_keyword_set, extract_keywords,
+)
+
+TEMPLATES = ("modern", "professional", "twocolumn")
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+
+# --- TIMING ---
+def time_stage(fn, repeat, setup=None):
+    """
+    Calls fn() `repeat` times after one warm-up call.
+
+    Args:
+        fn (callable): Zero-argument function to time
+        repeat (int): Timed iterations
+        setup (callable): Run before every call, outside the timed region
+
+    Returns:
+        dict: min/median/mean/max/stdev in milliseconds
+    """
+    samples = []
+    # Stage functions print progress; keep it out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(repeat + 1):
+            if setup:
+                setup()
+            start = time.perf_counter()
+            fn()
+            elapsed = (time.perf_counter() - start) * 1000
+            if i:
+                samples.append(elapsed)
+    return {
+        "runs": len(samples),
+        "min_ms": round(min(samples), 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "max_ms": round(max(samples), 3),
+        "stdev_ms": round(statistics.stdev(samples), 3) if len(samples) > 1 else 0.0,
+    }
+
+
+def _clear_caches():
+    """Benchmarks measure the cold path, so memoized results are dropped first."""
+    extract_keyword_set.cache_clear()
+    llm.clear_cache()
+    with converter._memo_lock:
+        converter._memo.clear()
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# --- SUITE ---
+def run_suite(repeat, sizes, jd_lengths, templates, log=print):
+    """
+    Times every stage for each corpus variant.
+
+    Returns:
+        dict: "stage[variant]" -> timing stats (or {"skipped": reason})
+    """
+    results = {}
+
+    def record(name, fn, setup=_clear_caches, runs=repeat):
+        try:
+            results[name] = time_stage(fn, runs, setup)
+            log(f"  {name:<48} {results[name]['median_ms']:>10.2f} ms")
+        except Exception as e:
+            results[name] = {"error": f"{type(e).__name__}: {e}"}
+            log(f"  {name:<48} ❌ {results[name]['error']}")
+
+    jds = {length: synthetic_job_description(length) for length in jd_lengths}
+    has_pdflatex = shutil.which("pdflatex") is not None
+    # pdflatex runs are ~1 s each, so they get fewer iterations
+    pdf_runs = max(1, repeat // 5)
+
+    for jd_length, jd in jds.items():
+        record(f"extract_keywords[jd={jd_length}]", lambda: extract_keywords(jd))
+
+    # Screening a pool of candidates: one request per resume vs. one per batch
+    jd = jds[jd_lengths[len(jd_lengths) // 2]]
+    pool = ["\n".join(resume_lines(synthetic_resume(sizes[i % len(sizes)], seed=i)))
+            for i in range(AI_BATCH_SIZE * 2)]
+    record(f"calculate_ai_score[pool={len(pool)}]", lambda: [calculate_ai_score(r, jd) for r in pool])
+    record(f"calculate_ai_scores_batch[pool={len(pool)}]", lambda: calculate_ai_scores_batch(pool, jd))
+
+    with tempfile.TemporaryDirectory(prefix="resume-bench-") as out_dir:
+        for size in sizes:
+            resume = synthetic_resume(size)
+            lines = resume_lines(resume)
+            text = "\n".join(lines)
+            pdf, docx = pdf_bytes(lines), docx_bytes(lines)
+            log(f"📄 {size} resume: {len(lines)} lines, PDF {len(pdf) // 1024} KB, DOCX {len(docx) // 1024} KB")
+
+            record(f"extract_text_from_pdf[{size}]", lambda: extract_text_from_pdf(io.BytesIO(pdf)))
+            record(f"extract_text_from_docx[{size}]", lambda: extract_text_from_docx(io.BytesIO(docx)))
+            record(f"convert_resume_data_to_text[{size}]", lambda: convert_resume_data_to_text(resume))
+            for jd_length, jd in jds.items():
+                record(f"calculate_ats_score[{size},jd={jd_length}]", lambda: calculate_ats_score(text, jd))
+
+            jd = jds[jd_lengths[len(jd_lengths) // 2]]
+            record(f"calculate_ai_score[{size}]", lambda: calculate_ai_score(text, jd))
+            record(f"enhance_resume_content[{size}]", lambda: enhance_resume_content(text, jd, ["kafka", "airflow"]))
+
+            for template in templates:
+                record(f"generate_resume_docx[{size},{template}]",
+                       lambda: generate_resume_docx(resume, template, out_dir))
+                name = f"generate_resume_pdf[{size},{template}]"
+                if has_pdflatex:
+                    record(name, lambda: generate_resume_pdf(resume, template, out_dir), runs=pdf_runs)
+                else:
+                    results[name] = {"skipped": "pdflatex not found"}
+                    log(f"  {name:<48} ⏭️ skipped (pdflatex not found)")
+    return results
+
+
+# --- COMPARISON ---
+def compare(baseline, current, threshold):
+    """
+    Prints median changes against a baseline report.
+
+    Returns:
+        list: Names of stages that got slower by more than `threshold`
+    """
+    regressions = []
+    print(f"\n{'stage':<50} {'before':>10} {'after':>10} {'change':>8}")
+    for name, stats in current["results"].items():
+        before = baseline["results"].get(name, {})
+        if "median_ms" not in stats or "median_ms" not in before:
+            continue
+        change = (stats["median_ms"] - before["median_ms"]) / before["median_ms"] if before["median_ms"] else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = " ⚠️"
+        print(f"{name:<50} {before['median_ms']:>10.2f} {stats['median_ms']:>10.2f} {change:>+7.0%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the resume pipeline stages")
+    parser.add_argument("--repeat", type=int, default=10, help="timed iterations per stage")
+    parser.add_argument("--sizes", nargs="+", default=list(RESUME_SIZES), choices=list(RESUME_SIZES))
+    parser.add_argument("--jd-lengths", nargs="+", default=list(JD_LENGTHS), choices=list(JD_LENGTHS))
+    parser.add_argument("--templates", nargs="+", default=list(TEMPLATES), choices=list(TEMPLATES))
+    parser.add_argument("--output", help="result file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="baseline result file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="relative median slowdown reported as a regression (default 0.2)")
+    args = parser.parse_args()
+
+    commit = _git_commit()
+    print(f"🏁 Benchmarking {commit or 'working tree'} ({args.repeat} runs per stage, "
+          f"AI backend: {os.environ['RESUME_AI_BACKEND']})")
+    report = {
+        "meta": {
+            "commit": commit,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "ai_backend": os.environ["RESUME_AI_BACKEND"],
+        },
+        "results": run_suite(args.repeat, args.sizes, args.jd_lengths, args.templates),
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit or 'latest'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📄 Results written to {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} stage(s) slower than the baseline by more than {args.threshold:.0%}")
+            sys.exit(1)
+        print("\n✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Accounting Module
+Records prompt/output tokens, latency, model, cache hit and cost for every
+model call, aggregates them per session, per user and per day, and enforces the
+daily token budgets that llm.generate() checks before each call.
+
+Calls are attributed to whoever opened the current usage_scope():
+
+    with usage_scope(session="abc123", user="abc123"):
+        run the pipeline...
+"""
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+
+from modules.config import load_environment
+
+load_environment()
+# List prices in USD per 1M tokens (input, output). Override or extend with
+# RESUME_MODEL_PRICES='{"model-name": [input, output]}'; unknown models cost 0.
+MODEL_PRICES = {
+    "gemini-flash": (0.30, 2.50),
+    "gemini-flash-latest": (0.30, 2.50),
+    "gemini-flash-lite-latest": (0.10, 0.40),
+    "gemini-pro-latest": (1.25, 10.00),
+}
+MODEL_PRICES.update({k: tuple(v) for k, v in json.loads(os.getenv("RESUME_MODEL_PRICES", "{}")).items()})
+
+# Daily token budgets (prompt + output); 0 means unlimited
+USER_DAILY_TOKENS = int(os.getenv("RESUME_BUDGET_USER_TOKENS", "0"))
+GLOBAL_DAILY_TOKENS = int(os.getenv("RESUME_BUDGET_GLOBAL_TOKENS", "0"))
+# "reject" refuses calls over budget; "downgrade" switches them to a cheaper model
+# until usage reaches HARD_LIMIT_FACTOR times the budget, then rejects
+BUDGET_POLICY = os.getenv("RESUME_BUDGET_POLICY", "reject")
+DOWNGRADE_MODEL = os.getenv("RESUME_BUDGET_DOWNGRADE_MODEL", "gemini-flash-lite-latest")
+HARD_LIMIT_FACTOR = float(os.getenv("RESUME_BUDGET_HARD_LIMIT_FACTOR", "1.5"))
+USAGE_LOG = os.getenv("RESUME_USAGE_LOG")
+
+MAX_SESSIONS = 10000
+MAX_DAYS = 31
+
+
+class BudgetExceeded(Exception):
+    """A model call was refused because a daily token budget is used up."""
+
+
+@dataclass
+class CallRecord:
+    timestamp: float
+    day: str
+    session: str
+    user: str
+    task: str
+    model: str
+    prompt_tokens: int
+    output_tokens: int
+    latency_ms: float
+    cache_hit: bool
+    status: str
+    cost_usd: float
+
+
+_scope = contextvars.ContextVar("resume_usage_scope", default=(None, None))
+_lock = threading.Lock()
+_sessions = OrderedDict()   # session -> totals
+_users = OrderedDict()      # (user, day) -> totals
+_days = OrderedDict()       # day -> totals
+_log_lock = threading.Lock()
+
+
+@contextmanager
+def usage_scope(session=None, user=None):
+    """Attributes model calls made inside the block to a session and user (user defaults to session)."""
+    token = _scope.set((session, user or session))
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+def current_scope():
+    """(session, user) of the innermost usage_scope, or (None, None)."""
+    return _scope.get()
+
+
+def _today():
+    return time.strftime("%Y-%m-%d", time.gmtime())
+
+
+def _empty_totals():
+    return {"calls": 0, "cache_hits": 0, "errors": 0, "prompt_tokens": 0,
+            "output_tokens": 0, "cost_usd": 0.0, "latency_ms": 0.0, "models": {}}
+
+
+def _bucket(table, key, limit):
+    totals = table.get(key)
+    if totals is None:
+        totals = table[key] = _empty_totals()
+        if len(table) > limit:
+            table.popitem(last=False)
+    else:
+        table.move_to_end(key)
+    return totals
+
+
+def _add(totals, record):
+    totals["calls"] += 1
+    totals["cache_hits"] += record.cache_hit
+    totals["errors"] += record.status != "ok"
+    totals["prompt_tokens"] += record.prompt_tokens
+    totals["output_tokens"] += record.output_tokens
+    totals["cost_usd"] += record.cost_usd
+    totals["latency_ms"] += record.latency_ms
+    totals["models"][record.model] = totals["models"].get(record.model, 0) + 1
+
+
+def estimate_cost(model, prompt_tokens, output_tokens):
+    """USD cost of a call at MODEL_PRICES list prices (0 for unknown models)."""
+    price_in, price_out = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * price_in + output_tokens * price_out) / 1_000_000
+
+
+def record_call(task, model, prompt_tokens, output_tokens, latency, cache_hit=False, status="ok"):
+    """
+    Records one model call against the current session, user and day.
+
+    Args:
+        task (str): What the call was for ("ai_score", "enhance", ...)
+        model (str): Model that served the call
+        prompt_tokens (int): Input tokens billed
+        output_tokens (int): Output tokens billed
+        latency (float): Seconds spent waiting for the model
+        cache_hit (bool): Served from the response cache (no tokens billed)
+        status (str): "ok" or "error"
+
+    Returns:
+        CallRecord: The stored record
+    """
+    session, user = current_scope()
+    record = CallRecord(
+        timestamp=time.time(), day=_today(), session=session, user=user, task=task, model=model,
+        prompt_tokens=prompt_tokens, output_tokens=output_tokens,
+        latency_ms=round(latency * 1000, 1), cache_hit=cache_hit, status=status,
+        cost_usd=estimate_cost(model, prompt_tokens, output_tokens),
+    )
+    with _lock:
+        _add(_bucket(_days, record.day, MAX_DAYS), record)
+        if session:
+            _add(_bucket(_sessions, session, MAX_SESSIONS), record)
+        if user:
+            _add(_bucket(_users, (user, record.day), MAX_SESSIONS), record)
+
+    if USAGE_LOG:
+        line = json.dumps(asdict(record))
+        with _log_lock:
+            with open(USAGE_LOG, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+    return record
+
+
+def _copy(totals):
+    if totals is None:
+        return _empty_totals()
+    out = dict(totals, models=dict(totals["models"]))
+    out["cost_usd"] = round(out["cost_usd"], 6)
+    out["latency_ms"] = round(out["latency_ms"], 1)
+    out["total_tokens"] = out["prompt_tokens"] + out["output_tokens"]
+    return out
+
+
+def session_usage(session):
+    """Totals for one session (calls, cache hits, tokens, cost, latency, calls per model)."""
+    with _lock:
+        return _copy(_sessions.get(session))
+
+
+def user_usage(user, day=None):
+    """Totals for one user on one day (default: today, UTC)."""
+    with _lock:
+        return _copy(_users.get((user, day or _today())))
+
+
+def day_usage(day=None):
+    """Totals across everyone for one day (default: today, UTC)."""
+    with _lock:
+        return _copy(_days.get(day or _today()))
+
+
+# --- BUDGETS ---
+def _tokens(totals):
+    return totals["prompt_tokens"] + totals["output_tokens"] if totals else 0
+
+
+def check_budget(model, estimated_tokens):
+    """
+    Decides whether a call may go ahead under the daily budgets.
+
+    Args:
+        model (str): Model the caller wants
+        estimated_tokens (int): Expected prompt + output tokens of the call
+
+    Returns:
+        str: Model to use (the requested one, or DOWNGRADE_MODEL when over budget)
+
+    Raises:
+        BudgetExceeded: If the call is refused
+    """
+    if not USER_DAILY_TOKENS and not GLOBAL_DAILY_TOKENS:
+        return model
+    _, user = current_scope()
+    day = _today()
+    with _lock:
+        used_user = _tokens(_users.get((user, day))) if user else 0
+        used_global = _tokens(_days.get(day))
+
+    def over(limit, used, factor=1.0):
+        return limit and used + estimated_tokens > limit * factor
+
+    which = "daily user" if over(USER_DAILY_TOKENS, used_user) else \
+        "daily global" if over(GLOBAL_DAILY_TOKENS, used_global) else None
+    if which is None:
+        return model
+    if BUDGET_POLICY == "downgrade" and not (
+            over(USER_DAILY_TOKENS, used_user, HARD_LIMIT_FACTOR)
+            or over(GLOBAL_DAILY_TOKENS, used_global, HARD_LIMIT_FACTOR)):
+        return DOWNGRADE_MODEL
+    raise BudgetExceeded(f"The {which} token budget is used up. Please try again tomorrow.")
@@ -0,0 +1,117 @@
+"""
+Artifacts Module
+Content-addressed storage for generated files. A file is stored once under the
+SHA-256 of its bytes and can be served or downloaded by that hash.
+
+Renders are not reproducible byte for byte (pdflatex embeds timestamps), so the
+store keeps only the MAX_ARTIFACTS most recently stored or used files.
+"""
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import threading
+
+from modules.config import load_environment
+
+load_environment()
+ARTIFACT_DIR = os.path.join("output", "artifacts")
+# Comfortably above what the pipeline's stage memo (256 runs, a PDF and a DOCX each) refers to
+MAX_ARTIFACTS = int(os.getenv("RESUME_ARTIFACT_CACHE_SIZE", "1000"))
+
+CONTENT_TYPES = {
+    ".pdf": "application/pdf",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ".json": "application/json",
+    ".zip": "application/zip",
+}
+
+_DIGEST_RE = re.compile(r'^[0-9a-f]{64}$')
+_prune_lock = threading.Lock()
+
+
+def store_file(path):
+    """
+    Copies a file into the artifact store.
+
+    Args:
+        path (str): File to store
+
+    Returns:
+        str: Artifact id ("<sha256><ext>", e.g. "ab12...ef.pdf")
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            h.update(chunk)
+    artifact_id = h.hexdigest() + os.path.splitext(path)[1].lower()
+
+    os.makedirs(ARTIFACT_DIR, exist_ok=True)
+    target = os.path.join(ARTIFACT_DIR, artifact_id)
+    if os.path.exists(target):
+        _touch(target)
+        return artifact_id
+    # Copy to a private temp file, then rename, so readers never see a half-written
+    # artifact and threads storing the same bytes do not write into one file
+    fd, tmp = tempfile.mkstemp(prefix=".store-", suffix=".tmp", dir=ARTIFACT_DIR)
+    try:
+        with os.fdopen(fd, "wb") as out, open(path, "rb") as src:
+            shutil.copyfileobj(src, out)
+        os.replace(tmp, target)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    _prune()
+    return artifact_id
+
+
+def _touch(path):
+    # The mtime records when an artifact was last stored or used, for pruning
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def _prune():
+    """Removes the least recently used artifacts beyond MAX_ARTIFACTS."""
+    if MAX_ARTIFACTS <= 0 or not _prune_lock.acquire(blocking=False):
+        return
+    try:
+        entries = []
+        for entry in os.scandir(ARTIFACT_DIR):
+            # Files still being copied start with a dot
+            if entry.is_file() and not entry.name.startswith("."):
+                try:
+                    entries.append((entry.stat().st_mtime, entry.path))
+                except OSError:
+                    pass
+        entries.sort()
+        for _, path in entries[:max(0, len(entries) - MAX_ARTIFACTS)]:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+    finally:
+        _prune_lock.release()
+
+
+def artifact_path(artifact_id):
+    """
+    Resolves an artifact id to its file path.
+
+    Returns:
+        str: Path of the stored file, or None if the id is malformed or unknown
+    """
+    digest, ext = os.path.splitext(artifact_id)
+    if not _DIGEST_RE.match(digest) or ext not in CONTENT_TYPES:
+        return None
+    path = os.path.join(ARTIFACT_DIR, artifact_id)
+    if not os.path.exists(path):
+        return None
+    _touch(path)
+    return path
@@ -0,0 +1,70 @@
+"""
+Config Module
+Loads the .env file and configures the Gemini SDK on first use instead of at
+import time, so starting the app (or importing any module) does not pay for
+google.generativeai until a model is actually needed.
+"""
+import logging
+import os
+import threading
+
+# modules.telemetry imports this module, so use its logger by name
+logger = logging.getLogger("resume_ai")
+_lock = threading.Lock()
+_env_loaded = False
+_genai = None
+
+
+def load_environment():
+    """Reads .env into os.environ once per process."""
+    global _env_loaded
+    if _env_loaded:
+        return
+    with _lock:
+        if not _env_loaded:
+            from dotenv import load_dotenv
+            load_dotenv()
+            _env_loaded = True
+
+
+def get_genai():
+    """
+    Imports and configures google.generativeai on first call.
+
+    Returns:
+        module: The configured genai module
+    """
+    global _genai
+    if _genai is not None:
+        return _genai
+    load_environment()
+    with _lock:
+        if _genai is None:
+            import google.generativeai as genai
+            api_key = os.getenv("GEMINI_API_KEY")
+            if api_key:
+                genai.configure(api_key=api_key)
+            else:
+                logger.error("GEMINI_API_KEY is missing from environment variables. Check that you "
+                             "created a file named '.env' (not .env.txt) and it contains your key.")
+            _genai = genai
+    return _genai
+
+
+def get_model(name):
+    """
+    Returns a GenerativeModel, configuring the SDK if this is the first call.
+    With RESUME_AI_BACKEND=offline (or for the model name "offline") a local
+    stand-in is returned instead, so no API key or network access is needed.
+
+    Args:
+        name (str): Gemini model name
+
+    Returns:
+        GenerativeModel: Model handle
+    """
+    load_environment()
+    if name == "offline" or os.getenv("RESUME_AI_BACKEND", "gemini") == "offline":
+        from modules.offline_model import OfflineModel
+        return OfflineModel(name)
+    return get_genai().GenerativeModel(name)
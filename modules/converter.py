@@ -2,100 +2,152 @@
 Converter Module
 Converts enhanced resume JSON data back to plain text for re-scoring.
 This enables before/after ATS score comparison.
+
+convert_resume_data() walks the resume once and returns the text together with
+its normalized keyword set and per-section term counts, so re-scoring is a set
+operation instead of a serialize-then-reparse round trip.
 """
+import hashlib
+import json
+import threading
+from collections import Counter, OrderedDict, namedtuple
+
+from modules.model import ResumeDocument
+from modules.scorer import keyword_terms
+
+ConvertedResume = namedtuple("ConvertedResume", ["text", "keywords", "section_terms"])
+
+# Memo for raw dicts, keyed by a structural hash (documents memoize on themselves)
+_MEMO_SIZE = 128
+_memo = OrderedDict()
+_memo_lock = threading.Lock()
+
+def structural_hash(data):
+    """Stable hash of a resume dict's contents (key order does not matter)."""
+    payload = json.dumps(data, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+def convert_resume_data(data):
+    """
+    Converts resume data to text, keyword set and per-section term counts in one pass.
+    
+    Args:
+        data (ResumeDocument or dict): Enhanced resume data from AI
+        
+    Returns:
+        ConvertedResume: (text, frozenset of keywords, {section: Counter of terms})
+    """
+    if not data or isinstance(data, str):
+        return ConvertedResume("", frozenset(), {})
+    if isinstance(data, ResumeDocument):
+        return data.cached_view('converted', _convert_document)
+
+    key = structural_hash(data)
+    with _memo_lock:
+        if key in _memo:
+            _memo.move_to_end(key)
+            return _memo[key]
+    result = _convert_document(ResumeDocument.from_dict(data))
+    with _memo_lock:
+        _memo[key] = result
+        if len(_memo) > _MEMO_SIZE:
+            _memo.popitem(last=False)
+    return result
 
 def convert_resume_data_to_text(data):
     """
-    Converts the enhanced resume JSON structure back to plain text.
+    Converts the enhanced resume structure back to plain text.
     This text can be used for ATS scoring to measure improvement.
     
     Args:
-        data (dict): Enhanced resume data from AI
+        data (ResumeDocument or dict): Enhanced resume data from AI
         
     Returns:
         str: Plain text representation of the resume
     """
-    if not data or isinstance(data, str):
-        return ""
-    
+    return convert_resume_data(data).text
+
+def _convert_document(doc):
     text_parts = []
+    section_terms = {}
+    section = "contact"
+
+    def add(line):
+        # Lines are joined with newlines, so tokenizing each one separately
+        # yields exactly the terms of the joined text.
+        text_parts.append(line)
+        terms = keyword_terms(line)
+        if terms:
+            section_terms.setdefault(section, Counter()).update(terms)
+
+    contact = doc.contact
     
     # Personal Information
-    if data.get('name'):
-        text_parts.append(f"Name: {data['name']}")
-    if data.get('email'):
-        text_parts.append(f"Email: {data['email']}")
-    if data.get('phone'):
-        text_parts.append(f"Phone: {data['phone']}")
-    if data.get('linkedin'):
-        text_parts.append(f"LinkedIn: {data['linkedin']}")
-    if data.get('github'):
-        text_parts.append(f"GitHub: {data['github']}")
-    if data.get('website'):
-        text_parts.append(f"Website: {data['website']}")
+    if contact.name:
+        add(f"Name: {contact.name}")
+    if contact.email:
+        add(f"Email: {contact.email}")
+    if contact.phone:
+        add(f"Phone: {contact.phone}")
+    if contact.linkedin:
+        add(f"LinkedIn: {contact.linkedin}")
+    if contact.github:
+        add(f"GitHub: {contact.github}")
+    if contact.website:
+        add(f"Website: {contact.website}")
     
-    text_parts.append("")  # Blank line
+    add("")  # Blank line
     
     # Summary
-    if data.get('summary'):
-        text_parts.append("PROFESSIONAL SUMMARY")
-        text_parts.append(data['summary'])
-        text_parts.append("")
+    if doc.summary:
+        section = "summary"
+        add("PROFESSIONAL SUMMARY")
+        add(doc.summary)
+        add("")
     
     # Experience
-    if data.get('experience'):
-        text_parts.append("WORK EXPERIENCE")
-        for job in data['experience']:
-            title = job.get('title', '')
-            company = job.get('company', '')
-            dates = job.get('dates', '')
-            
-            if company:
-                text_parts.append(f"{title} at {company} ({dates})")
+    if doc.experience:
+        section = "experience"
+        add("WORK EXPERIENCE")
+        for job in doc.experience:
+            if job.company:
+                add(f"{job.title} at {job.company} ({job.dates})")
             else:
-                text_parts.append(f"{title} ({dates})")
+                add(f"{job.title} ({job.dates})")
             
-            if job.get('bullets'):
-                for bullet in job['bullets']:
-                    text_parts.append(f"- {bullet}")
-            text_parts.append("")
+            for bullet in job.bullets:
+                add(f"- {bullet}")
+            add("")
     
     # Projects
-    if data.get('projects'):
-        text_parts.append("PROJECTS")
-        for proj in data['projects']:
-            name = proj.get('name', '')
-            link = proj.get('link', '')
-            desc = proj.get('description', '')
-            
-            text_parts.append(f"{name}")
-            if link:
-                text_parts.append(f"Link: {link}")
-            if desc:
-                text_parts.append(desc)
-            text_parts.append("")
+    if doc.projects:
+        section = "projects"
+        add("PROJECTS")
+        for proj in doc.projects:
+            add(f"{proj.name}")
+            if proj.link:
+                add(f"Link: {proj.link}")
+            if proj.description:
+                add(proj.description)
+            add("")
     
     # Education
-    if data.get('education'):
-        text_parts.append("EDUCATION")
-        for edu in data['education']:
-            school = edu.get('school', '')
-            degree = edu.get('degree', '')
-            year = edu.get('year', '')
-            gpa = edu.get('gpa', '')
-            
-            text_parts.append(f"{degree} at {school} ({year})")
-            if gpa:
-                text_parts.append(f"GPA: {gpa}")
-            text_parts.append("")
+    if doc.education:
+        section = "education"
+        add("EDUCATION")
+        for edu in doc.education:
+            add(f"{edu.degree} at {edu.school} ({edu.year})")
+            if edu.gpa:
+                add(f"GPA: {edu.gpa}")
+            add("")
     
     # Skills
-    if data.get('skills'):
-        text_parts.append("SKILLS")
-        for skill in data['skills']:
-            category = skill.get('category', '')
-            items = skill.get('items', '')
-            text_parts.append(f"{category}: {items}")
-        text_parts.append("")
+    if doc.skills:
+        section = "skills"
+        add("SKILLS")
+        for skill in doc.skills:
+            add(f"{skill.category}: {skill.items}")
+        add("")
     
-    return "\n".join(text_parts)
+    keywords = frozenset().union(*section_terms.values()) if section_terms else frozenset()
+    return ConvertedResume("\n".join(text_parts), keywords, section_terms)
@@ -0,0 +1,209 @@
+"""
+Dedup Module
+Near-duplicate resume detection with MinHash signatures and locality-sensitive
+hashing (LSH).
+
+Each parsed resume is reduced to a MinHash signature over word shingles. The
+signature is split into bands, and resumes that share any band are candidate
+duplicates. Candidates are confirmed when their estimated Jaccard similarity
+reaches THRESHOLD. Lookups touch only the colliding buckets, so they stay fast
+however many resumes have been seen.
+
+canonical_text() reports a near-duplicate of an earlier resume. The index is
+shared by every session, and two people's resumes can be near-identical apart
+from the contact header, so by default a match is only flagged. A caller doing
+bulk screening can ask for reuse. The earlier text is then substituted, so the
+memoized downstream stages (scores, Gemini calls, rendering) serve its results,
+but only when both resumes carry the same email and phone.
+
+The index keeps a signature and contact key per resume, not its text. Text is
+kept only for resumes registered by a caller asking for reuse; otherwise it is
+read back from the candidate store when that is enabled.
+"""
+import sqlite3
+import hashlib
+import os
+import random
+import re
+import threading
+from collections import OrderedDict
+
+from modules import store
+from modules.config import load_environment
+from modules.parser import extract_contact
+from modules.telemetry import inc, set_attribute, traced
+
+load_environment()
+# Estimated Jaccard similarity at which two resumes count as the same; 0 disables dedup.
+# With 128 permutations the estimate is within about ±0.04 of the true value.
+THRESHOLD = float(os.getenv("RESUME_DEDUP_THRESHOLD", "0.9"))
+SHINGLE_WORDS = 5
+NUM_PERM = 128
+# 16 bands of 8 rows: pairs above ~0.7 similarity almost always share a band
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+MAX_ENTRIES = 50000
+
+_MERSENNE = (1 << 61) - 1
+_rng = random.Random(1)
+# Fixed seed: signatures must be comparable across calls
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE), _rng.randrange(0, _MERSENNE)) for _ in range(NUM_PERM)]
+_WORD_RE = re.compile(r'\w+')
+_DIGITS_RE = re.compile(r'\D')
+
+
+class _Index:
+    """Signatures of seen resumes plus LSH buckets (band, band hash) -> resume ids."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()    # resume id -> (signature, contact key, text or None)
+        self.exact = OrderedDict()      # resume id -> (canonical id, similarity, same contact) of known variants
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def _band_keys(self, signature):
+        return [(band, hash(signature[band * ROWS:(band + 1) * ROWS])) for band in range(BANDS)]
+
+    def query(self, signature):
+        """Most similar resume sharing a band as (resume id, similarity), or (None, 0.0)."""
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates.update(self.buckets.get(key, ()))
+        best, best_similarity = None, 0.0
+        for rid in candidates:
+            similarity = estimate_similarity(signature, self.entries[rid][0])
+            if similarity > best_similarity:
+                best, best_similarity = rid, similarity
+        return best, best_similarity
+
+    def add(self, rid, signature, contact, text=None):
+        self.entries[rid] = (signature, contact, text)
+        for key in self._band_keys(signature):
+            self.buckets.setdefault(key, set()).add(rid)
+        while len(self.entries) > self.max_entries:
+            old, (old_signature, _, _) = self.entries.popitem(last=False)
+            for key in self._band_keys(old_signature):
+                bucket = self.buckets.get(key)
+                if bucket is not None:
+                    bucket.discard(old)
+                    if not bucket:
+                        del self.buckets[key]
+        # Aliases of evicted resumes are skipped on lookup, so trimming by age is enough
+        while len(self.exact) > self.max_entries:
+            self.exact.popitem(last=False)
+
+
+_index = _Index(MAX_ENTRIES)
+
+
+def shingles(text, size=SHINGLE_WORDS):
+    """Hashed word n-grams of a text (case- and whitespace-insensitive)."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < size:
+        words = words + [""] * (size - len(words))
+    return {
+        int.from_bytes(hashlib.blake2b(" ".join(words[i:i + size]).encode("utf-8"), digest_size=8).digest(), "big")
+        for i in range(len(words) - size + 1)
+    }
+
+
+def minhash(text):
+    """
+    MinHash signature of a text.
+
+    Returns:
+        tuple: NUM_PERM minimum hash values
+    """
+    hashes = shingles(text)
+    return tuple(min((a * h + b) % _MERSENNE for h in hashes) for a, b in _PERMUTATIONS)
+
+
+def estimate_similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+def contact_key(text):
+    """(email, phone digits) from a resume's header, or None if it has neither."""
+    contact = extract_contact(text)
+    key = (contact["email"].lower(), _DIGITS_RE.sub("", contact["phone"]))
+    return key if any(key) else None
+
+
+def _earlier_text(rid):
+    """Text of a seen resume, from the index or the candidate store, or None."""
+    with _index.lock:
+        entry = _index.entries.get(rid)
+    if entry is not None and entry[2] is not None:
+        return entry[2]
+    if not store.enabled():
+        return None
+    try:
+        return store.resume_text(rid)
+    except sqlite3.Error:
+        return None
+
+
+def _result(text, canonical, similarity, same_contact, reuse, kind):
+    earlier = _earlier_text(canonical) if reuse and same_contact else None
+    reused = earlier is not None
+    inc("resume_dedup_hits_total", kind=kind)
+    set_attribute("similarity", similarity)
+    set_attribute("reused", reused)
+    info = {"similarity": similarity, "content_hash": canonical,
+            "same_contact": same_contact, "reused": reused}
+    return (earlier if reused else text), info
+
+
+@traced("dedup")
+def canonical_text(text, reuse=False):
+    """
+    Looks a parsed resume up among those seen before, registering it if it is new.
+
+    Args:
+        text (str): Parsed resume text
+        reuse (bool): Continue with the earlier resume's text (so its results
+            are reused) when the match has the same email and phone and its
+            text is still available. Off for interactive tailoring, where the
+            user's own text must be used.
+
+    Returns:
+        tuple: (text to analyse, duplicate info dict or None). The dict holds
+        the similarity, the earlier resume's content hash, whether the contact
+        details match and whether its text was substituted ("reused").
+    """
+    if THRESHOLD <= 0 or not text or not text.strip():
+        return text, None
+    # Same key as the candidate store, so a match can be looked up there
+    rid = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    with _index.lock:
+        # Exact repeats of a resume or of a known variant skip the signature entirely
+        if rid in _index.entries:
+            _index.entries.move_to_end(rid)
+            return text, None
+        canonical, similarity, same_contact = _index.exact.get(rid, (None, 0.0, False))
+        known = canonical in _index.entries
+    if known:
+        return _result(text, canonical, similarity, same_contact, reuse, "repeat")
+
+    # Signature and contact extraction run outside the lock
+    signature = minhash(text)
+    contact = contact_key(text)
+    with _index.lock:
+        match, similarity = _index.query(signature)
+        if match is None or similarity < THRESHOLD:
+            _index.add(rid, signature, contact, text if reuse else None)
+            return text, None
+        _index.entries.move_to_end(match)
+        same_contact = contact is not None and contact == _index.entries[match][1]
+        similarity = round(similarity, 3)
+        _index.exact[rid] = (match, similarity, same_contact)
+        _index.exact.move_to_end(rid)
+    return _result(text, match, similarity, same_contact, reuse, "near")
+
+
+def clear():
+    """Forgets every seen resume."""
+    global _index
+    _index = _Index(MAX_ENTRIES)
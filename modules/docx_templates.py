@@ -0,0 +1,333 @@
+"""
+DOCX Templates Module
+Builds one pre-styled base document per layout (margins, fonts and heading
+borders are defined once as Word styles) and renders a resume by cloning that
+base and appending the whole body as a single block of WordprocessingML.
+"""
+import io
+import os
+import threading
+from xml.sax.saxutils import escape
+
+from docx import Document as DocxDocument
+from docx.enum.style import WD_STYLE_TYPE
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.oxml import OxmlElement, parse_xml
+from docx.oxml.ns import nsdecls, qn
+from docx.shared import Pt, Inches, RGBColor
+
+from modules.model import ResumeDocument
+
+# Designers can drop a hand-styled base file in here (e.g. modern.docx) to
+# override the generated one. It must define the styles listed in STYLE_IDS.
+BASE_DOCX_DIR = os.path.join("assets", "docx")
+
+# --- LAYOUTS (one per LaTeX template) ---
+DOCX_LAYOUTS = {
+    "modern": {
+        "font": "Calibri",
+        "size": 11,
+        "name_size": 24,
+        "heading_size": 14,
+        "heading_color": (0, 51, 153),
+        "heading_caps": "small",
+        "margin": 0.5,
+        "sections": [
+            ("summary", "Summary"),
+            ("experience", "Work Experience"),
+            ("projects", "Projects"),
+            ("education", "Education"),
+            ("skills", "Skills"),
+        ],
+    },
+    "professional": {
+        "font": "Times New Roman",
+        "size": 11,
+        "name_size": 24,
+        "heading_size": 12,
+        "heading_color": (0, 0, 0),
+        "heading_caps": "small",
+        "margin": 0.5,
+        "sections": [
+            ("education", "Education"),
+            ("experience", "Experience"),
+            ("projects", "Projects"),
+            ("skills", "Technical Skills"),
+        ],
+    },
+    "twocolumn": {
+        "font": "Arial",
+        "size": 10,
+        "name_size": 22,
+        "heading_size": 12,
+        "heading_color": (0, 100, 200),
+        "heading_caps": "all",
+        "margin": 0.5,
+        "left_width": 0.30,
+        "sections": [
+            ("education", "Education"),
+            ("skills", "Skills"),
+        ],
+        "right_sections": [
+            ("summary", "Profile"),
+            ("experience", "Experience"),
+            ("projects", "Projects"),
+        ],
+    },
+}
+
+# Style names defined in every base document, mapped to their Word style ids
+STYLE_IDS = {
+    "name": "ResumeName",
+    "contact": "ResumeContact",
+    "entry": "ResumeEntry",
+    "heading": "Heading1",
+    "bullet": "ListBullet",
+    "normal": "Normal",
+}
+
+_TWIPS_PER_INCH = 1440
+_base_cache = {}
+_base_lock = threading.Lock()
+
+
+# --- BASE DOCUMENT (built once per layout) ---
+def _set_style_font(style, font_name):
+    """Sets an explicit font on a style and drops theme fonts that would override it."""
+    style.font.name = font_name
+    rFonts = style.element.get_or_add_rPr().get_or_add_rFonts()
+    for attr in ('w:asciiTheme', 'w:hAnsiTheme', 'w:eastAsiaTheme', 'w:cstheme'):
+        if rFonts.get(qn(attr)) is not None:
+            del rFonts.attrib[qn(attr)]
+    rFonts.set(qn('w:eastAsia'), font_name)
+    rFonts.set(qn('w:cs'), font_name)
+
+
+def _add_style_bottom_border(style):
+    """Single black rule under the paragraph, defined once on the style."""
+    pPr = style.element.get_or_add_pPr()
+    pBdr = OxmlElement('w:pBdr')
+    bottom = OxmlElement('w:bottom')
+    bottom.set(qn('w:val'), 'single')
+    bottom.set(qn('w:sz'), '6')
+    bottom.set(qn('w:space'), '1')
+    bottom.set(qn('w:color'), '000000')
+    pBdr.append(bottom)
+    pPr.append(pBdr)
+
+
+def _build_base_document(layout):
+    spec = DOCX_LAYOUTS[layout]
+    doc = DocxDocument()
+
+    # 1. Page margins
+    section = doc.sections[0]
+    margin = Inches(spec['margin'])
+    section.top_margin = margin
+    section.bottom_margin = margin
+    section.left_margin = margin
+    section.right_margin = margin
+
+    # 2. Body font
+    styles = doc.styles
+    normal = styles['Normal']
+    _set_style_font(normal, spec['font'])
+    normal.font.size = Pt(spec['size'])
+    normal.paragraph_format.space_after = Pt(0)
+
+    # 3. Section headings (font, color and bottom rule live on the style)
+    heading = styles['Heading 1']
+    _set_style_font(heading, spec['font'])
+    heading.font.size = Pt(spec['heading_size'])
+    heading.font.bold = True
+    heading.font.color.rgb = RGBColor(*spec['heading_color'])
+    color = heading.element.rPr.find(qn('w:color'))
+    for attr in ('w:themeColor', 'w:themeShade'):
+        if color.get(qn(attr)) is not None:
+            del color.attrib[qn(attr)]
+    if spec['heading_caps'] == "small":
+        heading.font.small_caps = True
+    else:
+        heading.font.all_caps = True
+    heading.paragraph_format.space_before = Pt(12)
+    heading.paragraph_format.space_after = Pt(6)
+    _add_style_bottom_border(heading)
+
+    # 4. Resume-specific paragraph styles
+    name = styles.add_style('Resume Name', WD_STYLE_TYPE.PARAGRAPH)
+    name.base_style = normal
+    name.font.size = Pt(spec['name_size'])
+    name.font.bold = True
+    name.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+    contact = styles.add_style('Resume Contact', WD_STYLE_TYPE.PARAGRAPH)
+    contact.base_style = normal
+    contact.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    contact.paragraph_format.space_after = Pt(10)
+
+    entry = styles.add_style('Resume Entry', WD_STYLE_TYPE.PARAGRAPH)
+    entry.base_style = normal
+    entry.paragraph_format.space_before = Pt(4)
+    entry.paragraph_format.keep_with_next = True
+
+    styles['List Bullet'].paragraph_format.space_after = Pt(0)
+
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def get_base_document(layout):
+    """Returns the bytes of the styled base .docx for a layout (cached per process)."""
+    if layout not in DOCX_LAYOUTS:
+        layout = "modern"
+    base = _base_cache.get(layout)
+    if base is not None:
+        return base
+    with _base_lock:
+        if layout not in _base_cache:
+            override = os.path.join(BASE_DOCX_DIR, f"{layout}.docx")
+            if os.path.exists(override):
+                with open(override, "rb") as f:
+                    _base_cache[layout] = f.read()
+            else:
+                _base_cache[layout] = _build_base_document(layout)
+        return _base_cache[layout]
+
+
+# --- BODY XML EMITTERS ---
+def _text(value):
+    # Control characters are not allowed in XML 1.0
+    return escape("".join(c for c in value if c >= ' ' or c in '\t\n'))
+
+
+def _run(text, bold=False, italic=False):
+    if not text:
+        return ""
+    props = ("<w:b/>" if bold else "") + ("<w:i/>" if italic else "")
+    rPr = f"<w:rPr>{props}</w:rPr>" if props else ""
+    return f'<w:r>{rPr}<w:t xml:space="preserve">{text}</w:t></w:r>'
+
+
+def _para(style, runs, tab_pos=None):
+    tabs = f'<w:tabs><w:tab w:val="right" w:pos="{tab_pos}"/></w:tabs>' if tab_pos else ""
+    return f'<w:p><w:pPr><w:pStyle w:val="{STYLE_IDS[style]}"/>{tabs}</w:pPr>{"".join(runs)}</w:p>'
+
+
+def _entry(left_runs, right_runs, tab_pos):
+    """One line with left content and right-aligned content (replaces the 1x2 tables)."""
+    runs = list(left_runs)
+    if any(right_runs):
+        runs.append("<w:r><w:tab/></w:r>")
+        runs.extend(right_runs)
+    return _para("entry", runs, tab_pos)
+
+
+def _emit_section(key, title, doc, tab_pos, parts):
+    if key == "summary":
+        if doc.summary:
+            parts.append(_para("heading", [_run(_text(title))]))
+            parts.append(_para("normal", [_run(_text(doc.summary))]))
+        return
+
+    entries = getattr(doc, key)
+    if not entries:
+        return
+    parts.append(_para("heading", [_run(_text(title))]))
+
+    if key == "experience":
+        for job in entries:
+            left = [_run(_text(job.title), bold=True)]
+            if job.company:
+                left.append(_run(" | " + _text(job.company), italic=True))
+            parts.append(_entry(left, [_run(_text(job.dates), italic=True)], tab_pos))
+            for bullet in job.bullets:
+                parts.append(_para("bullet", [_run(_text(bullet))]))
+    elif key == "projects":
+        for proj in entries:
+            parts.append(_entry([_run(_text(proj.name), bold=True)],
+                                [_run(_text(proj.link), italic=True)], tab_pos))
+            if proj.description:
+                parts.append(_para("bullet", [_run(_text(proj.description))]))
+    elif key == "education":
+        for edu in entries:
+            parts.append(_entry([_run(_text(edu.school), bold=True)],
+                                [_run(_text(edu.year))], tab_pos))
+            runs = [_run(_text(edu.degree), italic=True)]
+            if edu.gpa:
+                runs.append(_run(f" | GPA: {_text(edu.gpa)}"))
+            parts.append(_para("normal", runs))
+    elif key == "skills":
+        for skill in entries:
+            parts.append(_para("normal", [
+                _run(f"{_text(skill.category)}: ", bold=True),
+                _run(_text(skill.items)),
+            ]))
+
+
+def _header(doc):
+    contact = doc.contact
+    contact_info = []
+    if contact.email: contact_info.append(_text(contact.email))
+    if contact.phone: contact_info.append(_text(contact.phone))
+    if contact.linkedin: contact_info.append(f"LinkedIn: {_text(contact.linkedin)}")
+    if contact.github: contact_info.append(f"GitHub: {_text(contact.github)}")
+    if contact.website: contact_info.append(_text(contact.website))
+    return [
+        _para("name", [_run(_text(contact.name or 'Name'))]),
+        _para("contact", [_run(" | ".join(contact_info))]),
+    ]
+
+
+def _two_column_table(left_parts, right_parts, left_twips, right_twips):
+    no_border = "".join(f'<w:{side} w:val="nil"/>' for side in
+                        ("top", "left", "bottom", "right", "insideH", "insideV"))
+    def cell(width, parts):
+        # A table cell must contain at least one paragraph
+        content = "".join(parts) or "<w:p/>"
+        return f'<w:tc><w:tcPr><w:tcW w:w="{width}" w:type="dxa"/></w:tcPr>{content}</w:tc>'
+    return (
+        '<w:tbl><w:tblPr><w:tblW w:w="0" w:type="auto"/><w:tblLayout w:type="fixed"/>'
+        f'<w:tblBorders>{no_border}</w:tblBorders></w:tblPr>'
+        f'<w:tblGrid><w:gridCol w:w="{left_twips}"/><w:gridCol w:w="{right_twips}"/></w:tblGrid>'
+        f'<w:tr>{cell(left_twips, left_parts)}{cell(right_twips, right_parts)}</w:tr></w:tbl>'
+    )
+
+
+def render_body_xml(data, layout="modern"):
+    """Builds the complete <w:body> content for a resume as one XML string."""
+    data = ResumeDocument.coerce(data)
+    spec = DOCX_LAYOUTS.get(layout, DOCX_LAYOUTS["modern"])
+    text_width = int((8.5 - 2 * spec['margin']) * _TWIPS_PER_INCH)
+
+    parts = _header(data)
+    if "right_sections" in spec:
+        left_twips = int(text_width * spec['left_width'])
+        right_twips = text_width - left_twips
+        # Cells have ~0.08in default padding on each side
+        left_parts, right_parts = [], []
+        for key, title in spec['sections']:
+            _emit_section(key, title, data, left_twips - 230, left_parts)
+        for key, title in spec['right_sections']:
+            _emit_section(key, title, data, right_twips - 230, right_parts)
+        parts.append(_two_column_table(left_parts, right_parts, left_twips, right_twips))
+        # Word requires a paragraph between a table and the section properties
+        parts.append("<w:p/>")
+    else:
+        for key, title in spec['sections']:
+            _emit_section(key, title, data, text_width, parts)
+    return "".join(parts)
+
+
+def build_resume_docx(data, layout="modern"):
+    """Clones the base document for a layout and fills its body in one pass."""
+    doc = DocxDocument(io.BytesIO(get_base_document(layout)))
+    body = doc.element.body
+    fragment = parse_xml(f'<w:body {nsdecls("w")}>{render_body_xml(data, layout)}</w:body>')
+    sectPr = body.find(qn('w:sectPr'))
+    for element in list(fragment):
+        if sectPr is not None:
+            sectPr.addprevious(element)
+        else:
+            body.append(element)
+    return doc
@@ -0,0 +1,147 @@
+"""
+Export Module
+Streams a ZIP of batch results. Each result gets a folder holding the
+tailored PDF and DOCX and the enhanced resume as JSON, and summary.csv
+lists every result's scores and keywords.
+
+stream_zip() yields the archive in chunks while it is being written. Files are
+copied from the artifact store in fixed-size blocks, and entries use data
+descriptors, so the writer never seeks back. Memory stays flat however many
+results are exported; only the small per-entry directory and the CSV rows
+are kept until the end.
+"""
+import csv
+import io
+import json
+import os
+import re
+import tempfile
+import time
+import zipfile
+
+from modules.artifacts import store_file
+
+CHUNK_BYTES = 1 << 16
+SUMMARY_FIELDS = ("folder", "title", "score_before", "score_after", "change", "keywords_added",
+                  "missing", "pdf", "docx", "error")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only, non-seekable stream that collects what zipfile writes until it is drained."""
+
+    def __init__(self):
+        self._chunks = []
+        self.pending = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self.pending += len(data)
+        return len(data)
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        self.pending = 0
+        return data
+
+
+def _folder(index, title):
+    slug = re.sub(r'[^A-Za-z0-9]+', '-', title or "").strip('-')[:40] or "resume"
+    return f"{index:03d}-{slug}"
+
+
+def _resume_dict(resume):
+    if resume is None:
+        return None
+    return resume.to_dict() if hasattr(resume, "to_dict") else resume
+
+
+def _summary_row(folder, row, files):
+    before, after = row.get('score_python_before'), row.get('score_python_after')
+    return {
+        "folder": folder,
+        "title": row.get('title') or "",
+        "score_before": before if before is not None else "",
+        "score_after": after if after is not None else "",
+        "change": round(after - before, 1) if before is not None and after is not None else "",
+        "keywords_added": "; ".join(row.get('keywords_added') or []),
+        "missing": "; ".join(row.get('missing') or []),
+        "pdf": files.get("pdf", ""),
+        "docx": files.get("docx", ""),
+        "error": row.get('error') or row.get('render_error') or "",
+    }
+
+
+def stream_zip(rows, chunk_size=CHUNK_BYTES):
+    """
+    Builds a ZIP of results and yields it in chunks as it is written.
+
+    Args:
+        rows (iterable): Result dicts as produced by run_multi_target_pipeline
+            ('title', 'score_python_before', 'score_python_after', 'missing',
+            'keywords_added', 'resume_data', 'pdf_path', 'docx_path', 'error');
+            may be a generator
+        chunk_size (int): Copy block size; chunks are yielded at about this size
+
+    Yields:
+        bytes: The next part of the archive
+    """
+    sink = _ChunkSink()
+    summary = io.StringIO()
+    writer = csv.DictWriter(summary, fieldnames=SUMMARY_FIELDS)
+    writer.writeheader()
+    stamp = time.localtime()[:6]
+
+    with zipfile.ZipFile(sink, "w") as archive:
+        for index, row in enumerate(rows, start=1):
+            folder = _folder(index, row.get('title'))
+            files = {}
+            for kind in ("pdf", "docx"):
+                path = row.get(f'{kind}_path')
+                if not path or not os.path.exists(path):
+                    continue
+                info = zipfile.ZipInfo(f"{folder}/resume.{kind}", stamp)
+                # PDF and DOCX are already compressed
+                info.compress_type = zipfile.ZIP_STORED
+                info.file_size = os.path.getsize(path)
+                with open(path, "rb") as src, archive.open(info, "w") as dest:
+                    for block in iter(lambda: src.read(chunk_size), b""):
+                        dest.write(block)
+                        if sink.pending >= chunk_size:
+                            yield sink.drain()
+                files[kind] = info.filename
+
+            resume = _resume_dict(row.get('resume_data'))
+            if resume is not None:
+                name = f"{folder}/resume.json"
+                archive.writestr(zipfile.ZipInfo(name, stamp), json.dumps(resume, indent=2, ensure_ascii=False),
+                                 compress_type=zipfile.ZIP_DEFLATED)
+                files["json"] = name
+            writer.writerow(_summary_row(folder, row, files))
+            if sink.pending:
+                yield sink.drain()
+
+        archive.writestr(zipfile.ZipInfo("summary.csv", stamp), summary.getvalue(),
+                         compress_type=zipfile.ZIP_DEFLATED)
+    yield sink.drain()
+
+
+def export_zip(rows):
+    """
+    Writes the export ZIP into the artifact store (streamed to disk, not built in memory).
+
+    Args:
+        rows (iterable): Result dicts, see stream_zip()
+
+    Returns:
+        str: Artifact id of the archive
+    """
+    with tempfile.TemporaryDirectory(prefix="resume-export-") as tmp:
+        path = os.path.join(tmp, "export.zip")
+        with open(path, "wb") as out:
+            for chunk in stream_zip(rows):
+                out.write(chunk)
+        return store_file(path)
@@ -0,0 +1,133 @@
+"""
+Jobs Module
+A small in-process job queue. Long-running work (scoring, Gemini calls,
+pdflatex) runs on a shared worker pool instead of the Streamlit script thread;
+the UI keeps only a job id in session state and polls the job's status.
+"""
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from modules.config import load_environment
+from modules.telemetry import logger
+
+load_environment()
+MAX_WORKERS = int(os.getenv("RESUME_JOB_WORKERS", "4"))
+# Finished jobs are forgotten after this many seconds
+JOB_TTL_SECONDS = 60 * 60
+
+_pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="resume-job")
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+class JobFailed(Exception):
+    """Raised by a job function to fail with a user-facing message and optional details."""
+
+    def __init__(self, message, details=None):
+        super().__init__(message)
+        self.details = details
+
+
+class Job:
+    """Status of one queued unit of work. All mutations go through the lock."""
+
+    def __init__(self, stages=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.status = "queued"          # queued -> running -> done | failed
+        self.stages = list(stages or [])
+        self.stage = None
+        self.partial = {}               # intermediate results the UI may show early
+        self.result = None
+        self.error = None
+        self.details = None
+        self.created = time.time()
+        self.finished = None
+        self._lock = threading.Lock()
+
+    @property
+    def done(self):
+        return self.status in ("done", "failed")
+
+    @property
+    def progress(self):
+        """Fraction of declared stages reached (0.0 - 1.0)."""
+        if self.status == "done":
+            return 1.0
+        if not self.stages or self.stage not in self.stages:
+            return 0.0
+        return self.stages.index(self.stage) / len(self.stages)
+
+    def set_stage(self, stage, **partial):
+        with self._lock:
+            self.status = "running"
+            if stage is not None:
+                self.stage = stage
+            self.partial.update(partial)
+
+    def snapshot(self):
+        """Consistent copy of the job's public state."""
+        with self._lock:
+            return {
+                'id': self.id,
+                'status': self.status,
+                'stage': self.stage,
+                'progress': self.progress,
+                'partial': dict(self.partial),
+                'result': self.result,
+                'error': self.error,
+                'details': self.details,
+            }
+
+    def _finish(self, result=None, error=None, details=None):
+        with self._lock:
+            self.result = result
+            self.error = error
+            self.details = details
+            self.status = "failed" if error else "done"
+            self.finished = time.time()
+
+
+def _run(job, fn, args, kwargs):
+    job.set_stage(None)
+    try:
+        job._finish(result=fn(job, *args, **kwargs))
+    except JobFailed as e:
+        job._finish(error=str(e), details=e.details)
+    except Exception as e:
+        logger.error("Job %s failed: %s: %s", job.id, type(e).__name__, e)
+        job._finish(error=f"{type(e).__name__}: {e}", details=traceback.format_exc())
+
+
+def _prune():
+    cutoff = time.time() - JOB_TTL_SECONDS
+    with _jobs_lock:
+        for job_id in [j.id for j in _jobs.values() if j.finished and j.finished < cutoff]:
+            del _jobs[job_id]
+
+
+def submit_job(fn, *args, stages=None, **kwargs):
+    """
+    Queues fn(job, *args, **kwargs) on the worker pool.
+
+    Args:
+        fn (callable): Work to run; receives the Job first so it can report stages
+        stages (list): Ordered stage names used to compute progress
+
+    Returns:
+        Job: Handle whose id can be stored in session state
+    """
+    _prune()
+    job = Job(stages=stages)
+    with _jobs_lock:
+        _jobs[job.id] = job
+    _pool.submit(_run, job, fn, args, kwargs)
+    return job
+
+
+def get_job(job_id):
+    """Returns the Job for an id, or None if it is unknown or expired."""
+    with _jobs_lock:
+        return _jobs.get(job_id)
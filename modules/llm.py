@@ -0,0 +1,211 @@
+"""
+LLM Module
+Single entry point for model calls. generate() and stream() pick the model for
+the task (modules/router.py), check the daily budgets, serve repeated prompts
+from an LRU response cache, and record tokens, latency, cost and cache hits
+(modules/accounting.py) plus metrics (modules/telemetry.py) for every call.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from modules import router, telemetry
+from modules.accounting import BudgetExceeded, check_budget, record_call
+from modules.config import get_model, load_environment
+
+load_environment()
+CACHE_SIZE = int(os.getenv("RESUME_LLM_CACHE_SIZE", "256"))
+# Output tokens assumed for budget checks when the call sets no max_output_tokens
+DEFAULT_OUTPUT_ESTIMATE = 2048
+
+LLMResponse = namedtuple("LLMResponse", ["text", "model", "cached", "prompt_tokens", "output_tokens"])
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def estimate_tokens(text):
+    # Gemini averages roughly four characters per token for English text
+    return max(1, len(text) // 4)
+
+
+def _cache_key(model_name, prompt, generation_config):
+    payload = json.dumps([model_name, prompt, generation_config], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _cache_get(key):
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    return None
+
+
+def _cache_put(key, value):
+    if CACHE_SIZE <= 0:
+        return
+    with _cache_lock:
+        _cache[key] = value
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def _usage(response, prompt, text):
+    """Billed (prompt, output) tokens, estimated when the response carries no usage metadata."""
+    usage = getattr(response, "usage_metadata", None)
+    prompt_tokens = getattr(usage, "prompt_token_count", None)
+    output_tokens = getattr(usage, "candidates_token_count", None)
+    return (prompt_tokens if prompt_tokens is not None else estimate_tokens(prompt),
+            output_tokens if output_tokens is not None else estimate_tokens(text or ""))
+
+
+def _budgeted(task, model_name, prompt, generation_config):
+    max_output = (generation_config or {}).get("max_output_tokens", DEFAULT_OUTPUT_ESTIMATE)
+    chosen = check_budget(model_name, estimate_tokens(prompt) + max_output)
+    if chosen != model_name:
+        telemetry.inc("resume_llm_downgrades_total", task=task, requested=model_name, model=chosen)
+    return chosen
+
+
+def _cached(task, prompt, generation_config, model):
+    """A cached reply from the pinned model or any model routed for the task."""
+    for name in [model] if model else router.candidates(task):
+        cached = _cache_get(_cache_key(name, prompt, generation_config))
+        if cached is not None:
+            telemetry.inc("resume_llm_cache_hits_total", task=task, model=cached.model)
+            telemetry.set_attribute("cache_hit", True)
+            record_call(task, cached.model, 0, 0, 0.0, cache_hit=True)
+            return cached
+    return None
+
+
+def _attempts(task, model):
+    """Models to try for one call: the pinned model, or the router's picks in turn."""
+    if model:
+        yield model
+        return
+    tried = []
+    while True:
+        choice = router.choose(task, exclude=tried)
+        if choice is None:
+            return
+        tried.append(choice)
+        yield choice
+
+
+def _failed(task, model_name, started, attempt, prompt, partial=""):
+    seconds = time.perf_counter() - started
+    router.record(model_name, seconds, ok=False)
+    telemetry.record_llm_call(task, model_name, None, seconds, attempt, "error")
+    # A stream that broke off mid-reply was still billed for what it produced
+    prompt_tokens, output_tokens = _usage(None, prompt, partial) if partial else (0, 0)
+    record_call(task, model_name, prompt_tokens, output_tokens, seconds, status="error")
+
+
+def _succeeded(task, model_name, started, attempt, prompt, response, text):
+    seconds = time.perf_counter() - started
+    router.record(model_name, seconds, ok=True)
+    telemetry.record_llm_call(task, model_name, response, seconds, attempt)
+    prompt_tokens, output_tokens = _usage(response, prompt, text)
+    record_call(task, model_name, prompt_tokens, output_tokens, seconds)
+    return LLMResponse(text, model_name, False, prompt_tokens, output_tokens)
+
+
+def generate(task, prompt, generation_config=None, attempt=0, validate=None, model=None, fresh=False):
+    """
+    Calls a model for a task and accounts for it. If the routed model fails, the
+    router's next choice is tried; the caller's own retries pass attempt > 0.
+
+    Args:
+        task (str): What the call is for ("ai_score", "enhance", ...); selects the route
+        prompt (str): Prompt text
+        generation_config (dict): Passed through to generate_content
+        attempt (int): 0 for the first try, 1+ when the caller retries
+        validate (callable): Only replies for which validate(text) is true are cached
+        model (str): Pin a model instead of routing
+        fresh (bool): Ask the model again even if the prompt is cached (the new reply replaces it)
+
+    Returns:
+        LLMResponse: Reply text, serving model, cache flag and billed tokens
+
+    Raises:
+        BudgetExceeded: If the budget policy refuses the call
+        Exception: The last model error if every candidate failed
+    """
+    cached = None if fresh else _cached(task, prompt, generation_config, model)
+    if cached is not None:
+        return cached._replace(cached=True)
+
+    error = None
+    for routed in _attempts(task, model):
+        model_name = _budgeted(task, routed, prompt, generation_config)
+        started = time.perf_counter()
+        try:
+            response = get_model(model_name).generate_content(prompt, generation_config=generation_config)
+            text = response.text
+        except BudgetExceeded:
+            raise
+        except Exception as e:
+            _failed(task, model_name, started, attempt, prompt)
+            error = e
+            continue
+        result = _succeeded(task, model_name, started, attempt, prompt, response, text)
+        if text and (validate is None or validate(text)):
+            _cache_put(_cache_key(model_name, prompt, generation_config), result)
+        return result
+    raise error or RuntimeError(f"No model is configured for task '{task}'")
+
+
+def stream(task, prompt, generation_config=None, validate=None, model=None, fresh=False):
+    """
+    Streaming variant of generate(). A cached reply is yielded as a single chunk.
+    Falls back to the next routed model only if the stream fails before its first chunk.
+
+    Yields:
+        str: Reply text as the model produces it
+    """
+    cached = None if fresh else _cached(task, prompt, generation_config, model)
+    if cached is not None:
+        yield cached.text
+        return
+
+    error = None
+    for routed in _attempts(task, model):
+        model_name = _budgeted(task, routed, prompt, generation_config)
+        parts, last = [], None
+        started = time.perf_counter()
+        try:
+            for chunk in get_model(model_name).generate_content(prompt, stream=True,
+                                                                generation_config=generation_config):
+                if last is None:
+                    telemetry.set_attribute("first_chunk_ms", round((time.perf_counter() - started) * 1000, 1))
+                last = chunk
+                if chunk.text:
+                    parts.append(chunk.text)
+                    yield chunk.text
+        except BudgetExceeded:
+            raise
+        except Exception as e:
+            _failed(task, model_name, started, 0, prompt, "".join(parts))
+            if parts:
+                # Text already reached the caller; switching models now would garble it
+                raise
+            error = e
+            continue
+        text = "".join(parts)
+        # Usage metadata arrives with the final chunk
+        result = _succeeded(task, model_name, started, 0, prompt, last, text)
+        telemetry.set_attribute("model", model_name)
+        if text and (validate is None or validate(text)):
+            _cache_put(_cache_key(model_name, prompt, generation_config), result)
+        return
+    raise error or RuntimeError(f"No model is configured for task '{task}'")
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,223 @@
+"""
+Model Module
+Typed representation of a resume shared by the enhancer, converter, scorer and
+generators. The enhancer's JSON is validated once into a ResumeDocument; every
+later stage reads attributes and reuses memoized derived views instead of
+re-walking, re-copying and re-escaping the raw dict.
+"""
+from dataclasses import dataclass
+
+
+# --- COERCION HELPERS ---
+def _str(value):
+    """Normalizes a scalar field from the model's JSON to a stripped string."""
+    if value is None or callable(value):
+        return ""
+    if isinstance(value, (list, tuple)):
+        return ', '.join(str(v) for v in value if v is not None)
+    if isinstance(value, dict):
+        return ', '.join(str(v) for v in value.values() if v)
+    return str(value).strip()
+
+
+def _str_list(value):
+    if value is None or callable(value):
+        return []
+    if isinstance(value, str):
+        return [value.strip()] if value.strip() else []
+    if isinstance(value, (list, tuple)):
+        return [s for s in (_str(v) for v in value) if s]
+    return [_str(value)]
+
+
+def _entries(value):
+    """Only dict entries survive; anything else the model returned is dropped."""
+    if not isinstance(value, list):
+        return []
+    return [v for v in value if isinstance(v, dict)]
+
+
+# --- ENTRY TYPES ---
+@dataclass
+class Contact:
+    __slots__ = ('name', 'email', 'phone', 'linkedin', 'github', 'website')
+    name: str
+    email: str
+    phone: str
+    linkedin: str
+    github: str
+    website: str
+
+
+@dataclass
+class Experience:
+    __slots__ = ('title', 'company', 'dates', 'bullets')
+    title: str
+    company: str
+    dates: str
+    bullets: list
+
+
+@dataclass
+class Education:
+    __slots__ = ('school', 'degree', 'year', 'gpa')
+    school: str
+    degree: str
+    year: str
+    gpa: str
+
+
+@dataclass
+class Project:
+    __slots__ = ('name', 'link', 'description')
+    name: str
+    link: str
+    description: str
+
+
+@dataclass
+class SkillGroup:
+    __slots__ = ('category', 'items')
+    category: str
+    items: str
+
+
+CONTACT_FIELDS = Contact.__slots__
+
+
+@dataclass(eq=False)
+class ResumeDocument:
+    """
+    A validated resume. Treat instances as immutable once built: derived views
+    (plain text, LaTeX fields, keyword set) are memoized on first access.
+    """
+    __slots__ = ('contact', 'summary', 'experience', 'education', 'projects',
+                 'skills', 'keywords_added', 'keywords_skipped', '_views')
+    contact: Contact
+    summary: str
+    experience: list
+    education: list
+    projects: list
+    skills: list
+    keywords_added: list
+    keywords_skipped: list
+
+    def __post_init__(self):
+        self._views = {}
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Validates the enhancer's JSON into a ResumeDocument.
+
+        Args:
+            data (dict): Resume data as returned by the model
+
+        Returns:
+            ResumeDocument: Normalized document (all scalars are strings)
+        """
+        if not isinstance(data, dict):
+            raise ValueError(f"Resume data must be a JSON object, got {type(data).__name__}")
+
+        skills = []
+        for s in _entries(data.get('skills')):
+            # s['items'] not s.get('items'): a missing key must not fall back to dict.items
+            items = _str(s['items']) if 'items' in s else ""
+            if items:
+                skills.append(SkillGroup(category=_str(s.get('category')), items=items))
+
+        skipped = []
+        # A list of {"keyword", "reason"} objects or plain keywords; a bare string or
+        # any other item type is dropped rather than iterated
+        raw_skipped = data.get('keywords_skipped')
+        for item in raw_skipped if isinstance(raw_skipped, list) else []:
+            if isinstance(item, dict):
+                skipped.append({'keyword': _str(item.get('keyword')), 'reason': _str(item.get('reason'))})
+            elif isinstance(item, str) and item.strip():
+                skipped.append(item.strip())
+
+        return cls(
+            contact=Contact(*(_str(data.get(f)) for f in CONTACT_FIELDS)),
+            summary=_str(data.get('summary')),
+            experience=[
+                Experience(
+                    title=_str(e.get('title')),
+                    company=_str(e.get('company')),
+                    dates=_str(e.get('dates')),
+                    bullets=_str_list(e.get('bullets')),
+                )
+                for e in _entries(data.get('experience'))
+            ],
+            education=[
+                Education(
+                    school=_str(e.get('school')),
+                    degree=_str(e.get('degree')),
+                    year=_str(e.get('year')),
+                    gpa=_str(e.get('gpa')),
+                )
+                for e in _entries(data.get('education'))
+            ],
+            projects=[
+                Project(
+                    name=_str(p.get('name')),
+                    link=_str(p.get('link')),
+                    description=_str(p.get('description')),
+                )
+                for p in _entries(data.get('projects'))
+            ],
+            skills=skills,
+            keywords_added=_str_list(data.get('keywords_added')),
+            keywords_skipped=skipped,
+        )
+
+    @classmethod
+    def coerce(cls, data):
+        """Accepts either a ResumeDocument or a raw resume dict."""
+        if isinstance(data, cls):
+            return data
+        return cls.from_dict(data or {})
+
+    def to_dict(self):
+        """Plain JSON-compatible dict in the enhancer's original shape."""
+        out = {f: getattr(self.contact, f) for f in CONTACT_FIELDS}
+        out['summary'] = self.summary
+        out['experience'] = [
+            {'title': e.title, 'company': e.company, 'dates': e.dates, 'bullets': list(e.bullets)}
+            for e in self.experience
+        ]
+        out['education'] = [
+            {'school': e.school, 'degree': e.degree, 'year': e.year, 'gpa': e.gpa}
+            for e in self.education
+        ]
+        out['skills'] = [{'category': s.category, 'items': s.items} for s in self.skills]
+        out['projects'] = [
+            {'name': p.name, 'link': p.link, 'description': p.description}
+            for p in self.projects
+        ]
+        out['keywords_added'] = list(self.keywords_added)
+        out['keywords_skipped'] = [dict(k) if isinstance(k, dict) else k for k in self.keywords_skipped]
+        return out
+
+    # --- MEMOIZED VIEWS ---
+    def cached_view(self, name, builder):
+        """Computes builder(self) once and returns the stored result afterwards."""
+        try:
+            return self._views[name]
+        except KeyError:
+            value = self._views[name] = builder(self)
+            return value
+
+    @property
+    def plain_text(self):
+        from modules.converter import convert_resume_data
+        return convert_resume_data(self).text
+
+    @property
+    def latex_fields(self):
+        from modules.generator import build_latex_context
+        return self.cached_view('latex', build_latex_context)
+
+    @property
+    def keywords(self):
+        from modules.converter import convert_resume_data
+        return convert_resume_data(self).keywords
@@ -0,0 +1,170 @@
+"""
+Offline Model Module
+A local stand-in for google.generativeai's GenerativeModel, used by the
+benchmarks and load tests (and by anyone without an API key) when
+RESUME_AI_BACKEND=offline.
+
+Replies are deterministic and derived from the prompt, so the scorer and the
+enhancer parse them exactly as they would a real Gemini reply. An optional
+delay simulates network and generation time.
+"""
+import json
+import os
+import random
+import re
+import time
+from types import SimpleNamespace
+
+# Simulated latency: a fixed delay per call plus a delay per output token
+LATENCY_MS = float(os.getenv("RESUME_OFFLINE_LATENCY_MS", "0"))
+MS_PER_TOKEN = float(os.getenv("RESUME_OFFLINE_MS_PER_TOKEN", "0"))
+# Fraction of calls that fail like a rate-limited Gemini request
+ERROR_RATE = float(os.getenv("RESUME_OFFLINE_ERROR_RATE", "0"))
+STREAM_CHUNK_CHARS = 80
+
+_EMAIL_RE = re.compile(r'[\w.+-]+@[\w-]+\.[\w.-]+')
+_PHONE_RE = re.compile(r'\+?\d[\d\s().-]{7,}\d')
+_SECTION_RE = re.compile(r'^\s*(summary|experience|education|skills|projects)\s*$', re.IGNORECASE)
+_MISSING_RE = re.compile(r'MISSING from the resume[^\n]*\n\s*([^\n]+)')
+_BATCH_RESUME_RE = re.compile(r'^RESUME (\S+):\n', re.MULTILINE)
+
+
+def _estimate_tokens(text):
+    # Gemini averages roughly four characters per token for English text
+    return max(1, len(text) // 4)
+
+
+def _between(prompt, start, end=None):
+    if start not in prompt:
+        return ""
+    text = prompt.split(start, 1)[1]
+    if end and end in text:
+        text = text.split(end, 1)[0]
+    return text.strip()
+
+
+# --- CANNED REPLIES ---
+def _score(job, resume):
+    from modules.scorer import extract_keyword_set, keyword_terms
+    jd_keywords = extract_keyword_set(job)
+    missing = sorted(jd_keywords - set(keyword_terms(resume)))
+    score = round(100 * (1 - len(missing) / len(jd_keywords))) if jd_keywords else 0
+    return {"score": score, "missing": missing[:10]}
+
+
+def _score_reply(prompt):
+    job = _between(prompt, "JOB:", "RESUME:")
+    resume = _between(prompt, "RESUME:", "Return ONLY")
+    return json.dumps(_score(job, resume))
+
+
+def _batch_score_reply(prompt):
+    job = _between(prompt, "JOB:", "RESUME ")
+    body = prompt.split("Return ONLY", 1)[0]
+    parts = _BATCH_RESUME_RE.split(body)
+    # split() gives [preamble, id1, text1, id2, text2, ...]
+    return json.dumps([dict(id=cid, **_score(job, text.strip()))
+                       for cid, text in zip(parts[1::2], parts[2::2])])
+
+
+def _enhance_reply(prompt):
+    original = _between(prompt, "ORIGINAL RESUME:", "JOB DESCRIPTION:")
+    lines = [l.strip() for l in original.splitlines() if l.strip()]
+    match = _MISSING_RE.search(prompt)
+    missing = [k.strip() for k in match.group(1).split(",") if k.strip()] if match else []
+    # Pretend every other missing keyword fits the candidate
+    added, skipped = missing[::2], missing[1::2]
+
+    sections, current = {}, "header"
+    for line in lines:
+        heading = _SECTION_RE.match(line)
+        if heading:
+            current = heading.group(1).lower()
+            continue
+        sections.setdefault(current, []).append(line)
+
+    email = _EMAIL_RE.search(original)
+    phone = _PHONE_RE.search(original)
+    bullets = [l.lstrip("•-* ") for l in sections.get("experience", [])] or lines[1:6]
+    experience = []
+    for i in range(0, len(bullets), 4):
+        chunk = bullets[i:i + 4]
+        if i == 0 and added:
+            chunk = chunk + [f"Applied {', '.join(added)} in production work"]
+        experience.append({
+            "title": "Software Engineer", "company": f"Company {i // 4 + 1}",
+            "dates": "2020 - Present", "bullets": chunk,
+        })
+
+    reply = {}
+    # Like the real model, only echo contact details when the prompt's schema asks for them
+    if '"email":' in prompt:
+        reply.update({
+            "name": lines[0] if lines else "Candidate",
+            "email": email.group(0) if email else "",
+            "phone": phone.group(0).strip() if phone else "",
+            "linkedin": "", "github": "", "website": "",
+        })
+    reply.update({
+        "summary": " ".join(sections.get("summary", lines[:2]))[:600],
+        "experience": experience,
+        "education": [{"school": "State University", "degree": "B.S. Computer Science",
+                       "year": "2019", "gpa": ""}],
+        "skills": [{"category": "Skills", "items": ", ".join(
+            sections.get("skills", []) + added)[:400] or "Python"}],
+        "projects": [{"name": l[:60], "link": "", "description": l}
+                     for l in sections.get("projects", [])[:3]],
+        "keywords_added": added,
+        "keywords_skipped": [{"keyword": k, "reason": "Not supported by the original resume"}
+                             for k in skipped],
+    })
+    return json.dumps(reply)
+
+
+# --- MODEL ---
+class OfflineModel:
+    """Drop-in for genai.GenerativeModel: generate_content(prompt, stream=False, generation_config=None)."""
+
+    def __init__(self, model_name):
+        self.model_name = model_name
+
+    def _reply(self, prompt):
+        if "ORIGINAL RESUME:" in prompt:
+            return _enhance_reply(prompt)
+        if "Evaluate resume match" in prompt:
+            return _score_reply(prompt)
+        if "Evaluate how well each resume" in prompt:
+            return _batch_score_reply(prompt)
+        return json.dumps({"echo": prompt[:200]})
+
+    def generate_content(self, prompt, stream=False, generation_config=None):
+        if ERROR_RATE and random.random() < ERROR_RATE:
+            time.sleep(LATENCY_MS / 1000)
+            raise RuntimeError("429 Resource has been exhausted (simulated by the offline backend)")
+        text = self._reply(prompt)
+        max_tokens = (generation_config or {}).get("max_output_tokens")
+        output_tokens = _estimate_tokens(text)
+        if max_tokens and output_tokens > max_tokens:
+            # Like Gemini, a capped reply is simply cut off
+            text = text[:max_tokens * 4]
+            output_tokens = max_tokens
+        usage = SimpleNamespace(
+            prompt_token_count=_estimate_tokens(prompt),
+            candidates_token_count=output_tokens,
+            total_token_count=_estimate_tokens(prompt) + output_tokens,
+        )
+        delay = (LATENCY_MS + MS_PER_TOKEN * output_tokens) / 1000
+
+        if not stream:
+            if delay:
+                time.sleep(delay)
+            return SimpleNamespace(text=text, usage_metadata=usage)
+
+        chunks = [text[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(text), STREAM_CHUNK_CHARS)]
+
+        def generate():
+            for chunk in chunks:
+                if delay:
+                    time.sleep(delay / len(chunks))
+                yield SimpleNamespace(text=chunk, usage_metadata=usage)
+        return generate()
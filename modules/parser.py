@@ -1,12 +1,32 @@
-import PyPDF2
-from docx import Document
 import re
+from collections import namedtuple
+from functools import lru_cache
+from modules.telemetry import mark_error, set_attribute, traced
 
+def links_block(urls):
+    """The "Extracted Links" block appended to parsed text (empty if there are no URLs)."""
+    # dict.fromkeys keeps first-seen order, so the same file always yields the same text
+    unique_urls = [u for u in dict.fromkeys(urls) if u]
+    if not unique_urls:
+        return ""
+    lines = []
+    for url in unique_urls:
+        if 'github.com' in url:
+            lines.append(f"GitHub: {url}")
+        elif 'linkedin.com' in url:
+            lines.append(f"LinkedIn: {url}")
+        else:
+            lines.append(f"Link: {url}")
+    return "\n\nExtracted Links:\n" + "\n".join(lines) + "\n"
+
+@traced("parse.pdf")
 def extract_text_from_pdf(uploaded_file):
     """
     Extract text and hyperlinks from PDF.
     Attempts to extract both visible text and embedded hyperlink URLs.
     """
+    # Imported here so the app starts without loading the PDF/DOCX libraries
+    import PyPDF2
     try:
         pdf_reader = PyPDF2.PdfReader(uploaded_file)
         text = ""
@@ -35,27 +55,25 @@ def extract_text_from_pdf(uploaded_file):
         found_urls = re.findall(url_pattern, text)
         urls.extend(found_urls)
         
-        # Add extracted URLs to the text if they're not already there
-        if urls:
-            unique_urls = list(set(urls))
-            text += "\n\nExtracted Links:\n"
-            for url in unique_urls:
-                # Extract meaningful info from URL
-                if 'github.com' in url:
-                    text += f"GitHub: {url}\n"
-                elif 'linkedin.com' in url:
-                    text += f"LinkedIn: {url}\n"
-                else:
-                    text += f"Link: {url}\n"
+        text += links_block(urls)
         
+        set_attribute("pages", len(pdf_reader.pages))
+        set_attribute("chars", len(text))
         return text
+    except MemoryError:
+        # Not a reading error: let the caller (or the sandbox) report the file as too large
+        mark_error("MemoryError")
+        raise
     except Exception as e:
+        mark_error(str(e))
         return f"Error reading PDF: {str(e)}"
 
+@traced("parse.docx")
 def extract_text_from_docx(uploaded_file):
     """
     Extract text and hyperlinks from DOCX.
     """
+    from docx import Document
     try:
         doc = Document(uploaded_file)
         text = ""
@@ -63,23 +81,254 @@ def extract_text_from_docx(uploaded_file):
         
         for para in doc.paragraphs:
             text += para.text + "\n"
-            
-            # Extract hyperlinks from paragraph
-            for run in para.runs:
-                if run.element.rPr is not None:
-                    for child in run.element.rPr:
-                        if 'hyperlink' in child.tag.lower():
-                            try:
-                                url = child.get('r:id')
-                                if url:
-                                    urls.append(url)
-                            except:
-                                pass
         
-        # Add extracted URLs if any
-        if urls:
-            text += "\n\nExtracted Links:\n" + "\n".join(set(urls))
+        # Hyperlinks point at relationships of the document part; their targets are the URLs
+        for rel in doc.part.rels.values():
+            if rel.is_external and rel.reltype.endswith("/hyperlink"):
+                urls.append(rel.target_ref)
+        text += links_block(urls)
         
+        set_attribute("paragraphs", len(doc.paragraphs))
+        set_attribute("chars", len(text))
         return text
+    except MemoryError:
+        # Not a reading error: let the caller (or the sandbox) report the file as too large
+        mark_error("MemoryError")
+        raise
     except Exception as e:
-        return f"Error reading DOCX: {str(e)}"
\ No newline at end of file
+        mark_error(str(e))
+        return f"Error reading DOCX: {str(e)}"
+
+
+# --- SECTION INDEX ---
+Section = namedtuple("Section", ["kind", "heading", "start", "end"])
+
+# Heading lines per section type; anything else that looks like a heading is "other".
+# Words that are also common subheadings ("Tools", "Languages", "About") are left out,
+# so they do not split the section they appear in.
+SECTION_HEADINGS = {
+    "summary": ("summary", "professional summary", "profile", "professional profile", "objective",
+                "career objective", "about me"),
+    "experience": ("experience", "work experience", "professional experience", "employment",
+                   "employment history", "work history", "career history"),
+    "education": ("education", "academic background", "education and training"),
+    "skills": ("skills", "technical skills", "core skills", "key skills", "core competencies",
+               "competencies", "technologies", "tech stack"),
+    "projects": ("projects", "personal projects", "selected projects", "key projects", "open source"),
+    "contact": ("contact", "contact information", "contact details", "extracted links", "links"),
+    "other": ("certifications", "certificates", "awards", "honors", "publications", "interests", "volunteering", "volunteer experience", "activities", "achievements", "references"),
+}
+
+def _heading_group(kind, headings):
+    # Longest first, so "work experience" is not matched as "experience"; any run of spaces between words
+    words = sorted(headings, key=len, reverse=True)
+    return f"(?P<{kind}>" + "|".join(r'[ \t]+'.join(map(re.escape, h.split())) for h in words) + ")"
+
+
+# One pass over the text finds every heading line; the named group that matched is the section type
+_SECTION_RE = re.compile(
+    r'^[ \t]*(?:' + "|".join(_heading_group(k, h) for k, h in SECTION_HEADINGS.items()) + r')[ \t]*:?[ \t]*$',
+    re.IGNORECASE | re.MULTILINE,
+)
+# The contact header is at most this many lines at the top: the name, then lines
+# with contact details or short lines such as a job title
+HEADER_LINES = 5
+HEADER_SHORT_LINE = 50
+
+
+def _is_header_line(line, first):
+    if _EMAIL_RE.search(line) or _PHONE_RE.search(line) or _URL_RE.search(line) or "|" in line:
+        return True
+    limit = 80 if first else HEADER_SHORT_LINE
+    return len(line) <= limit and not line.endswith(".")
+
+
+def _header_end(text, end):
+    """Offset where the contact header at the top of text[:end] stops."""
+    offset, lines = 0, 0
+    for line in text[:end].splitlines(keepends=True):
+        stripped = line.strip()
+        if stripped:
+            if lines >= HEADER_LINES or not _is_header_line(stripped, lines == 0):
+                break
+            lines += 1
+        offset += len(line)
+    return offset
+
+
+@lru_cache(maxsize=256)
+def segment_resume(text):
+    """
+    Splits resume text into sections by their heading lines. The first few
+    lines before the first heading (name, email, phone) are "contact"; any
+    unheaded text after them is "summary" (or "other" if the text has no
+    headings at all).
+
+    Args:
+        text (str): Resume text
+
+    Returns:
+        tuple: Section(kind, heading, start, end) in document order, where kind is
+        a key of SECTION_HEADINGS and text[start:end] is the section including
+        its heading line (character offsets). Unheaded sections have heading None.
+    """
+    if not text:
+        return ()
+    sections = []
+    previous = None
+    for match in _SECTION_RE.finditer(text):
+        if previous is None:
+            sections.extend(_preamble(text, match.start(), "summary"))
+        else:
+            sections.append(previous._replace(end=match.start()))
+        previous = Section(match.lastgroup, match.group(match.lastgroup), match.start(), len(text))
+    if previous is None:
+        return tuple(_preamble(text, len(text), "other"))
+    sections.append(previous)
+    return tuple(sections)
+
+
+def _preamble(text, end, rest_kind):
+    # Unheaded text before the first heading: the contact header, then the rest
+    header = _header_end(text, end)
+    sections = []
+    if text[:header].strip():
+        sections.append(Section("contact", None, 0, header))
+    if text[header:end].strip():
+        sections.append(Section(rest_kind, None, header, end))
+    return sections
+
+
+def select_sections(text, kinds, max_chars=None):
+    """
+    Text of the sections of the given kinds, for prompts that only need part of a resume.
+
+    Args:
+        text (str): Resume text
+        kinds (tuple): Section types in priority order; with max_chars, earlier
+            types are kept whole before later ones are cut
+        max_chars (int): Optional length budget
+
+    Returns:
+        str: The chosen sections in document order, or the start of the text
+        if none of them were found
+    """
+    spans, remaining = [], max_chars
+    sections = segment_resume(text)
+    for kind in kinds:
+        for section in sections:
+            if section.kind != kind:
+                continue
+            end = section.end if remaining is None else min(section.end, section.start + remaining)
+            if end <= section.start:
+                break
+            spans.append((section.start, end))
+            if remaining is not None:
+                remaining -= end - section.start
+    if not spans:
+        return text[:max_chars] if max_chars else text
+    return "\n".join(text[start:end].strip() for start, end in sorted(spans))
+
+
+# --- CONTACT DETAILS ---
+CONTACT_KEYS = ("name", "email", "phone", "linkedin", "github", "website")
+
+_EMAIL_RE = re.compile(r'[\w.+-]+@[\w-]+(?:\.[\w-]+)+')
+# At least 7 digits, so year ranges such as "2019 - 2021" are not taken for phone numbers
+_PHONE_RE = re.compile(r'(?<![\w/.])\+?\(?\d(?:[\d\s().-]*\d){6,}(?![\w/])')
+_YEAR_RANGE_RE = re.compile(r'^\(?(?:19|20)\d\d\)?\s*[-–.]?\s*\(?(?:19|20)\d\d\)?$')
+_URL_RE = re.compile(r'(?:https?://|www\.)[^\s<>"{}|\\^`\[\]]+|(?:linkedin|github)\.com/[^\s<>"{}|\\^`\[\]]+',
+                     re.IGNORECASE)
+_PROFILE_RE = {
+    "linkedin": re.compile(r'linkedin\.com/(?:in|pub)/([\w-]+)', re.IGNORECASE),
+    "github": re.compile(r'github\.com/([\w-]+)', re.IGNORECASE),
+}
+_LABEL_RE = re.compile(
+    r'^[ \t]*(name|full name|e-?mail|phone|mobile|tel|linkedin|github|website|portfolio|web)[ \t]*:[ \t]*(\S.*?)[ \t]*$',
+    re.IGNORECASE | re.MULTILINE,
+)
+_LABEL_KEYS = {"full name": "name", "e-mail": "email", "mobile": "phone", "tel": "phone",
+               "portfolio": "website", "web": "website"}
+_NAME_RE = re.compile(r"^[^\W\d_][\w.'-]*(?:[ \t]+[^\W\d_][\w.'-]*){0,4}$")
+# The name often shares its line with contact details or a degree: "JANE DOE | jane@x.io", "Jane Doe, PhD"
+_NAME_SPLIT_RE = re.compile(r'[|,•·;]|\s[-–—]\s|\t')
+# Document titles that can stand above the name
+_TITLE_LINES = {"resume", "résumé", "cv", "curriculum vitae", "curriculum vitæ"}
+
+
+def _name_from(line):
+    """The candidate name at the start of a header line, or "" if the line does not start with one."""
+    for pattern in (_EMAIL_RE, _URL_RE, _PHONE_RE):
+        line = pattern.sub(" ", line)
+    part = next((p for p in _NAME_SPLIT_RE.split(line) if p.strip()), "")
+    name = " ".join(part.split())
+    if not _NAME_RE.match(name):
+        return ""
+    # All-caps headers are common; the templates expect a normally cased name
+    return name.title() if name.isupper() else name
+
+
+def _profile(kind, value):
+    """Username from a LinkedIn/GitHub URL, or the value itself if it is already a username."""
+    match = _PROFILE_RE[kind].search(value)
+    if match:
+        return match.group(1)
+    return value if re.fullmatch(r'[\w-]+', value) else ""
+
+
+@lru_cache(maxsize=256)
+def extract_contact(text):
+    """
+    Finds the candidate's contact details without a model call: labelled lines
+    ("Email: ..."), the header block before the first section heading and the
+    "Extracted Links" block are searched with precompiled patterns.
+
+    Args:
+        text (str): Resume text (parsed or entered manually)
+
+    Returns:
+        dict: CONTACT_KEYS -> value ("" when not found). linkedin and github are
+        usernames, as the templates expect; website is a full URL.
+    """
+    contact = dict.fromkeys(CONTACT_KEYS, "")
+    if not text:
+        return contact
+    sections = segment_resume(text)
+    if not sections:
+        return contact
+    blocks = [text[s.start:s.end] for s in sections if s.kind == "contact"]
+    header = blocks[0] if sections[0].kind == "contact" and sections[0].heading is None else ""
+    scope = "\n".join(blocks) if blocks else text
+
+    for label, value in _LABEL_RE.findall(scope):
+        key = _LABEL_KEYS.get(label.lower(), label.lower())
+        if key in ("linkedin", "github"):
+            value = _profile(key, value)
+        if value and not contact[key]:
+            contact[key] = value
+
+    if not contact["email"]:
+        match = _EMAIL_RE.search(scope) or _EMAIL_RE.search(text)
+        contact["email"] = match.group(0) if match else ""
+    if not contact["phone"]:
+        phones = (m.group(0).strip() for m in _PHONE_RE.finditer(scope))
+        contact["phone"] = next((p for p in phones if not _YEAR_RANGE_RE.match(p)), "")
+
+    for url in _URL_RE.findall(scope):
+        url = url.rstrip('.,;)')
+        for kind in ("linkedin", "github"):
+            if not contact[kind] and _PROFILE_RE[kind].search(url):
+                contact[kind] = _profile(kind, url)
+        # Only a link in the header counts as a personal site; other links are usually projects
+        if (not contact["website"] and url in header and not any(p.search(url) for p in _PROFILE_RE.values())):
+            contact["website"] = url if url.lower().startswith("http") else f"https://{url}"
+
+    if not contact["name"]:
+        for line in header.splitlines():
+            line = line.strip()
+            if not line or line.lower().rstrip(":") in _TITLE_LINES:
+                continue
+            # Only the first header line after any document title can hold the name
+            contact["name"] = _name_from(line)
+            break
+    return contact
@@ -0,0 +1,583 @@
+"""
+Pipeline Module
+The resume analysis flow declared as stages with explicit inputs and outputs.
+
+A Pipeline runs only the stages needed for the requested outputs, starts each
+stage as soon as its inputs exist (so independent stages such as PDF and DOCX
+rendering run concurrently), memoizes every stage's outputs by a hash of its
+inputs, and records wall time per stage. The Streamlit app, the background job
+queue and the HTTP API all run the same RESUME_PIPELINE.
+"""
+import contextvars
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+from dataclasses import dataclass
+
+from modules import store
+from modules.accounting import session_usage, usage_scope
+from modules.artifacts import artifact_path, store_file
+from modules.converter import convert_resume_data, structural_hash
+from modules.dedup import canonical_text
+from modules.enhancer import enhance_resume_content
+from modules.generator import generate_resume_docx, generate_resume_pdf
+from modules.jobs import JobFailed
+from modules.model import ResumeDocument
+from modules.preview import render_html_preview
+from modules.sandbox import SandboxError, extract_text
+from modules.telemetry import inc, logger, span
+from modules.scorer import (
+    calculate_ai_score, calculate_ats_scores, extract_keyword_set, keyword_terms, score_keywords,
+)
+from modules.uploads import SpooledUpload
+
+MEMO_SIZE = 256
+# Stage threads shared by every run; each run still caps how many of its stages run at once
+STAGE_WORKERS = int(os.getenv("RESUME_STAGE_WORKERS", "16"))
+_stage_pool = ThreadPoolExecutor(max_workers=STAGE_WORKERS, thread_name_prefix="pipeline-stage")
+
+
+class StageError(Exception):
+    """A required stage failed; carries the stage name and optional debug details."""
+
+    def __init__(self, stage, message, details=None):
+        super().__init__(message)
+        self.stage = stage
+        self.details = details
+
+
+@dataclass
+class Stage:
+    name: str
+    fn: callable
+    inputs: tuple
+    outputs: tuple
+    cache: bool = True
+    # An optional stage that fails is recorded in run.errors instead of aborting the run
+    optional: bool = False
+    # Memoized outputs for which check(outputs) is false are recomputed (e.g. pruned files)
+    check: callable = None
+
+
+class PipelineRun:
+    """Values produced by one Pipeline.run, with per-stage timings and cache info."""
+
+    def __init__(self, values):
+        self.values = values
+        self.timings = {}
+        self.cache_hits = set()
+        self.errors = {}
+        self.trace_id = None
+
+    def __getitem__(self, name):
+        return self.values[name]
+
+    def get(self, name, default=None):
+        return self.values.get(name, default)
+
+
+# --- INPUT HASHING ---
+def _digest(value):
+    if isinstance(value, ResumeDocument):
+        return value.cached_view('digest', lambda doc: structural_hash(doc.to_dict()))
+    if isinstance(value, SpooledUpload):
+        # The kind selects the parser; the contents were hashed while spooling
+        return f"{value.kind}:{value.digest}"
+    if isinstance(value, (bytes, bytearray)):
+        return hashlib.sha1(value).hexdigest()
+    if isinstance(value, str):
+        return hashlib.sha1(value.encode('utf-8')).hexdigest()
+    if isinstance(value, (set, frozenset)):
+        value = sorted(value)
+    return structural_hash(value)
+
+
+class Pipeline:
+    def __init__(self, stages, memo_size=MEMO_SIZE, defaults=None):
+        self.stages = list(stages)
+        # Values for optional inputs a caller does not provide
+        self.defaults = dict(defaults or {})
+        self._producers = {}
+        for stage in self.stages:
+            for output in stage.outputs:
+                self._producers[output] = stage
+        self._memo = OrderedDict()
+        self._memo_size = memo_size
+        self._memo_lock = threading.Lock()
+        self._inflight = {}
+        self._listeners = []
+
+    def add_listener(self, fn):
+        """Registers fn(run), called after every successful run (e.g. to persist results)."""
+        self._listeners.append(fn)
+
+    def _plan(self, targets, available):
+        """Stages needed to produce targets from the available inputs, in dependency order."""
+        plan, seen = [], set()
+
+        def need(name):
+            if name in available:
+                return
+            stage = self._producers.get(name)
+            if stage is None:
+                raise ValueError(f"No stage produces '{name}' and it was not provided")
+            if stage.name in seen:
+                return
+            seen.add(stage.name)
+            for inp in stage.inputs:
+                need(inp)
+            plan.append(stage)
+
+        for target in targets:
+            need(target)
+        return plan
+
+    def _memo_key(self, stage, kwargs):
+        parts = [stage.name] + [f"{k}={_digest(kwargs[k])}" for k in stage.inputs]
+        return hashlib.sha1("|".join(parts).encode('utf-8')).hexdigest()
+
+    def _execute(self, stage, kwargs):
+        """Runs one stage (or returns its memoized outputs). Returns (outputs, cache_hit, seconds)."""
+        with span(f"stage.{stage.name}") as s:
+            outputs, hit, seconds = self._run_stage(stage, kwargs)
+            s.set("cache_hit", hit)
+        if hit:
+            inc("resume_stage_cache_hits_total", stage=stage.name)
+        return outputs, hit, seconds
+
+    def _run_stage(self, stage, kwargs):
+        start = time.perf_counter()
+        key = self._memo_key(stage, kwargs) if stage.cache else None
+        leader = True
+        if key is not None:
+            with self._memo_lock:
+                if key in self._memo and (stage.check is None or stage.check(self._memo[key])):
+                    self._memo.move_to_end(key)
+                    return self._memo[key], True, time.perf_counter() - start
+                # Identical work already running (e.g. a prefetch): wait for it instead
+                if key in self._inflight:
+                    pending, leader = self._inflight[key], False
+                else:
+                    pending = self._inflight[key] = Future()
+            if not leader:
+                return pending.result(), True, time.perf_counter() - start
+
+        try:
+            # Stage functions take their inputs positionally, in declared order
+            result = stage.fn(*(kwargs[i] for i in stage.inputs))
+            outputs = result if len(stage.outputs) > 1 else (result,)
+            outputs = dict(zip(stage.outputs, outputs))
+        except BaseException as e:
+            if key is not None:
+                with self._memo_lock:
+                    self._inflight.pop(key, None)
+                pending.set_exception(e)
+            raise
+
+        if key is not None:
+            with self._memo_lock:
+                self._memo[key] = outputs
+                if len(self._memo) > self._memo_size:
+                    self._memo.popitem(last=False)
+                self._inflight.pop(key, None)
+            pending.set_result(outputs)
+        return outputs, False, time.perf_counter() - start
+
+    def run(self, inputs, targets, on_event=None, max_workers=4, notify=True):
+        """
+        Produces the target values from the given inputs.
+
+        Args:
+            inputs (dict): Values already available (e.g. raw_text, job_desc)
+            targets (list): Names of the values wanted
+            on_event (callable): Called as on_event(stage_name, "start" | "done", outputs)
+            max_workers (int): Upper bound on concurrently running stages
+            notify (bool): Pass the finished run to the listeners (off for speculative runs)
+
+        Returns:
+            PipelineRun: All values, per-stage timings, cache hits and optional-stage errors
+        """
+        with span("pipeline.run", targets=list(targets)) as s:
+            run = self._run(inputs, targets, on_event, max_workers)
+            run.trace_id = s.trace_id
+            if notify:
+                for listener in self._listeners:
+                    try:
+                        listener(run)
+                    except Exception as e:
+                        # Listeners are side effects; the run itself succeeded
+                        logger.warning("Pipeline listener %s failed: %s",
+                                       getattr(listener, '__name__', listener), e)
+                        inc("resume_pipeline_listener_errors_total")
+            return run
+
+    def _run(self, inputs, targets, on_event, max_workers):
+        run = PipelineRun(dict(self.defaults, **inputs))
+        pending = self._plan(targets, set(run.values))
+        running = {}
+        try:
+            while pending or running:
+                for stage in list(pending):
+                    if len(running) >= max_workers:
+                        break
+                    if all(i in run.values for i in stage.inputs):
+                        pending.remove(stage)
+                        if on_event:
+                            on_event(stage.name, "start", {})
+                        kwargs = {i: run.values[i] for i in stage.inputs}
+                        # Stage threads inherit the current span so their spans nest under this run
+                        ctx = contextvars.copy_context()
+                        running[_stage_pool.submit(ctx.run, self._execute, stage, kwargs)] = stage
+
+                if not running:
+                    # Whatever is left depends on an optional stage that failed
+                    for stage in pending:
+                        run.errors[stage.name] = "Skipped: an earlier stage failed"
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    try:
+                        outputs, hit, seconds = future.result()
+                    except Exception as e:
+                        if not stage.optional:
+                            if isinstance(e, StageError):
+                                raise
+                            raise StageError(stage.name, f"{type(e).__name__}: {e}") from e
+                        # The stage span already carries the error; run.errors reports it to the caller
+                        logger.warning("Optional stage '%s' failed: %s", stage.name, e)
+                        run.errors[stage.name] = str(e)
+                        continue
+                    run.values.update(outputs)
+                    run.timings[stage.name] = seconds
+                    if hit:
+                        run.cache_hits.add(stage.name)
+                    if on_event:
+                        on_event(stage.name, "done", outputs)
+        finally:
+            # A failed run drops its stages that have not started yet
+            for future in running:
+                future.cancel()
+        return run
+
+
+# --- RESUME STAGES ---
+def _parse(upload):
+    # Parsing runs in a resource-limited worker process (modules/sandbox.py)
+    try:
+        return extract_text(upload)
+    except SandboxError as e:
+        raise StageError("parse", f"Could not read your resume: {e}. Please try another file.",
+                         details=f"Sandbox limit: {e.reason}")
+
+
+def _score_before(raw_text, jd_keywords):
+    return score_keywords(set(keyword_terms(raw_text)), jd_keywords)
+
+
+def _dedup(parsed_text, reuse_duplicates):
+    return canonical_text(parsed_text, reuse=reuse_duplicates)
+
+
+def _enhance(raw_text, job_desc, missing, generation):
+    # generation 0 may reuse a cached reply; each regeneration asks the model again
+    ai_data = enhance_resume_content(raw_text, job_desc, missing_keywords=missing, fresh=generation > 0)
+    if isinstance(ai_data, dict) and "error" in ai_data:
+        raise StageError("enhance", f"AI Enhancement Error: {ai_data['error']}", details=ai_data.get('raw'))
+    return ai_data
+
+
+def _rescore(resume, jd_keywords):
+    # Keywords come straight from the converter walk, no text round trip
+    return score_keywords(convert_resume_data(resume).keywords, jd_keywords)[0]
+
+
+def _render(generate, resume, template_name):
+    # Each render gets its own folder (pdflatex writes fixed file names) and the
+    # result is kept in the content-addressed store, so memoized paths stay valid.
+    with tempfile.TemporaryDirectory(prefix="resume-render-") as out_dir:
+        artifact_id = store_file(generate(resume, template_name=template_name, output_dir=out_dir))
+    return artifact_path(artifact_id)
+
+
+def _files_exist(outputs):
+    # Rendered files live in the artifact store, which prunes old entries
+    return all(path and os.path.exists(path) for path in outputs.values())
+
+
+RESUME_PIPELINE = Pipeline([
+    Stage("parse", _parse, ("upload",), ("parsed_text",)),
+    # Flags near-duplicates of earlier resumes. Only with reuse_duplicates (bulk
+    # screening) does a same-contact match continue with the earlier text, so the
+    # memoized stages below reuse its results; depends on what was seen, so not memoized
+    Stage("dedup", _dedup, ("parsed_text", "reuse_duplicates"), ("raw_text", "duplicate_of"), cache=False),
+    Stage("jd_keywords", extract_keyword_set, ("job_desc",), ("jd_keywords",)),
+    Stage("score_before", _score_before, ("raw_text", "jd_keywords"), ("score_before", "missing")),
+    Stage("ai_score", calculate_ai_score, ("raw_text", "job_desc"), ("ai_score", "ai_missing"), optional=True),
+    # The model's rewrite varies between calls; "generation" is bumped to ask for a new one
+    Stage("enhance", _enhance, ("raw_text", "job_desc", "missing", "generation"), ("resume",)),
+    Stage("rescore", _rescore, ("resume", "jd_keywords"), ("score_after",)),
+    Stage("draft", render_html_preview, ("resume", "template_name"), ("draft_html",)),
+    Stage("pdf", lambda resume, template_name: _render(generate_resume_pdf, resume, template_name),
+          ("resume", "template_name"), ("pdf_path",), optional=True, check=_files_exist),
+    Stage("docx", lambda resume, template_name: _render(generate_resume_docx, resume, template_name),
+          ("resume", "template_name"), ("docx_path",), optional=True, check=_files_exist),
+], defaults={"reuse_duplicates": False})
+
+# Stage names in rough execution order, with the message the UI shows for each
+STAGES = ["parse", "dedup", "jd_keywords", "score_before", "ai_score", "enhance", "rescore", "draft", "pdf", "docx"]
+STAGE_LABELS = {
+    "parse": "📂 Reading your resume...",
+    "dedup": "📂 Reading your resume...",
+    "jd_keywords": "🔍 Analyzing your resume against the job description...",
+    "score_before": "🔍 Analyzing your resume against the job description...",
+    "ai_score": "🤖 Getting a second opinion from Gemini...",
+    "enhance": "✨ Enhancing your resume with AI optimization...",
+    "rescore": "📊 Measuring the improvement...",
+    "draft": "📄 Generating professional resume files...",
+    "pdf": "📄 Generating professional resume files...",
+    "docx": "📄 Generating professional resume files...",
+}
+UI_TARGETS = ["score_before", "missing", "resume", "score_after", "draft_html", "pdf_path", "docx_path"]
+
+# Every analysis is kept in the candidate store (modules/store.py) when it is enabled
+if store.enabled():
+    RESUME_PIPELINE.add_listener(store.record_run)
+
+
+# --- SPECULATIVE PRECOMPUTATION ---
+# Cheap, JD-dependent stages are prefetched as soon as both inputs exist. The
+# Gemini calls are opt-in because they cost quota even if Analyze is never clicked.
+PREFETCH_TARGETS = ["raw_text", "jd_keywords", "score_before", "missing"]
+PREFETCH_AI_SCORE = os.getenv("RESUME_PREFETCH_AI_SCORE", "0") == "1"
+PREFETCH_ENHANCE = os.getenv("RESUME_PREFETCH_ENHANCE", "0") == "1"
+# Very short job descriptions are most likely still being typed
+PREFETCH_MIN_JD_CHARS = 40
+
+_prefetch_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="pipeline-prefetch")
+_prefetched = OrderedDict()
+_prefetched_lock = threading.Lock()
+
+
+def _prefetch(inputs, targets, session_id):
+    try:
+        with usage_scope(session_id):
+            # Not stored: the JD may still be half typed
+            RESUME_PIPELINE.run(inputs, targets, notify=False)
+    except Exception as e:
+        # Speculative work: Analyze will rerun the stage and report the error properly
+        logger.info("Prefetch failed: %s", e)
+
+
+def prefetch_analysis(resume_inputs, job_desc, session_id=None, generation=0):
+    """
+    Starts the input-only part of the pipeline in the background so the stage
+    memo is warm when Analyze is clicked. Safe to call on every rerun: the same
+    inputs are only submitted once.
+
+    Args:
+        resume_inputs (dict): {'raw_text'} or {'upload'} (a SpooledUpload)
+        job_desc (str): Target job description
+        session_id (str): Session the model calls are billed to
+        generation (int): Rewrite the next Analyze click will ask for
+
+    Returns:
+        bool: True if new work was queued
+    """
+    if not resume_inputs or not job_desc or len(job_desc.strip()) < PREFETCH_MIN_JD_CHARS:
+        return False
+    inputs = dict(resume_inputs, job_desc=job_desc, generation=generation)
+    key = _digest(sorted((k, _digest(v)) for k, v in inputs.items()))
+    with _prefetched_lock:
+        if key in _prefetched:
+            return False
+        _prefetched[key] = True
+        if len(_prefetched) > MEMO_SIZE:
+            _prefetched.popitem(last=False)
+
+    targets = list(PREFETCH_TARGETS)
+    if PREFETCH_AI_SCORE:
+        targets.append("ai_score")
+    if PREFETCH_ENHANCE:
+        targets.append("resume")
+    _prefetch_pool.submit(_prefetch, inputs, targets, session_id)
+    return True
+
+
+def run_resume_pipeline(job, resume_inputs, job_desc, template_name="modern", with_ai_score=False,
+                        session_id=None, generation=0):
+    """
+    Runs the full analysis for one resume / job description pair as a background job.
+
+    Args:
+        job (Job): Job handle used to report stages and partial results
+        resume_inputs (dict): {'raw_text'} or {'upload'} (a SpooledUpload)
+        job_desc (str): Target job description
+        template_name (str): LaTeX/DOCX template name
+        with_ai_score (bool): Also run the Gemini scorer (concurrently with enhancement)
+        session_id (str): Session the model calls are billed to (also used as the user)
+        generation (int): 0 for the first analysis of these inputs; higher values
+            ask the model for a new rewrite instead of reusing an earlier one
+
+    Returns:
+        dict: Scores, keyword lists, the ResumeDocument, output file paths and stage timings
+    """
+    def on_event(stage, event, outputs):
+        if event == "start":
+            job.set_stage(stage)
+        elif stage == "draft":
+            # Publish the HTML draft so the UI can show it while the PDF compiles
+            job.set_stage(None, draft_html=outputs['draft_html'])
+
+    try:
+        with usage_scope(session_id):
+            run = RESUME_PIPELINE.run(
+                dict(resume_inputs, job_desc=job_desc, template_name=template_name, generation=generation),
+                UI_TARGETS + (["ai_score"] if with_ai_score else []), on_event=on_event,
+            )
+    except StageError as e:
+        raise JobFailed(str(e), details=e.details)
+
+    resume = run['resume']
+    render_errors = [run.errors[s] for s in ("pdf", "docx") if s in run.errors]
+    return {
+        'score_python_before': run['score_before'],
+        'score_python_after': run['score_after'],
+        'missing': run['missing'],
+        'keywords_added': resume.keywords_added,
+        'keywords_skipped': resume.keywords_skipped,
+        'resume_data': resume,
+        'draft_html': run['draft_html'],
+        'pdf_path': run.get('pdf_path'),
+        'docx_path': run.get('docx_path'),
+        'ai_score': run.get('ai_score'),
+        'render_error': "\n".join(render_errors) or None,
+        'timings': dict(run.timings),
+        'cache_hits': sorted(run.cache_hits),
+        'stage_errors': dict(run.errors),
+        'trace_id': run.trace_id,
+        'duplicate_of': run.get('duplicate_of'),
+        'usage': session_usage(session_id) if session_id else None,
+    }
+
+
+# --- MULTI-TARGET TAILORING ---
+# One resume tailored to several job descriptions: parsed once, pre-scored
+# against every JD in one pass, then one enhance/render branch per JD in parallel.
+MAX_TARGETS = 10
+MULTI_TARGET_WORKERS = int(os.getenv("RESUME_MULTI_TARGET_WORKERS", str(MAX_TARGETS)))
+# Branches wait on stages in _stage_pool, so they need threads of their own
+_target_pool = ThreadPoolExecutor(max_workers=MULTI_TARGET_WORKERS, thread_name_prefix="pipeline-target")
+MULTI_TARGET_STAGES = ["parse", "score_before", "enhance"]
+TAILOR_TARGETS = ["resume", "score_after", "pdf_path", "docx_path"]
+
+
+def _jd_title(job_desc, limit=60):
+    """First non-empty line of a job description, for labelling its row."""
+    line = next((l.strip() for l in job_desc.splitlines() if l.strip()), "Job")
+    return line if len(line) <= limit else line[:limit - 1] + "…"
+
+
+def _tailor(raw_text, job_desc, template_name, jd_keywords, before, missing, generation):
+    # The branch starts from the shared parse and pre-score, so only the
+    # JD-specific stages (enhance, rescore, render) run here
+    return RESUME_PIPELINE.run(
+        dict(raw_text=raw_text, job_desc=job_desc, template_name=template_name,
+             jd_keywords=jd_keywords, score_before=before, missing=missing, generation=generation),
+        TAILOR_TARGETS,
+    )
+
+
+def run_multi_target_pipeline(job, resume_inputs, job_descs, template_name="modern", session_id=None,
+                              generation=0):
+    """
+    Tailors one resume to several job descriptions as a single background job.
+    A JD whose enhancement fails gets an error row; the others still complete.
+
+    Args:
+        job (Job): Job handle used to report stages and partial results
+        resume_inputs (dict): {'raw_text'} or {'upload'} (a SpooledUpload)
+        job_descs (list): Target job descriptions (at most MAX_TARGETS)
+        template_name (str): LaTeX/DOCX template name
+        session_id (str): Session the model calls are billed to (also used as the user)
+        generation (int): See run_resume_pipeline()
+
+    Returns:
+        dict: 'targets' (one comparison row per JD, in input order), stage timings,
+        trace id and model usage
+    """
+    job_descs = [jd for jd in job_descs if jd and jd.strip()]
+    if not job_descs:
+        raise JobFailed("Please paste at least one job description.")
+    if len(job_descs) > MAX_TARGETS:
+        raise JobFailed(f"Please paste at most {MAX_TARGETS} job descriptions.")
+
+    timings = {}
+    with usage_scope(session_id), span("pipeline.multi_target", targets=len(job_descs)) as root:
+        job.set_stage("parse")
+        start = time.perf_counter()
+        try:
+            # The per-JD branches store the resume along with their scores
+            raw_text = RESUME_PIPELINE.run(dict(resume_inputs), ["raw_text"], notify=False)['raw_text']
+        except StageError as e:
+            raise JobFailed(str(e), details=e.details)
+        timings['parse'] = time.perf_counter() - start
+
+        job.set_stage("score_before")
+        start = time.perf_counter()
+        before = calculate_ats_scores(raw_text, job_descs)
+        timings['score_before'] = time.perf_counter() - start
+
+        job.set_stage("enhance", targets_done=0, targets_total=len(job_descs))
+        start = time.perf_counter()
+        rows = [None] * len(job_descs)
+        futures = {}
+        for i, (jd, (score, missing)) in enumerate(zip(job_descs, before)):
+            # Each branch inherits the usage scope and nests its spans under this run
+            ctx = contextvars.copy_context()
+            futures[_target_pool.submit(ctx.run, _tailor, raw_text, jd, template_name,
+                                        extract_keyword_set(jd), score, missing, generation)] = i
+        for done, future in enumerate(as_completed(futures), start=1):
+            i = futures[future]
+            row = {
+                'title': _jd_title(job_descs[i]),
+                'score_python_before': before[i][0],
+                'missing': before[i][1],
+                'score_python_after': None,
+                'keywords_added': [],
+                'resume_data': None,
+                'pdf_path': None,
+                'docx_path': None,
+                'error': None,
+                'render_error': None,
+            }
+            try:
+                run = future.result()
+            except StageError as e:
+                row['error'] = str(e)
+            else:
+                resume = run['resume']
+                row.update(
+                    score_python_after=run['score_after'],
+                    keywords_added=resume.keywords_added,
+                    resume_data=resume,
+                    pdf_path=run.get('pdf_path'),
+                    docx_path=run.get('docx_path'),
+                    render_error="\n".join(run.errors[s] for s in ("pdf", "docx") if s in run.errors) or None,
+                )
+            rows[i] = row
+            job.set_stage(None, targets_done=done)
+        timings['tailor'] = time.perf_counter() - start
+        trace_id = root.trace_id
+
+    return {
+        'targets': rows,
+        'timings': timings,
+        'trace_id': trace_id,
+        'usage': session_usage(session_id) if session_id else None,
+    }
@@ -0,0 +1,230 @@
+"""
+Preview Module
+Renders an approximate HTML version of each resume template straight from the
+resume data, so a draft can be shown instantly while pdflatex is still running,
+and rasterizes finished PDFs to cached PNG thumbnails for the live preview.
+"""
+import glob
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+from html import escape
+
+from modules.config import load_environment
+from modules.model import ResumeDocument
+from modules.telemetry import logger
+
+load_environment()
+# Thumbnails are stored by PDF content hash, so identical PDFs are rasterized once
+THUMBNAIL_DIR = os.path.join("output", "previews")
+# PDFs whose thumbnails are kept; the least recently shown are removed first
+THUMBNAIL_CACHE_SIZE = int(os.getenv("RESUME_PREVIEW_CACHE_SIZE", "200"))
+
+# --- TEMPLATE STYLES (approximations of the LaTeX templates) ---
+_BASE_CSS = """
+body { margin: 0; background: #e9ecef; }
+.page { background: #fff; color: #000; max-width: 800px; margin: 0 auto;
+        padding: 36px 40px; box-shadow: 0 2px 8px rgba(0,0,0,0.2); line-height: 1.35; }
+.name { text-align: center; margin: 0 0 6px 0; }
+.contact { text-align: center; font-size: 0.85em; margin-bottom: 12px; }
+h2 { margin: 14px 0 6px 0; padding-bottom: 2px; border-bottom: 1px solid #000; }
+.entry { display: flex; justify-content: space-between; gap: 12px; margin-top: 6px; }
+.entry .right { white-space: nowrap; }
+ul { margin: 2px 0 4px 0; padding-left: 20px; }
+li { margin: 1px 0; }
+p { margin: 2px 0; }
+.draft { text-align: center; font-size: 0.75em; color: #888; margin-bottom: 8px; }
+"""
+
+TEMPLATE_CSS = {
+    "modern": _BASE_CSS + """
+.page { font-family: 'Latin Modern Roman', 'Computer Modern', Georgia, serif; font-size: 15px; }
+.name { font-size: 2.2em; font-weight: normal; }
+.contact a { color: #003399; text-decoration: none; }
+h2 { font-variant: small-caps; font-weight: normal; font-size: 1.4em; }
+""",
+    "professional": _BASE_CSS + """
+.page { font-family: 'Times New Roman', Times, serif; font-size: 14px; }
+.name { font-size: 2.2em; font-variant: small-caps; }
+h2 { font-variant: small-caps; font-weight: normal; font-size: 1.2em; }
+""",
+    "twocolumn": _BASE_CSS + """
+.page { font-family: Helvetica, Arial, sans-serif; font-size: 12.5px; color: #323232; }
+.name { font-size: 2em; }
+h2 { color: #0064c8; text-transform: uppercase; font-size: 1.1em; border-bottom-color: #323232; }
+.columns { display: grid; grid-template-columns: 30% 66%; justify-content: space-between; }
+""",
+}
+
+# Section order mirrors the .tex templates
+TEMPLATE_SECTIONS = {
+    "modern": [("summary", "Summary"), ("experience", "Work Experience"),
+               ("projects", "Projects"), ("education", "Education"), ("skills", "Skills")],
+    "professional": [("education", "Education"), ("experience", "Experience"),
+                     ("projects", "Projects"), ("skills", "Technical Skills")],
+    "twocolumn": [("education", "Education"), ("skills", "Skills")],
+}
+TWOCOLUMN_RIGHT = [("summary", "Profile"), ("experience", "Experience"), ("projects", "Projects")]
+
+
+def _entry(left, right=""):
+    return f'<div class="entry"><span>{left}</span><span class="right">{right}</span></div>'
+
+
+def _render_section(key, title, doc):
+    if key == "summary":
+        return f"<h2>{title}</h2><p>{escape(doc.summary)}</p>" if doc.summary else ""
+
+    entries = getattr(doc, key)
+    if not entries:
+        return ""
+    out = [f"<h2>{title}</h2>"]
+    if key == "experience":
+        for job in entries:
+            left = f"<b>{escape(job.title)}</b>"
+            if job.company:
+                left += f" | <i>{escape(job.company)}</i>"
+            out.append(_entry(left, f"<i>{escape(job.dates)}</i>"))
+            if job.bullets:
+                out.append("<ul>" + "".join(f"<li>{escape(b)}</li>" for b in job.bullets) + "</ul>")
+    elif key == "projects":
+        for proj in entries:
+            link = f"<i>{escape(proj.link)}</i>" if proj.link else ""
+            out.append(_entry(f"<b>{escape(proj.name)}</b>", link))
+            if proj.description:
+                out.append(f"<ul><li>{escape(proj.description)}</li></ul>")
+    elif key == "education":
+        for edu in entries:
+            out.append(_entry(f"<b>{escape(edu.school)}</b>", escape(edu.year)))
+            gpa = f"GPA: {escape(edu.gpa)}" if edu.gpa else ""
+            out.append(_entry(f"<i>{escape(edu.degree)}</i>", gpa))
+    elif key == "skills":
+        for skill in entries:
+            out.append(f"<p><b>{escape(skill.category)}:</b> {escape(skill.items)}</p>")
+    return "".join(out)
+
+
+def render_html_preview(data, template_name="modern"):
+    """
+    Builds a self-contained HTML page approximating the chosen LaTeX template.
+
+    Args:
+        data (ResumeDocument or dict): Enhanced resume data
+        template_name (str): "modern", "professional" or "twocolumn"
+
+    Returns:
+        str: HTML document
+    """
+    data = ResumeDocument.coerce(data)
+    if template_name not in TEMPLATE_CSS:
+        template_name = "modern"
+
+    contact = []
+    for field, label in [('phone', ''), ('email', ''), ('linkedin', 'LinkedIn: '),
+                         ('github', 'GitHub: '), ('website', '')]:
+        value = getattr(data.contact, field)
+        if value:
+            contact.append(f"{label}{escape(value)}")
+
+    body = [
+        '<div class="draft">Draft preview &middot; approximate layout</div>',
+        f'<h1 class="name">{escape(data.contact.name or "Name")}</h1>',
+        f'<div class="contact">{" | ".join(contact)}</div>',
+    ]
+    sections = "".join(_render_section(k, t, data) for k, t in TEMPLATE_SECTIONS[template_name])
+    if template_name == "twocolumn":
+        right = "".join(_render_section(k, t, data) for k, t in TWOCOLUMN_RIGHT)
+        body.append(f'<div class="columns"><div>{sections}</div><div>{right}</div></div>')
+    else:
+        body.append(sections)
+
+    return (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'>"
+        f"<style>{TEMPLATE_CSS[template_name]}</style></head>"
+        f"<body><div class='page'>{''.join(body)}</div></body></html>"
+    )
+
+
+# --- PDF THUMBNAILS ---
+def file_digest(path):
+    """SHA-256 of a file's contents (used as the cache key for its thumbnails)."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def rasterize_pdf(pdf_path, dpi=90, max_pages=4, digest=None):
+    """
+    Renders the first pages of a PDF to PNG thumbnails with pdftoppm (poppler).
+
+    Args:
+        pdf_path (str): PDF to render
+        dpi (int): Output resolution
+        max_pages (int): Upper bound on pages rendered
+        digest (str): Precomputed content hash of the PDF, if known
+
+    Returns:
+        list: PNG paths in page order, or [] if pdftoppm is unavailable or fails
+    """
+    digest = digest or file_digest(pdf_path)
+    out_dir = os.path.join(THUMBNAIL_DIR, digest[:16])
+    pages = _cached_pages(out_dir)
+    if pages:
+        return pages
+
+    # Render into a private folder and move it into place only when complete, so
+    # other sessions never see a half-written (or failed) page set as cached
+    os.makedirs(THUMBNAIL_DIR, exist_ok=True)
+    work_dir = tempfile.mkdtemp(prefix=".render-", dir=THUMBNAIL_DIR)
+    try:
+        subprocess.run(
+            ['pdftoppm', '-png', '-r', str(dpi), '-l', str(max_pages),
+             pdf_path, os.path.join(work_dir, "page")],
+            capture_output=True,
+            timeout=30,
+            check=True,
+        )
+        try:
+            os.replace(work_dir, out_dir)
+        except OSError:
+            # Another session finished the same PDF first; keep its pages
+            pass
+    except (FileNotFoundError, subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+        logger.warning("Could not rasterize PDF preview: %s", e)
+        return []
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    _prune_thumbnails()
+    return _cached_pages(out_dir)
+
+
+def _cached_pages(out_dir):
+    pages = sorted(glob.glob(os.path.join(out_dir, "page-*.png")))
+    if pages:
+        # The folder's mtime records when it was last shown, for pruning
+        try:
+            os.utime(out_dir)
+        except OSError:
+            return []
+    return pages
+
+
+def _prune_thumbnails():
+    """Removes the least recently shown thumbnail sets beyond THUMBNAIL_CACHE_SIZE."""
+    if THUMBNAIL_CACHE_SIZE <= 0:
+        return
+    entries = []
+    for entry in os.scandir(THUMBNAIL_DIR):
+        # Folders still being rendered start with a dot
+        if entry.is_dir() and not entry.name.startswith("."):
+            try:
+                entries.append((entry.stat().st_mtime, entry.path))
+            except OSError:
+                pass
+    entries.sort()
+    for _, path in entries[:max(0, len(entries) - THUMBNAIL_CACHE_SIZE)]:
+        shutil.rmtree(path, ignore_errors=True)
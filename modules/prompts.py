@@ -0,0 +1,185 @@
+"""
+Prompts Module
+Versioned prompt templates for model calls.
+
+Templates are plain str.format strings (literal braces doubled). A prompt change
+is added as a new version instead of editing one in place, so
+benchmarks/prompt_eval.py can compare versions side by side on output tokens,
+latency, JSON failures and score uplift before the default is switched.
+"""
+import os
+from collections import namedtuple
+
+from modules.config import load_environment
+
+load_environment()
+
+# keywords_section is filled with {keywords} and only included when there are missing keywords.
+# A template that leaves the name to modules/parser.extract_contact names a fallback
+# version to use instead when the name cannot be found locally.
+EnhancePrompt = namedtuple("EnhancePrompt", ["keywords_section", "body", "name_fallback"], defaults=(None,))
+
+# Keyword injection task shared by the enhancer prompt versions
+_ENHANCE_KEYWORDS = """
+    🎯 CRITICAL ATS OPTIMIZATION TASK:
+    The following TECHNICAL keywords are MISSING from the resume but present in the job description:
+    {keywords}
+    
+    Your task is to NATURALLY incorporate these keywords where truthful and relevant.
+    Rules for keyword injection:
+    1. Only add TECHNICAL keywords that match the candidate's actual experience (e.g., Python, Docker, AWS, React)
+    2. DO NOT add generic words like "efficient", "software", "detail", "issues", "key", "are", etc.
+    3. Integrate them naturally into existing bullets or summary (NO keyword stuffing)
+    4. Prioritize keywords that fit the candidate's background
+    5. If a keyword doesn't fit truthfully, skip it
+    6. Track which keywords you added vs skipped
+    """
+
+ENHANCE_PROMPTS = {
+    "v1": EnhancePrompt(
+        keywords_section=_ENHANCE_KEYWORDS,
+        body="""
+    You are an expert ATS Resume Optimization Specialist.
+    
+    {keywords_section}
+    
+    TASK:
+    1. Extract the name, email, phone, linkedin, github, and website from the resume.
+    2. Rewrite the experience bullets to be strong, impact-driven, and ATS-optimized.
+    3. If missing keywords were provided, naturally incorporate them where truthful.
+    4. Return ONLY a valid JSON object with this exact structure (no markdown formatting):
+    {{
+        "name": "Full Name",
+        "email": "email@example.com",
+        "phone": "+1234567890",
+        "linkedin": "linkedin-username",
+        "github": "github-username",
+        "website": "https://portfolio.com",
+        "summary": "Professional summary that naturally includes relevant keywords...",
+        "experience": [
+            {{ 
+                "title": "Job Title", 
+                "company": "Company Name",
+                "dates": "Month Year - Month Year", 
+                "bullets": [
+                    "Improved X by Y% using [relevant keyword]",
+                    "Led team of Z to achieve [result] with [technology]"
+                ] 
+            }}
+        ],
+        "education": [
+            {{ "school": "University Name", "degree": "Degree Name", "year": "Year", "gpa": "GPA" }}
+        ],
+        "skills": [
+            {{ "category": "Programming Languages", "items": "Python, Java, JavaScript" }},
+            {{ "category": "Frameworks & Tools", "items": "React, Docker, AWS" }}
+        ],
+        "projects": [
+            {{ "name": "Project Name", "link": "https://github.com/...", "description": "Brief description with relevant keywords" }}
+        ],
+        "keywords_added": ["keyword1", "keyword2", "keyword3"],
+        "keywords_skipped": [
+            {{"keyword": "keyword4", "reason": "Not relevant to candidate's experience"}},
+            {{"keyword": "keyword5", "reason": "Would be dishonest to add"}}
+        ]
+    }}
+    
+    IMPORTANT NOTES:
+    - The "company" field in experience is REQUIRED (extract from resume or infer from context)
+    - keywords_added: List of keywords you successfully incorporated
+    - keywords_skipped: List of objects with keyword and reason for skipping
+    - If no missing keywords were provided, return empty arrays for keywords_added and keywords_skipped
+    - DO NOT use **bold**, *italic*, or any markdown formatting in the text content
+    - Keep all text plain and professional - no asterisks, underscores, or special formatting
+    - Write naturally without emphasizing words with formatting
+    
+    ORIGINAL RESUME:
+    {original_text}
+    
+    JOB DESCRIPTION:
+    {job_description}
+    """,
+    ),
+    # v2: contact details come from modules/parser.extract_contact instead of the model,
+    # so the reply no longer echoes them back; resumes whose name is not found use v1
+    "v2": EnhancePrompt(
+        name_fallback="v1",
+        keywords_section=_ENHANCE_KEYWORDS,
+        body="""
+    You are an expert ATS Resume Optimization Specialist.
+    
+    {keywords_section}
+    
+    TASK:
+    1. Rewrite the experience bullets to be strong, impact-driven, and ATS-optimized.
+    2. If missing keywords were provided, naturally incorporate them where truthful.
+    3. Return ONLY a valid JSON object with this exact structure (no markdown formatting):
+    {{
+        "summary": "Professional summary that naturally includes relevant keywords...",
+        "experience": [
+            {{ 
+                "title": "Job Title", 
+                "company": "Company Name",
+                "dates": "Month Year - Month Year", 
+                "bullets": [
+                    "Improved X by Y% using [relevant keyword]",
+                    "Led team of Z to achieve [result] with [technology]"
+                ] 
+            }}
+        ],
+        "education": [
+            {{ "school": "University Name", "degree": "Degree Name", "year": "Year", "gpa": "GPA" }}
+        ],
+        "skills": [
+            {{ "category": "Programming Languages", "items": "Python, Java, JavaScript" }},
+            {{ "category": "Frameworks & Tools", "items": "React, Docker, AWS" }}
+        ],
+        "projects": [
+            {{ "name": "Project Name", "link": "https://github.com/...", "description": "Brief description with relevant keywords" }}
+        ],
+        "keywords_added": ["keyword1", "keyword2", "keyword3"],
+        "keywords_skipped": [
+            {{"keyword": "keyword4", "reason": "Not relevant to candidate's experience"}},
+            {{"keyword": "keyword5", "reason": "Would be dishonest to add"}}
+        ]
+    }}
+    
+    IMPORTANT NOTES:
+    - Do NOT return the name or contact details (email, phone, links); they are filled in separately
+    - The "company" field in experience is REQUIRED (extract from resume or infer from context)
+    - keywords_added: List of keywords you successfully incorporated
+    - keywords_skipped: List of objects with keyword and reason for skipping
+    - If no missing keywords were provided, return empty arrays for keywords_added and keywords_skipped
+    - DO NOT use **bold**, *italic*, or any markdown formatting in the text content
+    - Keep all text plain and professional - no asterisks, underscores, or special formatting
+    - Write naturally without emphasizing words with formatting
+    
+    ORIGINAL RESUME:
+    {original_text}
+    
+    JOB DESCRIPTION:
+    {job_description}
+    """,
+    ),
+}
+
+ENHANCE_PROMPT_VERSION = os.getenv("RESUME_ENHANCE_PROMPT", "v2")
+
+
+def enhance_prompt(version=None):
+    """
+    Returns an enhancer prompt template.
+
+    Args:
+        version (str): Key of ENHANCE_PROMPTS (default ENHANCE_PROMPT_VERSION)
+
+    Returns:
+        EnhancePrompt: The template pair
+
+    Raises:
+        KeyError: For an unknown version
+    """
+    version = version or ENHANCE_PROMPT_VERSION
+    if version not in ENHANCE_PROMPTS:
+        raise KeyError(f"Unknown enhancer prompt version '{version}'. Choose from: {', '.join(ENHANCE_PROMPTS)}")
+    return ENHANCE_PROMPTS[version]
@@ -0,0 +1,127 @@
+"""
+Router Module
+Picks the model for each task from a configured preference list, based on the
+latency and error rate observed for each model in this process.
+
+The first model in a task's list is preferred. When its smoothed latency is
+over the task's SLO, or too many of its recent calls failed, the next model is
+used instead. The slow or failing model is re-probed every PROBE_INTERVAL
+seconds so that it can recover. "offline" can be listed as a last resort; it
+routes to the local stand-in (modules/offline_model.py).
+
+    RESUME_MODEL_ROUTES='{"ai_score": ["gemini-flash-lite-latest", "offline"]}'
+    RESUME_MODEL_SLO_MS='{"enhance": 15000}'
+"""
+import json
+import os
+import threading
+import time
+
+from modules.config import load_environment
+
+load_environment()
+# Cheapest sufficient model first for scoring; quality first for enhancement
+DEFAULT_ROUTES = {
+    "ai_score": ["gemini-flash-lite-latest", "gemini-flash-latest"],
+    "ai_score_batch": ["gemini-flash-lite-latest", "gemini-flash-latest"],
+    "enhance": ["gemini-flash-latest", "gemini-flash-lite-latest"],
+}
+DEFAULT_SLO_MS = {
+    "ai_score": 5000,
+    "ai_score_batch": 20000,
+    "enhance": 30000,
+}
+ROUTES = dict(DEFAULT_ROUTES, **json.loads(os.getenv("RESUME_MODEL_ROUTES", "{}")))
+SLO_MS = dict(DEFAULT_SLO_MS, **json.loads(os.getenv("RESUME_MODEL_SLO_MS", "{}")))
+# Weight of the newest call in the moving averages
+EWMA_ALPHA = 0.3
+MAX_ERROR_RATE = 0.5
+PROBE_INTERVAL = float(os.getenv("RESUME_MODEL_PROBE_SECONDS", "60"))
+
+
+class _ModelStats:
+    __slots__ = ("latency_ms", "error_rate", "calls", "last_used")
+
+    def __init__(self):
+        self.latency_ms = None
+        self.error_rate = 0.0
+        self.calls = 0
+        self.last_used = 0.0
+
+
+_stats = {}
+_lock = threading.Lock()
+
+
+def _get(model):
+    stats = _stats.get(model)
+    if stats is None:
+        stats = _stats[model] = _ModelStats()
+    return stats
+
+
+def candidates(task):
+    """Configured models for a task, most preferred first."""
+    return list(ROUTES.get(task) or ROUTES.get("default") or DEFAULT_ROUTES["enhance"])
+
+
+def _healthy(stats, slo_ms):
+    if stats.calls == 0:
+        return True
+    return stats.error_rate < MAX_ERROR_RATE and (stats.latency_ms is None or stats.latency_ms <= slo_ms)
+
+
+def choose(task, exclude=()):
+    """
+    Picks the model for one call.
+
+    Args:
+        task (str): "ai_score", "enhance", ...
+        exclude (iterable): Models already tried for this call
+
+    Returns:
+        str: Model name, or None if every candidate is excluded
+    """
+    slo_ms = SLO_MS.get(task, DEFAULT_SLO_MS["enhance"])
+    options = [m for m in candidates(task) if m not in exclude]
+    if not options:
+        return None
+    now = time.time()
+    with _lock:
+        for model in options:
+            stats = _get(model)
+            # Give a model that was routed around a fresh chance now and then
+            if _healthy(stats, slo_ms) or now - stats.last_used > PROBE_INTERVAL:
+                stats.last_used = now
+                return model
+        # Nothing meets the SLO: take the fastest model that is not mostly failing
+        usable = [m for m in options if _get(m).error_rate < MAX_ERROR_RATE] or options
+        model = min(usable, key=lambda m: _get(m).latency_ms or 0)
+        _get(model).last_used = now
+        return model
+
+
+def record(model, seconds, ok=True):
+    """Feeds one call's outcome into the model's moving averages."""
+    with _lock:
+        stats = _get(model)
+        stats.calls += 1
+        stats.error_rate += EWMA_ALPHA * ((0.0 if ok else 1.0) - stats.error_rate)
+        if ok:
+            ms = seconds * 1000
+            stats.latency_ms = ms if stats.latency_ms is None else \
+                stats.latency_ms + EWMA_ALPHA * (ms - stats.latency_ms)
+
+
+def snapshot():
+    """Routes, SLOs and the observed stats of every model, for /models and debugging."""
+    with _lock:
+        stats = {
+            model: {
+                "latency_ms": round(s.latency_ms, 1) if s.latency_ms is not None else None,
+                "error_rate": round(s.error_rate, 3),
+                "calls": s.calls,
+            }
+            for model, s in _stats.items()
+        }
+    return {"routes": {t: candidates(t) for t in ROUTES}, "slo_ms": dict(SLO_MS), "models": stats}
@@ -0,0 +1,280 @@
+"""
+Sandbox Module
+Runs resume parsing in a pool of worker subprocesses with per-job limits, so a
+malformed or decompression-bomb upload cannot pin a CPU or exhaust the memory
+of the app or API process.
+
+Each worker caps its address space (RLIMIT_AS) and the CPU time of every job
+(RLIMIT_CPU). The parent enforces a wall-clock timeout. A worker that runs over
+a limit is killed and replaced, and the caller gets a SandboxError naming the
+limit. Other jobs and workers are unaffected. The number of workers also caps
+how many parses run at once.
+
+Workers are started with `python -m modules.sandbox` and reused across jobs.
+Uploads spooled to disk (modules/uploads.py) are passed to the worker by path
+and memory-mapped there, so large files are never copied through the pipe.
+Set RESUME_SANDBOX_WORKERS=0 to parse in-process instead.
+"""
+import os
+import pickle
+import queue
+import select
+import signal
+import struct
+import subprocess
+import sys
+import threading
+import time
+
+from modules.config import load_environment
+from modules.telemetry import inc, set_attribute, traced
+from modules.uploads import UploadRejected, check_limits, open_input
+
+try:
+    import resource
+except ImportError:
+    # Windows: no rlimits, only the wall-clock timeout applies
+    resource = None
+
+load_environment()
+WORKERS = int(os.getenv("RESUME_SANDBOX_WORKERS", "2"))
+CPU_SECONDS = int(os.getenv("RESUME_SANDBOX_CPU_SECONDS", "10"))
+WALL_SECONDS = float(os.getenv("RESUME_SANDBOX_WALL_SECONDS", "20"))
+MEMORY_MB = int(os.getenv("RESUME_SANDBOX_MEMORY_MB", "768"))
+# Workers are recycled after this many jobs to bound slow leaks in the parsers
+JOBS_PER_WORKER = 200
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_HEADER = struct.Struct("!I")
+
+FAILURE_MESSAGES = {
+    "timeout": "The file took too long to read",
+    "cpu": "The file needed too much processing to read",
+    "memory": "The file needed too much memory to read",
+    "crashed": "The file could not be read",
+    "rejected": "The file is over the upload limits",
+}
+
+
+class SandboxError(Exception):
+    """A sandboxed job failed. reason is "timeout", "cpu", "memory", "crashed" or "rejected" (upload limits)."""
+
+    def __init__(self, reason, message=None):
+        super().__init__(message or FAILURE_MESSAGES.get(reason, "The file could not be read"))
+        self.reason = reason
+
+
+# --- TASKS (run inside the worker) ---
+# data is the file's bytes or the path of a spooled upload; limits are checked before parsing
+def _parse_pdf(data):
+    from modules.parser import extract_text_from_pdf
+    with open_input(data) as stream:
+        check_limits(stream, "pdf")
+        return extract_text_from_pdf(stream)
+
+
+def _parse_docx(data):
+    from modules.parser import extract_text_from_docx
+    with open_input(data) as stream:
+        check_limits(stream, "docx")
+        return extract_text_from_docx(stream)
+
+
+TASKS = {"pdf": _parse_pdf, "docx": _parse_docx}
+
+
+# --- WORKER PROCESS ---
+def _send(stream, obj):
+    payload = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    stream.write(_HEADER.pack(len(payload)) + payload)
+    stream.flush()
+
+
+def _recv(stream):
+    header = stream.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        return None
+    (size,) = _HEADER.unpack(header)
+    return pickle.loads(stream.read(size))
+
+
+def _worker_main():
+    # The protocol owns the real stdout; anything the parsers print goes to stderr
+    out = os.fdopen(os.dup(1), "wb")
+    os.dup2(2, 1)
+    inp = sys.stdin.buffer
+
+    # Import the parsers before capping memory, so the cap only has to fit the job
+    import PyPDF2  # noqa: F401
+    import docx  # noqa: F401
+    import modules.parser  # noqa: F401
+    if resource is not None and MEMORY_MB > 0:
+        limit = MEMORY_MB * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+    while True:
+        job = _recv(inp)
+        if job is None:
+            return
+        task, data = job
+        if resource is not None and CPU_SECONDS > 0:
+            # RLIMIT_CPU counts the whole process, so each job gets its budget on top of what is used
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            used = int(usage.ru_utime + usage.ru_stime) + 1
+            _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+            resource.setrlimit(resource.RLIMIT_CPU, (used + CPU_SECONDS, hard))
+        try:
+            _send(out, ("ok", TASKS[task](data)))
+        except UploadRejected as e:
+            _send(out, ("rejected", str(e)))
+        except MemoryError:
+            _send(out, ("memory", None))
+        except Exception as e:
+            _send(out, ("error", f"{type(e).__name__}: {e}"))
+
+
+# --- POOL (parent side) ---
+class _Worker:
+    def __init__(self):
+        env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "modules.sandbox"], cwd=ROOT, env=env,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+        )
+        self.jobs = 0
+
+    def _read_exact(self, n, deadline):
+        fd = self.proc.stdout.fileno()
+        chunks, remaining = [], n
+        while remaining:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0 or not select.select([fd], [], [], timeout)[0]:
+                raise TimeoutError
+            chunk = os.read(fd, min(remaining, 1 << 20))
+            if not chunk:
+                raise EOFError
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        return b"".join(chunks)
+
+    def call(self, task, data, timeout):
+        self.jobs += 1
+        try:
+            _send(self.proc.stdin, (task, data))
+        except (BrokenPipeError, OSError):
+            raise EOFError
+        deadline = time.monotonic() + timeout
+        (size,) = _HEADER.unpack(self._read_exact(_HEADER.size, deadline))
+        return pickle.loads(self._read_exact(size, deadline))
+
+    def kill(self):
+        if self.proc.poll() is None:
+            self.proc.kill()
+        self.proc.wait()
+        for stream in (self.proc.stdin, self.proc.stdout):
+            try:
+                stream.close()
+            except OSError:
+                pass
+
+    def death_reason(self):
+        code = self.proc.wait()
+        if code == -getattr(signal, "SIGXCPU", -1):
+            return "cpu"
+        # Allocation failures outside Python's control can abort the interpreter
+        if code in (-signal.SIGSEGV, -signal.SIGABRT):
+            return "memory" if resource is not None and MEMORY_MB > 0 else "crashed"
+        return "crashed"
+
+
+_idle = queue.LifoQueue()
+_slots = threading.BoundedSemaphore(max(1, WORKERS))
+
+
+def _acquire():
+    _slots.acquire()
+    try:
+        worker = _idle.get_nowait()
+        if worker.proc.poll() is None:
+            return worker
+        worker.kill()
+    except queue.Empty:
+        pass
+    try:
+        return _Worker()
+    except Exception:
+        _slots.release()
+        raise
+
+
+def _release(worker, healthy):
+    if healthy and worker.jobs < JOBS_PER_WORKER:
+        _idle.put(worker)
+    else:
+        worker.kill()
+    _slots.release()
+
+
+def run(task, data, timeout=None):
+    """
+    Runs a task in a sandbox worker.
+
+    Args:
+        task (str): Key of TASKS ("pdf" or "docx")
+        data (bytes | str): File contents, or the path of a spooled upload
+        timeout (float): Wall-clock limit in seconds (default WALL_SECONDS)
+
+    Returns:
+        The task's return value
+
+    Raises:
+        SandboxError: If the job ran over a limit or the worker died
+    """
+    worker = _acquire()
+    healthy = False
+    try:
+        status, value = worker.call(task, data, timeout or WALL_SECONDS)
+        healthy = status in ("ok", "error", "rejected")
+    except TimeoutError:
+        worker.kill()
+        status, value = "timeout", None
+    except EOFError:
+        status, value = worker.death_reason(), None
+    finally:
+        _release(worker, healthy)
+
+    if status == "ok":
+        return value
+    inc("resume_sandbox_failures_total", task=task, reason=status if status != "error" else "crashed")
+    if status == "error":
+        raise SandboxError("crashed", f"The file could not be read: {value}")
+    raise SandboxError(status, value if status == "rejected" else None)
+
+
+@traced("parse.sandbox")
+def extract_text(upload):
+    """
+    Extracts resume text from an uploaded PDF or DOCX under the sandbox and upload limits.
+
+    Args:
+        upload (SpooledUpload): The uploaded file (modules/uploads.py)
+
+    Returns:
+        str: Extracted text
+
+    Raises:
+        SandboxError: If parsing ran over a limit, or the file over the upload limits
+    """
+    set_attribute("bytes", upload.size)
+    set_attribute("spooled", upload.path is not None)
+    if WORKERS <= 0:
+        try:
+            return TASKS[upload.kind](upload.payload())
+        except UploadRejected as e:
+            inc("resume_sandbox_failures_total", task=upload.kind, reason="rejected")
+            raise SandboxError("rejected", str(e))
+    return run(upload.kind, upload.payload())
+
+
+if __name__ == "__main__":
+    _worker_main()
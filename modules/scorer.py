@@ -1,20 +1,11 @@
 import re
-import os
 import json
-import google.generativeai as genai
 from collections import Counter
-from dotenv import load_dotenv  # Import the loader
-
-# --- 1. LOAD ENVIRONMENT VARIABLES ---
-load_dotenv()  # <--- THIS IS THE FIX. It forces Python to read .env
-
-# Get the key using the exact name from your .env file
-api_key = os.getenv("GEMINI_API_KEY")
-
-if api_key:
-    genai.configure(api_key=api_key)
-else:
-    print("⚠️ Error: GEMINI_API_KEY not found. Check your .env file.")
+from functools import lru_cache
+from modules import llm
+from modules.accounting import BudgetExceeded
+from modules.parser import select_sections
+from modules.telemetry import logger, mark_error, set_attribute, traced
 
 # --- STOPWORDS LIST ---
 STOPWORDS = set([
@@ -39,26 +30,70 @@ STOPWORDS = set([
 ])
 
 # --- FUNCTION 1: STRICT PYTHON SCORER ---
-def extract_keywords(text):
+_NON_ALNUM = re.compile(r'[^a-z0-9\s]')
+
+def keyword_terms(text):
+    """Normalized keyword tokens of a text, in order and with repeats."""
     if not text:
         return []
-    text = text.lower()
-    text = re.sub(r'[^a-z0-9\s]', '', text)
-    words = text.split()
-    keywords = [w for w in words if w not in STOPWORDS and len(w) > 1]
-    return sorted(list(set(keywords)))
+    words = _NON_ALNUM.sub('', text.lower()).split()
+    return [w for w in words if w not in STOPWORDS and len(w) > 1]
 
-def calculate_ats_score(resume_text, job_desc_text):
-    resume_keywords = set(extract_keywords(resume_text))
-    jd_keywords = set(extract_keywords(job_desc_text))
+def extract_keywords(text):
+    return sorted(set(keyword_terms(text)))
+
+@lru_cache(maxsize=128)
+def extract_keyword_set(text):
+    """Keyword set of a text, cached so a job description is only tokenized once."""
+    return frozenset(keyword_terms(text))
+
+def score_keywords(resume_keywords, jd_keywords):
+    """
+    ATS score as a pure set operation on precomputed keyword sets.
+
+    Returns:
+        tuple: (score rounded to 2 decimals, list of missing JD keywords)
+    """
     if not jd_keywords:
         return 0, []
-    matches = resume_keywords.intersection(jd_keywords)
+    matches = resume_keywords & jd_keywords
     missing = jd_keywords - resume_keywords
     score = (len(matches) / len(jd_keywords)) * 100
-    return round(score, 2), list(missing)
+    # Sorted, so prompts built from it are the same in every process (set order is not)
+    return round(score, 2), sorted(missing)
+
+@traced("score.ats")
+def calculate_ats_score(resume_text, job_desc_text):
+    return score_keywords(set(keyword_terms(resume_text)), extract_keyword_set(job_desc_text))
+
+@traced("score.ats_many")
+def calculate_ats_scores(resume_text, job_descs):
+    """
+    ATS scores of one resume against several job descriptions in one pass:
+    the resume is tokenized once and each JD costs a single set operation.
+
+    Returns:
+        list: (score, missing) per job description, in input order
+    """
+    resume_keywords = set(keyword_terms(resume_text))
+    return [score_keywords(resume_keywords, extract_keyword_set(jd)) for jd in job_descs]
 
 # --- FUNCTION 2: GEMINI AI SCORER ---
+# The model is picked per call by modules/router.py (route "ai_score")
+# Inputs are truncated to this many characters to avoid API limits
+AI_SCORE_MAX_CHARS = 3000
+# Resume sections sent for scoring when the whole text does not fit: short and dense
+# ones first so a long experience section cannot crowd out the skills list, then
+# everything else (certifications, awards, ...); contact details are left out
+AI_SCORE_SECTIONS = ("skills", "summary", "experience", "projects", "education", "other")
+
+def resume_excerpt(resume_text, max_chars=AI_SCORE_MAX_CHARS):
+    """The resume as is if it fits max_chars, otherwise the parts that matter for scoring."""
+    if len(resume_text) <= max_chars:
+        return resume_text
+    return select_sections(resume_text, AI_SCORE_SECTIONS, max_chars)
+
+@traced("llm.ai_score")
 def calculate_ai_score(resume_text, job_desc):
     """
     Calculate ATS score using Gemini AI for context-aware matching.
@@ -67,14 +102,11 @@ def calculate_ai_score(resume_text, job_desc):
     import time
     
     # Truncate inputs if too long to avoid API limits
-    max_length = 3000
-    resume_truncated = resume_text[:max_length] if len(resume_text) > max_length else resume_text
-    job_truncated = job_desc[:max_length] if len(job_desc) > max_length else job_desc
+    resume_truncated = resume_excerpt(resume_text)
+    job_truncated = job_desc[:AI_SCORE_MAX_CHARS]
     
     for attempt in range(2):  # Try twice
         try:
-            model = genai.GenerativeModel('gemini-flash')
-            
             # Simplified prompt to reduce API load
             prompt = f"""Evaluate resume match to job (0-100 score).
 
@@ -85,25 +117,25 @@ RESUME: {resume_truncated}
 Return ONLY this JSON (no markdown):
 {{"score": 75, "missing": ["skill1", "skill2"]}}"""
             
-            print(f"🔍 Attempt {attempt + 1}: Calling Gemini AI for scoring...")
-            
-            response = model.generate_content(
-                prompt,
+            response = llm.generate(
+                "ai_score", prompt,
                 generation_config={
                     'temperature': 0.1,
                     'max_output_tokens': 200,
-                }
+                },
+                attempt=attempt,
+                validate=lambda reply: "{" in reply,
             )
             
             if not response or not response.text:
-                print(f"⚠️ Attempt {attempt + 1}: Empty response from Gemini")
+                logger.warning("AI score attempt %d: empty response", attempt + 1)
                 if attempt == 0:
                     time.sleep(1)
                     continue
+                mark_error("Empty response")
                 return 0, []
             
             text = response.text.strip()
-            print(f"✅ Gemini response received: {text[:100]}...")
             
             # Clean potential markdown wrappers
             if "```" in text:
@@ -121,27 +153,160 @@ Return ONLY this JSON (no markdown):
             
             # Validate score is in valid range
             if not isinstance(score, (int, float)) or score < 0 or score > 100:
-                print(f"⚠️ Invalid AI score: {score}, defaulting to 0")
+                logger.warning("Invalid AI score %r, defaulting to 0", score)
+                mark_error(f"Invalid score: {score}")
                 return 0, missing
             
-            print(f"✅ AI Score calculated: {score}%")
+            set_attribute("score", score)
             return round(score, 2), missing
             
+        except BudgetExceeded as e:
+            # Retrying cannot help until the budget resets
+            logger.warning("AI scoring skipped: %s", e)
+            mark_error(str(e))
+            return 0, []
+            
         except json.JSONDecodeError as e:
-            print(f"❌ Attempt {attempt + 1} - JSON Parse Error: {e}")
+            logger.warning("AI score attempt %d: JSON parse error: %s", attempt + 1, e)
             if 'text' in locals():
-                print(f"Raw response: {text[:300]}")
+                logger.debug("Raw AI score response: %s", text[:300])
             if attempt == 0:
                 time.sleep(1)
                 continue
+            mark_error(f"JSON Parse Error: {e}")
             return 0, []
             
         except Exception as e:
-            print(f"❌ Attempt {attempt + 1} - AI Scoring Failed: {type(e).__name__}: {str(e)}")
+            logger.warning("AI score attempt %d failed: %s: %s", attempt + 1, type(e).__name__, e)
             if attempt == 0:
                 time.sleep(1)
                 continue
+            mark_error(f"{type(e).__name__}: {e}")
             return 0, []
     
-    print("❌ All attempts failed, returning 0")
-    return 0, []
\ No newline at end of file
+    logger.error("AI scoring failed on every attempt, returning 0")
+    mark_error("All attempts failed")
+    return 0, []
+
+# --- FUNCTION 3: BATCHED GEMINI AI SCORER ---
+AI_BATCH_SIZE = 8
+# Output tokens allowed per candidate in a batched reply
+AI_BATCH_TOKENS_PER_ITEM = 200
+
+def build_batch_score_prompt(job_desc, resumes):
+    """
+    Builds one scoring prompt for several resumes against the same job.
+
+    Args:
+        job_desc (str): Job description
+        resumes (list): (candidate_id, resume_text) pairs
+
+    Returns:
+        str: Prompt asking for a JSON array with one entry per candidate id
+    """
+    blocks = "\n\n".join(
+        f"RESUME {cid}:\n{resume_excerpt(text)}" for cid, text in resumes
+    )
+    return f"""Evaluate how well each resume matches the job (0-100 score each).
+
+JOB: {job_desc[:AI_SCORE_MAX_CHARS]}
+
+{blocks}
+
+Return ONLY a JSON array with one object per resume (no markdown):
+[{{"id": "C1", "score": 75, "missing": ["skill1", "skill2"]}}]"""
+
+def parse_batch_score_response(text):
+    """
+    Parses a batched scoring reply.
+
+    Returns:
+        dict: candidate_id -> (score, missing) for every well-formed entry;
+        entries with a bad id, score or missing list are left out
+    """
+    text = text.strip()
+    if "```" in text:
+        text = text.replace("```json", "").replace("```", "").strip()
+    if "[" in text and "]" in text:
+        text = text[text.index("["):text.rindex("]") + 1]
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(data, list):
+        return {}
+
+    results = {}
+    for entry in data:
+        if not isinstance(entry, dict):
+            continue
+        score = entry.get("score")
+        missing = entry.get("missing", [])
+        if not isinstance(score, (int, float)) or isinstance(score, bool) or not 0 <= score <= 100:
+            continue
+        if not isinstance(missing, list):
+            continue
+        results[str(entry.get("id"))] = (round(score, 2), missing)
+    return results
+
+@traced("llm.ai_score_batch")
+def calculate_ai_scores_batch(resume_texts, job_desc, batch_size=AI_BATCH_SIZE):
+    """
+    Scores many resumes against one job with one model request per batch.
+    Candidates missing from a batch reply (or whose entry does not parse), and
+    every candidate of a batch whose request fails, are scored individually with
+    calculate_ai_score(). If the token budget runs out, candidates not yet scored
+    are None rather than 0, so they cannot be mistaken for poor matches.
+
+    Args:
+        resume_texts (list): Resume texts
+        job_desc (str): Job description
+        batch_size (int): Resumes per request
+
+    Returns:
+        list: (score, missing) or None per resume, in input order
+    """
+    results = [None] * len(resume_texts)
+    fallbacks = []
+    requests = 0
+    for offset in range(0, len(resume_texts), max(1, batch_size)):
+        batch = [(f"C{offset + i + 1}", text)
+                 for i, text in enumerate(resume_texts[offset:offset + batch_size])]
+        prompt = build_batch_score_prompt(job_desc, batch)
+        try:
+            requests += 1
+            response = llm.generate(
+                "ai_score_batch", prompt,
+                generation_config={
+                    'temperature': 0.1,
+                    'max_output_tokens': AI_BATCH_TOKENS_PER_ITEM * len(batch),
+                },
+                validate=lambda reply: len(parse_batch_score_response(reply)) == len(batch),
+            )
+            parsed = parse_batch_score_response(response.text or "")
+        except BudgetExceeded as e:
+            logger.warning("Batched AI scoring stopped: %s", e)
+            mark_error(str(e))
+            return results
+        except Exception as e:
+            # A failed batch must not read as a batch of 0 scores: score its
+            # candidates one by one, which also fails per candidate if the API is down
+            logger.warning("Batched AI scoring failed: %s: %s", type(e).__name__, e)
+            mark_error(f"{type(e).__name__}: {e}")
+            fallbacks.extend(range(offset, offset + len(batch)))
+            continue
+
+        for i, (cid, _) in enumerate(batch, start=offset):
+            if cid in parsed:
+                results[i] = parsed[cid]
+            else:
+                fallbacks.append(i)
+
+    if fallbacks:
+        logger.info("%d of %d candidates scored individually", len(fallbacks), len(resume_texts))
+        set_attribute("fallbacks", len(fallbacks))
+        for i in fallbacks:
+            results[i] = calculate_ai_score(resume_texts[i], job_desc)
+    set_attribute("candidates", len(resume_texts))
+    set_attribute("requests", requests + len(fallbacks))
+    return results
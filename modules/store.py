@@ -0,0 +1,392 @@
+"""
+Store Module
+A local SQLite store of every analysed resume, job description, score and
+enhancement, so candidates can be found again without re-parsing files.
+
+Pipeline runs are written through a listener on RESUME_PIPELINE. Resume text
+and skills are indexed with FTS5, and scores are indexed by job and value:
+
+    search(["kubernetes", "go"], min_score=60)
+
+The database runs in WAL mode so searches never wait for writers. The store
+holds candidates' personal data, so it is off unless RESUME_STORE_PATH is set.
+Rows are linked to the usage session that wrote them, and forget_session()
+removes a session's resumes (the app's Reset All Data does this).
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from modules.accounting import current_scope
+from modules.config import load_environment
+from modules.model import ResumeDocument
+from modules.scorer import keyword_terms
+from modules.telemetry import set_attribute, span
+
+load_environment()
+# Opt-in: e.g. output/candidates.db
+STORE_PATH = os.getenv("RESUME_STORE_PATH", "")
+
+# Score kinds, keyed by the pipeline value they come from
+SCORE_KINDS = {"score_before": "ats", "score_after": "ats_after", "ai_score": "ai"}
+MISSING_KEYS = {"ats": "missing", "ai": "ai_missing"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS resumes (
+    id INTEGER PRIMARY KEY,
+    content_hash TEXT NOT NULL UNIQUE,
+    name TEXT,
+    email TEXT,
+    raw_text TEXT NOT NULL,
+    keywords TEXT NOT NULL,
+    skills TEXT NOT NULL DEFAULT '',
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS resumes_name ON resumes(name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS resumes_email ON resumes(email COLLATE NOCASE);
+
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    content_hash TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    text TEXT NOT NULL,
+    created REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS scores (
+    resume_id INTEGER NOT NULL REFERENCES resumes(id) ON DELETE CASCADE,
+    job_id INTEGER NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    score REAL NOT NULL,
+    missing TEXT NOT NULL DEFAULT '[]',
+    updated REAL NOT NULL,
+    PRIMARY KEY (resume_id, job_id, kind)
+);
+CREATE INDEX IF NOT EXISTS scores_job ON scores(job_id, kind, score);
+CREATE INDEX IF NOT EXISTS scores_kind ON scores(kind, score);
+
+CREATE TABLE IF NOT EXISTS enhancements (
+    resume_id INTEGER NOT NULL REFERENCES resumes(id) ON DELETE CASCADE,
+    job_id INTEGER NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+    document TEXT NOT NULL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (resume_id, job_id)
+);
+
+CREATE TABLE IF NOT EXISTS resume_sessions (
+    session TEXT NOT NULL,
+    resume_id INTEGER NOT NULL REFERENCES resumes(id) ON DELETE CASCADE,
+    PRIMARY KEY (session, resume_id)
+);
+CREATE INDEX IF NOT EXISTS resume_sessions_resume ON resume_sessions(resume_id);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS resume_fts USING fts5(
+    raw_text, skills, content='resumes', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS resumes_ai AFTER INSERT ON resumes BEGIN
+    INSERT INTO resume_fts(rowid, raw_text, skills) VALUES (new.id, new.raw_text, new.skills);
+END;
+CREATE TRIGGER IF NOT EXISTS resumes_ad AFTER DELETE ON resumes BEGIN
+    INSERT INTO resume_fts(resume_fts, rowid, raw_text, skills) VALUES ('delete', old.id, old.raw_text, old.skills);
+END;
+CREATE TRIGGER IF NOT EXISTS resumes_au AFTER UPDATE OF raw_text, skills ON resumes BEGIN
+    INSERT INTO resume_fts(resume_fts, rowid, raw_text, skills) VALUES ('delete', old.id, old.raw_text, old.skills);
+    INSERT INTO resume_fts(rowid, raw_text, skills) VALUES (new.id, new.raw_text, new.skills);
+END;
+"""
+
+_local = threading.local()
+_init_lock = threading.Lock()
+_initialized = set()
+
+
+def enabled():
+    return bool(STORE_PATH)
+
+
+def content_hash(text):
+    """Key of a resume or job description in the store."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _connect(path=None):
+    """Per-thread connection to the store, creating the schema on first use."""
+    path = path or STORE_PATH
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get(path)
+    if conn is not None:
+        return conn
+
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=5.0)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    # WAL makes NORMAL safe against corruption; only the last commits can be lost on power failure
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    with _init_lock:
+        if path not in _initialized:
+            conn.executescript(SCHEMA)
+            _initialized.add(path)
+    conns[path] = conn
+    return conn
+
+
+# --- WRITES ---
+def _jd_title(job_desc, limit=80):
+    return next((l.strip() for l in job_desc.splitlines() if l.strip()), "Job")[:limit]
+
+
+def _skills_text(resume):
+    return " ".join(group.items for group in resume.skills)
+
+
+def _upsert_resume(conn, raw_text, resume, now):
+    digest = content_hash(raw_text)
+    name = (resume.contact.name or None) if resume else None
+    email = (resume.contact.email or None) if resume else None
+    skills = _skills_text(resume) if resume else ""
+    conn.execute(
+        """INSERT INTO resumes (content_hash, name, email, raw_text, keywords, skills, created, updated)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+           ON CONFLICT(content_hash) DO UPDATE SET
+               name = COALESCE(excluded.name, name),
+               email = COALESCE(excluded.email, email),
+               skills = CASE WHEN excluded.skills != '' THEN excluded.skills ELSE skills END,
+               updated = excluded.updated""",
+        (digest, name, email, raw_text, " ".join(sorted(set(keyword_terms(raw_text)))), skills, now, now),
+    )
+    return conn.execute("SELECT id FROM resumes WHERE content_hash = ?", (digest,)).fetchone()[0]
+
+
+def _upsert_job(conn, job_desc, now):
+    digest = content_hash(job_desc)
+    conn.execute(
+        "INSERT OR IGNORE INTO jobs (content_hash, title, text, created) VALUES (?, ?, ?, ?)",
+        (digest, _jd_title(job_desc), job_desc, now),
+    )
+    return conn.execute("SELECT id FROM jobs WHERE content_hash = ?", (digest,)).fetchone()[0]
+
+
+def record_run(run):
+    """
+    Pipeline listener: stores the resume text, job description, scores and
+    enhanced resume produced by one run. Runs without resume text are ignored.
+
+    Args:
+        run (PipelineRun): A finished pipeline run
+    """
+    values = run.values
+    raw_text = values.get("raw_text")
+    if not raw_text:
+        return
+    resume = values.get("resume") if isinstance(values.get("resume"), ResumeDocument) else None
+    job_desc = values.get("job_desc")
+    save_analysis(raw_text, job_desc, resume=resume,
+                  scores={kind: (values[key], values.get(MISSING_KEYS.get(kind), []))
+                          for key, kind in SCORE_KINDS.items() if values.get(key) is not None},
+                  session=current_scope()[0])
+
+
+def save_analysis(raw_text, job_desc=None, resume=None, scores=None, session=None, path=None):
+    """
+    Writes one analysis in a single transaction.
+
+    Args:
+        raw_text (str): Resume text as parsed
+        job_desc (str): Job description it was scored against, if any
+        resume (ResumeDocument): Enhanced resume, if any
+        scores (dict): kind ("ats", "ats_after", "ai") -> (score, missing keywords)
+        session (str): Usage session the analysis belongs to, for forget_session()
+        path (str): Database file (default: STORE_PATH)
+
+    Returns:
+        str: Content hash of the resume
+    """
+    now = time.time()
+    with span("store.write"):
+        conn = _connect(path)
+        with conn:
+            resume_id = _upsert_resume(conn, raw_text, resume, now)
+            if session:
+                conn.execute("INSERT OR IGNORE INTO resume_sessions (session, resume_id) VALUES (?, ?)",
+                             (session, resume_id))
+            if job_desc:
+                job_id = _upsert_job(conn, job_desc, now)
+                for kind, (score, missing) in (scores or {}).items():
+                    conn.execute(
+                        "INSERT OR REPLACE INTO scores (resume_id, job_id, kind, score, missing, updated) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (resume_id, job_id, kind, float(score), json.dumps(list(missing or [])), now),
+                    )
+                if resume is not None:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO enhancements (resume_id, job_id, document, updated) "
+                        "VALUES (?, ?, ?, ?)",
+                        (resume_id, job_id, json.dumps(resume.to_dict()), now),
+                    )
+    return content_hash(raw_text)
+
+
+def forget_session(session, path=None):
+    """
+    Deletes the resumes a session stored (with their scores and enhancements),
+    unless another session stored the same resume too. Job descriptions no
+    longer scored against any resume are deleted as well.
+
+    Args:
+        session (str): Usage session id
+        path (str): Database file (default: STORE_PATH)
+
+    Returns:
+        int: Number of resumes deleted
+    """
+    if not session:
+        return 0
+    with span("store.forget"):
+        conn = _connect(path)
+        with conn:
+            deleted = conn.execute(
+                """DELETE FROM resumes WHERE id IN (
+                       SELECT resume_id FROM resume_sessions WHERE session = ?
+                   ) AND id NOT IN (
+                       SELECT resume_id FROM resume_sessions WHERE session != ?
+                   )""", (session, session)).rowcount
+            conn.execute("DELETE FROM resume_sessions WHERE session = ?", (session,))
+            conn.execute(
+                """DELETE FROM jobs WHERE id NOT IN (SELECT job_id FROM scores)
+                   AND id NOT IN (SELECT job_id FROM enhancements)""")
+        set_attribute("resumes", deleted)
+    return deleted
+
+
+# --- QUERIES ---
+def _fts_query(terms):
+    # Every term must appear; quoting keeps user input from being read as FTS syntax
+    return " AND ".join('"' + t.replace('"', '""') + '"' for t in terms)
+
+
+def search(terms=(), min_score=None, job=None, kind="ats", limit=50, path=None):
+    """
+    Finds stored candidates by full-text terms and score.
+
+    Args:
+        terms (list): Words or phrases that must all appear in the resume text or skills
+        min_score (float): Only candidates whose best score of this kind is at least this
+        job (str): Job description content hash; scores are then taken for that job only
+        kind (str): Score kind ("ats", "ats_after" or "ai")
+        limit (int): Maximum rows
+
+    Returns:
+        list: dicts with content_hash, name, email, best score and a text snippet,
+        best score first
+    """
+    terms = [t.strip() for t in terms if t and t.strip()]
+    # Best score per resume; filtering here keeps the outer query free of GROUP BY,
+    # which FTS5's snippet() cannot be combined with
+    best = "SELECT resume_id, MAX(score) AS score FROM scores WHERE kind = ?"
+    params = [kind]
+    if job:
+        best += " AND job_id = (SELECT id FROM jobs WHERE content_hash = ?)"
+        params.append(job)
+    if min_score is not None:
+        best += " AND score >= ?"
+        params.append(min_score)
+    best += " GROUP BY resume_id"
+    score_join = "JOIN" if min_score is not None or job else "LEFT JOIN"
+
+    if terms:
+        sql = f"""SELECT r.content_hash, r.name, r.email, best.score,
+                         snippet(resume_fts, 0, '[', ']', '…', 10) AS snippet
+                  FROM resume_fts JOIN resumes r ON r.id = resume_fts.rowid
+                  {score_join} ({best}) best ON best.resume_id = r.id
+                  WHERE resume_fts MATCH ?"""
+        params.append(_fts_query(terms))
+    else:
+        sql = f"""SELECT r.content_hash, r.name, r.email, best.score, substr(r.raw_text, 1, 120) AS snippet
+                  FROM resumes r {score_join} ({best}) best ON best.resume_id = r.id"""
+    sql += " ORDER BY best.score IS NULL, best.score DESC, r.updated DESC LIMIT ?"
+    params.append(limit)
+
+    with span("store.search", terms=len(terms)):
+        try:
+            rows = _connect(path).execute(sql, params).fetchall()
+        except sqlite3.OperationalError as e:
+            # e.g. a term the FTS tokenizer reduces to nothing
+            raise ValueError(f"Invalid search: {e}") from e
+        set_attribute("rows", len(rows))
+    return [dict(row) for row in rows]
+
+
+def resume_text(digest, path=None):
+    """Stored text of one resume, or None if the hash is unknown."""
+    row = _connect(path).execute("SELECT raw_text FROM resumes WHERE content_hash = ?", (digest,)).fetchone()
+    return row[0] if row else None
+
+
+def get_resume(digest, path=None):
+    """
+    Everything stored for one resume: text, keywords and its scores and
+    enhancements per job.
+
+    Returns:
+        dict: Resume record, or None if the hash is unknown
+    """
+    conn = _connect(path)
+    row = conn.execute("SELECT * FROM resumes WHERE content_hash = ?", (digest,)).fetchone()
+    if row is None:
+        return None
+    record = {k: row[k] for k in row.keys() if k != "id"}
+    record["keywords"] = row["keywords"].split()
+    record["scores"] = [
+        {"job": r["job_hash"], "title": r["title"], "kind": r["kind"], "score": r["score"],
+         "missing": json.loads(r["missing"])}
+        for r in conn.execute(
+            """SELECT j.content_hash AS job_hash, j.title, s.kind, s.score, s.missing
+               FROM scores s JOIN jobs j ON j.id = s.job_id
+               WHERE s.resume_id = ? ORDER BY s.updated DESC""", (row["id"],))
+    ]
+    record["enhancements"] = {
+        r["job_hash"]: json.loads(r["document"])
+        for r in conn.execute(
+            """SELECT j.content_hash AS job_hash, e.document
+               FROM enhancements e JOIN jobs j ON j.id = e.job_id WHERE e.resume_id = ?""", (row["id"],))
+    }
+    return record
+
+
+def find_candidates(name=None, email=None, limit=50, path=None):
+    """Stored resumes by candidate name or email (case-insensitive exact match)."""
+    if not name and not email:
+        return []
+    column, value = ("email", email) if email else ("name", name)
+    rows = _connect(path).execute(
+        f"SELECT content_hash, name, email, updated FROM resumes "
+        f"WHERE {column} = ? COLLATE NOCASE ORDER BY updated DESC LIMIT ?", (value, limit)
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def job_results(job, kind="ats", min_score=None, limit=100, path=None):
+    """
+    Candidates scored against one job description, best first.
+
+    Args:
+        job (str): Job description text or its content hash
+    """
+    digest = job if len(job) == 64 and all(c in "0123456789abcdef" for c in job) else content_hash(job)
+    rows = _connect(path).execute(
+        """SELECT r.content_hash, r.name, r.email, s.score, s.missing
+           FROM scores s JOIN resumes r ON r.id = s.resume_id
+           WHERE s.job_id = (SELECT id FROM jobs WHERE content_hash = ?) AND s.kind = ? AND s.score >= ?
+           ORDER BY s.score DESC LIMIT ?""",
+        (digest, kind, min_score if min_score is not None else 0, limit),
+    ).fetchall()
+    return [dict(row, missing=json.loads(row["missing"])) for row in rows]
@@ -0,0 +1,350 @@
+"""
+Telemetry Module
+Tracing spans, counters and histograms for every stage of a request, with a
+Prometheus text export served over HTTP or written to a file.
+
+    with telemetry.span("parse.pdf", pages=3) as s:
+        ...
+        s.set("chars", len(text))
+
+Each finished span is observed in resume_span_duration_seconds{span=...},
+failures are counted in resume_span_errors_total, and the span itself (trace
+id, parent, attributes) is kept in a ring buffer and optionally appended as
+JSON lines to RESUME_TRACE_FILE.
+"""
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+from modules.config import load_environment
+
+load_environment()
+TRACE_FILE = os.getenv("RESUME_TRACE_FILE")
+METRICS_FILE = os.getenv("RESUME_METRICS_FILE")
+METRICS_PORT = int(os.getenv("RESUME_METRICS_PORT", "0"))
+METRICS_INTERVAL = float(os.getenv("RESUME_METRICS_INTERVAL", "15"))
+RECENT_SPANS = 500
+
+# Seconds; covers in-memory scoring up to slow Gemini calls and pdflatex runs
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_lock = threading.Lock()
+_counters = {}          # (name, labels) -> value
+_histograms = {}        # (name, labels) -> [bucket counts..., sum, count]
+_buckets = {}           # name -> bucket bounds
+_help = {}              # name -> HELP text
+_recent = deque(maxlen=RECENT_SPANS)
+_trace_file_lock = threading.Lock()
+_current = contextvars.ContextVar("resume_span", default=None)
+
+# Diagnostics (retries, fallbacks, skipped work) go to this logger; they are also
+# recorded on the current span where one is running. Without a logging config,
+# Python prints warnings and errors to stderr.
+logger = logging.getLogger("resume_ai")
+
+
+def _labels(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+# --- METRICS ---
+def describe(name, help_text, buckets=None):
+    """Registers the HELP text (and, for histograms, the bucket bounds) of a metric."""
+    with _lock:
+        _help[name] = help_text
+        if buckets:
+            _buckets[name] = tuple(sorted(buckets))
+
+
+def inc(name, value=1, **labels):
+    """Adds value to a counter."""
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, value, **labels):
+    """Records one observation in a histogram."""
+    key = (name, _labels(labels))
+    bounds = _buckets.get(name, DEFAULT_BUCKETS)
+    with _lock:
+        series = _histograms.get(key)
+        if series is None:
+            series = _histograms[key] = [0] * (len(bounds) + 2)
+        for i, bound in enumerate(bounds):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += value
+        series[-1] += 1
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _fmt_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def prometheus_text():
+    """
+    Renders every counter and histogram in the Prometheus text exposition format.
+
+    Returns:
+        str: Metrics page (text/plain; version=0.0.4)
+    """
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted((k, list(v)) for k, v in _histograms.items())
+        help_text, buckets = dict(_help), dict(_buckets)
+
+    lines, typed = [], set()
+
+    def header(name, kind):
+        if name not in typed:
+            typed.add(name)
+            if name in help_text:
+                lines.append(f"# HELP {name} {help_text[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+    for (name, labels), value in counters:
+        header(name, "counter")
+        lines.append(f"{name}{_fmt_labels(labels)} {value}")
+    for (name, labels), series in histograms:
+        header(name, "histogram")
+        bounds = buckets.get(name, DEFAULT_BUCKETS)
+        for bound, count in zip(bounds, series):
+            lines.append(f"{name}_bucket{_fmt_labels(labels, [('le', repr(float(bound)))])} {count}")
+        lines.append(f"{name}_bucket{_fmt_labels(labels, [('le', '+Inf')])} {series[-1]}")
+        lines.append(f"{name}_sum{_fmt_labels(labels)} {round(series[-2], 6)}")
+        lines.append(f"{name}_count{_fmt_labels(labels)} {series[-1]}")
+    return "\n".join(lines) + "\n"
+
+
+# --- SPANS ---
+class Span:
+    """One timed operation. Use through span(); set() adds attributes while it runs."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "attributes", "start", "duration", "status")
+
+    def __init__(self, name, parent, attributes):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+        self.span_id = uuid.uuid4().hex[:8]
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = attributes
+        self.start = time.time()
+        self.duration = None
+        self.status = "ok"
+
+    def set(self, key, value):
+        self.attributes[key] = value
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+@contextmanager
+def span(name, **attributes):
+    """
+    Times a block as a span nested under the current one.
+
+    Args:
+        name (str): Span name, e.g. "parse.pdf" or "llm.enhance"
+        **attributes: Initial attributes
+
+    Yields:
+        Span: The running span (call .set() to add attributes)
+    """
+    s = Span(name, _current.get(), attributes)
+    token = _current.set(s)
+    t0 = time.perf_counter()
+    try:
+        yield s
+    except BaseException as e:
+        s.status = "error"
+        s.attributes.setdefault("error", f"{type(e).__name__}: {e}")
+        inc("resume_span_errors_total", span=name)
+        raise
+    finally:
+        s.duration = time.perf_counter() - t0
+        try:
+            _current.reset(token)
+        except ValueError:
+            # A generator holding the span was closed from another context
+            pass
+        observe("resume_span_duration_seconds", s.duration, span=name)
+        _record(s)
+
+
+def traced(name):
+    """Decorator form of span() for whole functions."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_span():
+    """The innermost running span in this context, or None."""
+    return _current.get()
+
+
+def set_attribute(key, value):
+    """Sets an attribute on the current span, if there is one."""
+    s = _current.get()
+    if s is not None:
+        s.set(key, value)
+
+
+def mark_error(message):
+    """Marks the current span as failed without raising (for functions that return error values)."""
+    s = _current.get()
+    if s is not None and s.status != "error":
+        s.status = "error"
+        s.attributes["error"] = message
+        inc("resume_span_errors_total", span=s.name)
+
+
+def _record(s):
+    _recent.append(s)
+    if TRACE_FILE:
+        line = json.dumps(s.to_dict(), default=str)
+        try:
+            with _trace_file_lock:
+                with open(TRACE_FILE, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+        except OSError as e:
+            # A full disk or bad path must not fail the traced operation
+            logger.warning("Could not write trace file: %s", e)
+
+
+def recent_spans(trace_id=None, limit=100):
+    """Most recent finished spans as dicts, optionally only those of one trace."""
+    spans = [s for s in list(_recent) if trace_id is None or s.trace_id == trace_id]
+    return [s.to_dict() for s in spans[-limit:]]
+
+
+# --- LLM CALLS ---
+def record_llm_call(task, model, response=None, seconds=None, attempt=0, status="ok"):
+    """
+    Counts one model call: tokens from the response's usage metadata, latency and
+    whether it was a retry. Also annotates the current span with the same figures.
+
+    Args:
+        task (str): What the call was for ("ai_score", "enhance", ...)
+        model (str): Model name
+        response: Model response (or None if the call failed)
+        seconds (float): Call latency
+        attempt (int): 0 for the first try, 1+ for retries
+        status (str): "ok" or "error"
+    """
+    inc("resume_llm_calls_total", task=task, model=model, status=status)
+    if attempt:
+        inc("resume_llm_retries_total", task=task, model=model)
+    if seconds is not None:
+        observe("resume_llm_latency_seconds", seconds, task=task, model=model)
+    usage = getattr(response, "usage_metadata", None)
+    prompt_tokens = getattr(usage, "prompt_token_count", None) or 0
+    output_tokens = getattr(usage, "candidates_token_count", None) or 0
+    if usage is not None:
+        inc("resume_llm_tokens_total", prompt_tokens, task=task, model=model, kind="prompt")
+        inc("resume_llm_tokens_total", output_tokens, task=task, model=model, kind="output")
+    s = _current.get()
+    if s is not None:
+        s.attributes.update(model=model, attempts=attempt + 1, prompt_tokens=prompt_tokens,
+                            output_tokens=output_tokens)
+
+
+# --- EXPORTERS ---
+def write_metrics(path=None):
+    """Writes the metrics page to a file atomically (for node_exporter's textfile collector)."""
+    path = path or METRICS_FILE
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(prometheus_text())
+    os.replace(tmp, path)
+
+
+_exporters_started = False
+
+
+def start_exporters():
+    """
+    Starts the metrics HTTP endpoint (RESUME_METRICS_PORT) and the periodic file
+    export (RESUME_METRICS_FILE) once per process. Safe to call on every rerun.
+    """
+    global _exporters_started
+    with _lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+
+    if METRICS_PORT:
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("0.0.0.0", METRICS_PORT), MetricsHandler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        logger.info("Metrics served on :%d/metrics", METRICS_PORT)
+
+    if METRICS_FILE:
+        def export_loop():
+            while True:
+                time.sleep(METRICS_INTERVAL)
+                try:
+                    write_metrics()
+                except OSError as e:
+                    logger.warning("Could not write metrics file: %s", e)
+
+        threading.Thread(target=export_loop, name="metrics-file", daemon=True).start()
+
+
+describe("resume_span_duration_seconds", "Duration of traced operations")
+describe("resume_span_errors_total", "Traced operations that raised")
+describe("resume_llm_calls_total", "Model calls by task, model and outcome")
+describe("resume_llm_retries_total", "Model calls that were retries of a failed attempt")
+describe("resume_llm_latency_seconds", "Latency of each model call")
+describe("resume_llm_cache_hits_total", "Model calls served from the response cache")
+describe("resume_llm_downgrades_total", "Model calls switched to a cheaper model by the budget policy")
+describe("resume_llm_tokens_total", "Model tokens by kind (prompt or output)")
+describe("resume_stage_cache_hits_total", "Pipeline stages served from the memo")
+describe("resume_pipeline_listener_errors_total", "Pipeline listeners (e.g. the candidate store) that raised after a run")
+describe("resume_sandbox_failures_total", "Sandboxed jobs that hit a limit, were over the upload limits or crashed, by reason")
+describe("resume_dedup_hits_total", "Parsed resumes matched to an earlier near-identical resume")
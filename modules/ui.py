@@ -1,339 +1,31 @@
 import streamlit as st
+import streamlit.components.v1 as components
 from streamlit_option_menu import option_menu
 import base64
+import hashlib
+import os
+from collections import OrderedDict
+from functools import lru_cache
+from modules import store
+from modules.artifacts import artifact_path
+from modules.export import export_zip
+from modules.preview import rasterize_pdf
+from modules.uploads import UploadRejected, spool_upload
+
+STYLESHEET_PATH = os.path.join("assets", "styles.css")
+# Generated files kept in memory per session: a PDF and a DOCX for each of up to ten jobs
+ARTIFACT_CACHE_ENTRIES = 22
+
+@lru_cache(maxsize=1)
+def _page_css():
+    with open(STYLESHEET_PATH, encoding="utf-8") as f:
+        return f"<style>{f.read()}</style>"
 
 def setup_page():
     """Configures the page title and CSS with adaptive dark/light mode support."""
     st.set_page_config(page_title="AI Resume Architect", page_icon="🚀", layout="wide")
-    st.markdown("""
-    <style>
-        /* ========== ADAPTIVE COLOR SCHEME ========== */
-        /* Automatically adapts to browser's dark/light mode preference */
-        
-        @media (prefers-color-scheme: dark) {
-            :root {
-                --bg-primary: #0a0e1a;
-                --bg-secondary: #1a1f35;
-                --bg-card: #252b42;
-                --bg-card-hover: #2d3450;
-                --text-primary: #ffffff;
-                --text-secondary: #b8c5d6;
-                --text-muted: #7a8aa3;
-                --accent-primary: #00d4ff;
-                --accent-secondary: #0099ff;
-                --accent-gradient: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                --accent-gradient-alt: linear-gradient(135deg, #f093fb 0%, #f5576c 100%);
-                --border-color: #2d3550;
-                --shadow-sm: 0 2px 8px rgba(0, 0, 0, 0.3);
-                --shadow-md: 0 4px 16px rgba(0, 0, 0, 0.4);
-                --shadow-lg: 0 8px 32px rgba(0, 0, 0, 0.5);
-                --success-color: #10b981;
-                --warning-color: #f59e0b;
-                --error-color: #ef4444;
-            }
-        }
-        
-        @media (prefers-color-scheme: light) {
-            :root {
-                --bg-primary: #f8fafc;
-                --bg-secondary: #ffffff;
-                --bg-card: #ffffff;
-                --bg-card-hover: #f1f5f9;
-                --text-primary: #1e293b;
-                --text-secondary: #475569;
-                --text-muted: #94a3b8;
-                --accent-primary: #0ea5e9;
-                --accent-secondary: #3b82f6;
-                --accent-gradient: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                --accent-gradient-alt: linear-gradient(135deg, #f093fb 0%, #f5576c 100%);
-                --border-color: #e2e8f0;
-                --shadow-sm: 0 2px 8px rgba(0, 0, 0, 0.08);
-                --shadow-md: 0 4px 16px rgba(0, 0, 0, 0.12);
-                --shadow-lg: 0 8px 32px rgba(0, 0, 0, 0.16);
-                --success-color: #10b981;
-                --warning-color: #f59e0b;
-                --error-color: #ef4444;
-            }
-        }
-        
-        /* ========== GLOBAL STYLES ========== */
-        .stApp {
-            background: var(--bg-primary);
-            transition: background 0.3s ease;
-        }
-        
-        /* ========== ANIMATED HEADER ========== */
-        .main-header {
-            font-size: 3.5rem;
-            font-weight: 800;
-            text-align: center;
-            background: var(--accent-gradient);
-            -webkit-background-clip: text;
-            -webkit-text-fill-color: transparent;
-            background-clip: text;
-            margin-bottom: 0px;
-            animation: fadeInDown 0.8s ease-out;
-            letter-spacing: -1px;
-        }
-        
-        .sub-header {
-            font-size: 1.3rem;
-            text-align: center;
-            color: var(--text-secondary);
-            margin-bottom: 40px;
-            animation: fadeInUp 0.8s ease-out 0.2s both;
-            font-weight: 400;
-        }
-        
-        /* ========== CARD STYLES ========== */
-        .card {
-            background: var(--bg-card);
-            padding: 30px;
-            border-radius: 16px;
-            box-shadow: var(--shadow-md);
-            border: 1px solid var(--border-color);
-            transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1);
-            animation: fadeIn 0.6s ease-out;
-        }
-        
-        .card:hover {
-            transform: translateY(-2px);
-            box-shadow: var(--shadow-lg);
-            background: var(--bg-card-hover);
-        }
-        
-        /* ========== METRIC BOX ========== */
-        .metric-box {
-            text-align: center;
-            padding: 25px;
-            background: var(--bg-card);
-            border-radius: 12px;
-            border-left: 4px solid var(--accent-primary);
-            box-shadow: var(--shadow-sm);
-            transition: all 0.3s ease;
-            animation: scaleIn 0.5s ease-out;
-        }
-        
-        .metric-box:hover {
-            transform: scale(1.02);
-            box-shadow: var(--shadow-md);
-        }
-        
-        /* ========== BUTTON STYLES ========== */
-        .stButton>button {
-            width: 100%;
-            border-radius: 12px;
-            font-weight: 600;
-            background: var(--accent-gradient);
-            border: none;
-            color: white;
-            padding: 14px 28px;
-            font-size: 1.05rem;
-            transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1);
-            box-shadow: var(--shadow-sm);
-            position: relative;
-            overflow: hidden;
-        }
-        
-        .stButton>button:before {
-            content: '';
-            position: absolute;
-            top: 0;
-            left: -100%;
-            width: 100%;
-            height: 100%;
-            background: linear-gradient(90deg, transparent, rgba(255,255,255,0.2), transparent);
-            transition: left 0.5s;
-        }
-        
-        .stButton>button:hover {
-            transform: translateY(-2px);
-            box-shadow: var(--shadow-md);
-        }
-        
-        .stButton>button:hover:before {
-            left: 100%;
-        }
-        
-        .stButton>button:active {
-            transform: translateY(0);
-        }
-        
-        /* ========== RADIO BUTTONS ========== */
-        .stRadio > div {
-            background: var(--bg-card);
-            padding: 15px;
-            border-radius: 12px;
-            border: 1px solid var(--border-color);
-        }
-        
-        /* ========== FILE UPLOADER ========== */
-        .stFileUploader {
-            background: var(--bg-card);
-            border-radius: 12px;
-            padding: 20px;
-            border: 2px dashed var(--border-color);
-            transition: all 0.3s ease;
-        }
-        
-        .stFileUploader:hover {
-            border-color: var(--accent-primary);
-            background: var(--bg-card-hover);
-        }
-        
-        /* ========== TEXT INPUTS ========== */
-        .stTextInput>div>div>input,
-        .stTextArea>div>div>textarea {
-            background: var(--bg-secondary);
-            border: 1px solid var(--border-color);
-            border-radius: 8px;
-            color: var(--text-primary);
-            transition: all 0.3s ease;
-        }
-        
-        .stTextInput>div>div>input:focus,
-        .stTextArea>div>div>textarea:focus {
-            border-color: var(--accent-primary);
-            box-shadow: 0 0 0 3px rgba(14, 165, 233, 0.1);
-        }
-        
-        /* ========== EXPANDER ========== */
-        .streamlit-expanderHeader {
-            background: var(--bg-card);
-            border-radius: 8px;
-            border: 1px solid var(--border-color);
-            transition: all 0.3s ease;
-        }
-        
-        .streamlit-expanderHeader:hover {
-            background: var(--bg-card-hover);
-            border-color: var(--accent-primary);
-        }
-        
-        /* ========== PROGRESS BAR ========== */
-        .stProgress > div > div > div {
-            background: var(--accent-gradient);
-        }
-        
-        /* ========== ANIMATIONS ========== */
-        @keyframes fadeIn {
-            from {
-                opacity: 0;
-            }
-            to {
-                opacity: 1;
-            }
-        }
-        
-        @keyframes fadeInDown {
-            from {
-                opacity: 0;
-                transform: translateY(-30px);
-            }
-            to {
-                opacity: 1;
-                transform: translateY(0);
-            }
-        }
-        
-        @keyframes fadeInUp {
-            from {
-                opacity: 0;
-                transform: translateY(30px);
-            }
-            to {
-                opacity: 1;
-                transform: translateY(0);
-            }
-        }
-        
-        @keyframes scaleIn {
-            from {
-                opacity: 0;
-                transform: scale(0.9);
-            }
-            to {
-                opacity: 1;
-                transform: scale(1);
-            }
-        }
-        
-        @keyframes slideInRight {
-            from {
-                opacity: 0;
-                transform: translateX(30px);
-            }
-            to {
-                opacity: 1;
-                transform: translateX(0);
-            }
-        }
-        
-        /* ========== SIDEBAR ========== */
-        [data-testid="stSidebar"] {
-            background: var(--bg-secondary);
-            border-right: 1px solid var(--border-color);
-        }
-        
-        [data-testid="stSidebar"] .stRadio > label {
-            color: var(--text-primary);
-            font-weight: 500;
-        }
-        
-        /* ========== SUCCESS/ERROR MESSAGES ========== */
-        .stSuccess {
-            background: rgba(16, 185, 129, 0.1);
-            border-left: 4px solid var(--success-color);
-            border-radius: 8px;
-            animation: slideInRight 0.5s ease-out;
-        }
-        
-        .stError {
-            background: rgba(239, 68, 68, 0.1);
-            border-left: 4px solid var(--error-color);
-            border-radius: 8px;
-            animation: slideInRight 0.5s ease-out;
-        }
-        
-        .stWarning {
-            background: rgba(245, 158, 11, 0.1);
-            border-left: 4px solid var(--warning-color);
-            border-radius: 8px;
-            animation: slideInRight 0.5s ease-out;
-        }
-        
-        .stInfo {
-            background: rgba(14, 165, 233, 0.1);
-            border-left: 4px solid var(--accent-primary);
-            border-radius: 8px;
-            animation: slideInRight 0.5s ease-out;
-        }
-        
-        /* ========== SCROLLBAR ========== */
-        ::-webkit-scrollbar {
-            width: 10px;
-            height: 10px;
-        }
-        
-        ::-webkit-scrollbar-track {
-            background: var(--bg-secondary);
-        }
-        
-        ::-webkit-scrollbar-thumb {
-            background: var(--accent-primary);
-            border-radius: 5px;
-        }
-        
-        ::-webkit-scrollbar-thumb:hover {
-            background: var(--accent-secondary);
-        }
-        
-        /* ========== LOADING SPINNER ========== */
-        .stSpinner > div {
-            border-top-color: var(--accent-primary) !important;
-        }
-    </style>
-    """, unsafe_allow_html=True)
+    # The stylesheet is read from disk once per process, not rebuilt on every rerun
+    st.markdown(_page_css(), unsafe_allow_html=True)
 
 def display_header():
     st.markdown('''
@@ -372,6 +64,25 @@ def render_upload_form():
     st.markdown('</div>', unsafe_allow_html=True)
     return uploaded_file
 
+def get_spooled_upload(uploaded_file):
+    """
+    Copies the uploaded file into a SpooledUpload once per session and upload
+    (large files go to a temporary file instead of another in-memory copy).
+    Shows an error and returns None if the file is over the upload limits.
+    """
+    key = getattr(uploaded_file, 'file_id', None) or (uploaded_file.name, uploaded_file.size)
+    entry = st.session_state.get('spooled_upload')
+    if entry is None or entry['key'] != key:
+        try:
+            entry = {'key': key, 'upload': spool_upload(uploaded_file, uploaded_file.name), 'error': None}
+        except UploadRejected as e:
+            entry = {'key': key, 'upload': None, 'error': str(e)}
+        # Replacing the entry releases the previous upload and its temporary file
+        st.session_state.spooled_upload = entry
+    if entry['error']:
+        st.error(f"⚠️ {entry['error']}")
+    return entry['upload']
+
 def render_manual_form():
     """Renders the detailed manual entry form."""
     st.markdown('<div class="card">', unsafe_allow_html=True)
@@ -422,6 +133,36 @@ def render_jd_input():
     st.markdown('</div>', unsafe_allow_html=True)
     return jd
 
+def select_target_mode():
+    """Toggle between tailoring to one job and to several jobs at once."""
+    return st.toggle("🎯 Tailor to several jobs at once",
+                     help="Paste several job descriptions and get one tailored resume per job.")
+
+def split_job_descriptions(text):
+    """Splits pasted job descriptions on lines consisting of '---'."""
+    jds, current = [], []
+    for line in (text or "").splitlines():
+        if line.strip() == "---":
+            jds.append("\n".join(current))
+            current = []
+        else:
+            current.append(line)
+    jds.append("\n".join(current))
+    return [jd.strip() for jd in jds if jd.strip()]
+
+def render_multi_jd_input(max_targets):
+    """Renders the multi-job box. Returns the list of job descriptions."""
+    st.markdown('<br>', unsafe_allow_html=True)
+    st.markdown('<div class="card">', unsafe_allow_html=True)
+    st.subheader("🎯 Target Job Descriptions")
+    text = st.text_area(f"Paste up to {max_targets} job descriptions, separated by a line containing only ---",
+                        height=250)
+    st.markdown('</div>', unsafe_allow_html=True)
+    jds = split_job_descriptions(text)
+    if jds:
+        st.caption(f"{len(jds)} job description{'s' if len(jds) != 1 else ''} detected")
+    return jds
+
 def render_sidebar_settings():
     """Renders the sidebar template selector."""
     with st.sidebar:
@@ -433,21 +174,83 @@ def render_sidebar_settings():
         )
         st.markdown("---")
         if st.button("🗑️ Reset All Data"):
+            # Also remove this session's resumes from the candidate store, if it is on
+            if store.enabled() and st.session_state.get('session_id'):
+                store.forget_session(st.session_state.session_id)
             st.session_state.clear()
             st.rerun()
         return template
 
+def get_artifact_bytes(path):
+    """
+    Returns a generated file's bytes, read from disk at most once per session.
+    Entries are keyed by path and invalidated when the file's size or mtime changes;
+    only the ARTIFACT_CACHE_ENTRIES most recently used files are kept.
+    """
+    stat = os.stat(path)
+    cache = st.session_state.setdefault('artifact_cache', OrderedDict())
+    entry = cache.get(path)
+    if entry is None or entry['stamp'] != (stat.st_mtime_ns, stat.st_size):
+        with open(path, "rb") as f:
+            data = f.read()
+        entry = {
+            'stamp': (stat.st_mtime_ns, stat.st_size),
+            'data': data,
+            'digest': hashlib.sha256(data).hexdigest(),
+        }
+        cache[path] = entry
+    cache.move_to_end(path)
+    while len(cache) > ARTIFACT_CACHE_ENTRIES:
+        cache.popitem(last=False)
+    return entry
+
 def display_pdf_preview(pdf_path):
-    """Displays the generated PDF directly in the app using an iframe."""
+    """Displays the generated PDF as cached page thumbnails (iframe fallback without poppler)."""
     st.markdown("### 📄 Resume Live Preview")
     try:
-        with open(pdf_path, "rb") as f:
-            base64_pdf = base64.b64encode(f.read()).decode('utf-8')
-        pdf_display = f'<iframe src="data:application/pdf;base64,{base64_pdf}" width="100%" height="800px" type="application/pdf"></iframe>'
+        artifact = get_artifact_bytes(pdf_path)
+        pages = rasterize_pdf(pdf_path, digest=artifact['digest'])
+        if pages:
+            for page in pages:
+                st.image(page, use_container_width=True)
+            return
+        if 'b64' not in artifact:
+            artifact['b64'] = base64.b64encode(artifact['data']).decode('utf-8')
+        pdf_display = f'<iframe src="data:application/pdf;base64,{artifact["b64"]}" width="100%" height="800px" type="application/pdf"></iframe>'
         st.markdown(pdf_display, unsafe_allow_html=True)
     except Exception as e:
         st.error(f"Could not display preview: {str(e)}")
 
+def display_job_progress(snapshot, stage_labels):
+    """Shows the current stage of a background analysis job."""
+    label = stage_labels.get(snapshot['stage'], "⏳ Waiting for a free worker...")
+    st.progress(snapshot['progress'], text=label)
+
+def display_stage_timings(timings):
+    """Shows how long each pipeline stage took (cached stages are ~0 ms)."""
+    if not timings:
+        return
+    with st.expander("⏱️ Stage Timings"):
+        for stage, seconds in timings.items():
+            st.markdown(f"- **{stage}**: {seconds * 1000:.0f} ms")
+
+def display_model_usage(usage):
+    """Shows this session's model calls, tokens and estimated cost."""
+    if not usage or not usage['calls']:
+        return
+    with st.expander("🪙 Model Usage (this session)"):
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Model calls", usage['calls'], f"{usage['cache_hits']} cached", delta_color="off")
+        col2.metric("Tokens", f"{usage['total_tokens']:,}",
+                    f"{usage['prompt_tokens']:,} in / {usage['output_tokens']:,} out", delta_color="off")
+        col3.metric("Estimated cost", f"${usage['cost_usd']:.4f}")
+        st.caption("Models: " + ", ".join(f"{m} ×{n}" for m, n in usage['models'].items()))
+
+def display_html_preview(html):
+    """Displays the instant HTML draft of the resume (no LaTeX needed)."""
+    st.markdown("### 📄 Resume Draft Preview")
+    components.html(html, height=800, scrolling=True)
+
 def display_results(score_python_before, score_python_after,
                     missing, keywords_added, keywords_skipped, pdf_path, docx_path):
     """
@@ -542,11 +345,76 @@ def display_results(score_python_before, score_python_after,
     c1, c2 = st.columns(2)
     with c1:
         if pdf_path:
-            with open(pdf_path, "rb") as f:
-                st.download_button("📄 Download PDF", f, "Optimized_Resume.pdf", "application/pdf", use_container_width=True)
+            st.download_button("📄 Download PDF", get_artifact_bytes(pdf_path)['data'],
+                               "Optimized_Resume.pdf", "application/pdf", use_container_width=True)
     with c2:
         if docx_path:
-            with open(docx_path, "rb") as f:
-                st.download_button("📝 Download Word", f, "Optimized_Resume.docx", 
-                                 "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                                 use_container_width=True)
+            st.download_button("📝 Download Word", get_artifact_bytes(docx_path)['data'],
+                               "Optimized_Resume.docx",
+                               "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                               use_container_width=True)
+
+def display_multi_target_results(targets):
+    """
+    Displays the before/after comparison of a multi-job run, one row per job,
+    with the tailored files for each job.
+    """
+    st.markdown("---")
+    st.subheader("📊 Tailoring Results by Job")
+
+    table = []
+    for i, row in enumerate(targets, start=1):
+        after = row['score_python_after']
+        table.append({
+            "#": i,
+            "Job": row['title'],
+            "Before": f"{row['score_python_before']}%",
+            "After": f"{after}%" if after is not None else "–",
+            "Change": f"{after - row['score_python_before']:+.1f}%" if after is not None else "–",
+            "Keywords added": ", ".join(row['keywords_added']) or "–",
+            "Status": "❌ Failed" if row['error'] else ("⚠️ Files incomplete" if row['render_error'] else "✅ Done"),
+        })
+    st.dataframe(table, hide_index=True, use_container_width=True)
+
+    st.subheader("📥 Download Your Tailored Resumes")
+    for i, row in enumerate(targets, start=1):
+        with st.expander(f"#{i} {row['title']}"):
+            if row['error']:
+                st.error(row['error'])
+                continue
+            if row['render_error']:
+                st.warning(f"Some files could not be generated: {row['render_error']}")
+            c1, c2 = st.columns(2)
+            with c1:
+                if row['pdf_path']:
+                    st.download_button("📄 Download PDF", get_artifact_bytes(row['pdf_path'])['data'],
+                                       f"Tailored_Resume_{i}.pdf", "application/pdf",
+                                       key=f"multi_pdf_{i}", use_container_width=True)
+            with c2:
+                if row['docx_path']:
+                    st.download_button("📝 Download Word", get_artifact_bytes(row['docx_path'])['data'],
+                                       f"Tailored_Resume_{i}.docx",
+                                       "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                                       key=f"multi_docx_{i}", use_container_width=True)
+
+def display_export(rows, key):
+    """
+    Offers all results as one ZIP (PDF, DOCX and enhanced JSON per result, plus
+    a score summary CSV). The archive is streamed to the artifact store on
+    request and reused for the session until the results change. Only its path
+    is kept in the session; the bytes are read from disk for the download.
+    """
+    exports = st.session_state.setdefault('exports', {})
+    signature = tuple((row.get('title'), row.get('pdf_path'), row.get('docx_path')) for row in rows)
+    entry = exports.get(key)
+    # The artifact store may have pruned an old export
+    if entry is None or entry['signature'] != signature or not (entry['path'] and os.path.exists(entry['path'])):
+        if not st.button("📦 Prepare ZIP of all results", key=f"export_{key}", use_container_width=True):
+            return
+        with st.spinner("Packing results..."):
+            entry = {'signature': signature, 'path': artifact_path(export_zip(rows))}
+        exports[key] = entry
+    with open(entry['path'], 'rb') as archive:
+        st.download_button("📦 Download all (ZIP)", archive,
+                           "Resume_Export.zip", "application/zip",
+                           key=f"export_download_{key}", use_container_width=True)
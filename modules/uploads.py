@@ -0,0 +1,225 @@
+"""
+Uploads Module
+Holds uploaded resumes until they are parsed, without keeping large files on
+the Python heap.
+
+An upload is copied in chunks into a SpooledUpload: small files stay in memory,
+larger ones are spooled to a temporary file that the parser reads through a
+memory map, so their pages come from the OS page cache instead of a per-session
+copy. The byte limit is enforced while copying. The page limit (and, for DOCX,
+the unpacked size) is checked by check_limits() before any text is extracted.
+"""
+import hashlib
+import io
+import mmap
+import os
+import tempfile
+import weakref
+import zipfile
+from contextlib import contextmanager
+
+from modules.config import load_environment
+
+load_environment()
+MAX_BYTES = int(float(os.getenv("RESUME_MAX_UPLOAD_MB", "10")) * 1024 * 1024)
+MAX_PAGES = int(os.getenv("RESUME_MAX_UPLOAD_PAGES", "20"))
+# Uploads above this size are spooled to disk
+SPOOL_BYTES = int(float(os.getenv("RESUME_UPLOAD_SPOOL_KB", "512")) * 1024)
+# A DOCX is a zip; its parts may not unpack to more than this multiple of MAX_BYTES
+MAX_DOCX_EXPANSION = 20
+CHUNK_BYTES = 1 << 16
+
+KINDS = {".pdf": "pdf", ".docx": "docx"}
+
+
+class UploadRejected(ValueError):
+    """An upload is over a limit or of an unsupported type. The message is shown to the user."""
+
+
+def _remove(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+class SpooledUpload:
+    """
+    An uploaded file, in memory or spooled to a temporary file. Write chunks,
+    then call finish(). The temporary file is deleted with the object.
+
+    Attributes:
+        filename (str): Original file name
+        kind (str): "pdf" or "docx"
+        size (int): Size in bytes
+        digest (str): SHA-1 of the contents (set by finish())
+        path (str): Temporary file, or None while the upload is in memory
+    """
+
+    def __init__(self, filename, max_bytes=None):
+        kind = KINDS.get(os.path.splitext(filename.lower())[1])
+        if kind is None:
+            raise UploadRejected(f"Unsupported file type: {filename}. Upload a PDF or DOCX file")
+        self.filename = filename
+        self.kind = kind
+        self.max_bytes = MAX_BYTES if max_bytes is None else max_bytes
+        self.size = 0
+        self.digest = None
+        self.path = None
+        self._buffer = io.BytesIO()
+        self._file = None
+        self._hash = hashlib.sha1()
+
+    def write(self, chunk):
+        self.size += len(chunk)
+        if self.max_bytes > 0 and self.size > self.max_bytes:
+            self.close()
+            raise UploadRejected(f"The file is larger than the {self.max_bytes // (1024 * 1024)} MB limit")
+        self._hash.update(chunk)
+        if self._file is None and self.size > SPOOL_BYTES:
+            self._file = tempfile.NamedTemporaryFile(prefix="resume-upload-", suffix=f".{self.kind}", delete=False)
+            self.path = self._file.name
+            weakref.finalize(self, _remove, self.path)
+            self._file.write(self._buffer.getvalue())
+            self._buffer = None
+        if self._file is not None:
+            self._file.write(chunk)
+        else:
+            self._buffer.write(chunk)
+
+    def finish(self):
+        if self._file is not None:
+            self._file.close()
+        self.digest = self._hash.hexdigest()
+        return self
+
+    def close(self):
+        """Deletes the spooled file early (it is also deleted when the object is collected)."""
+        if self._file is not None:
+            self._file.close()
+        if self.path:
+            _remove(self.path)
+        self._buffer = None
+
+    def payload(self):
+        """What a parser worker needs: the bytes of an in-memory upload, or the spooled file's path."""
+        return self.path if self.path else self._buffer.getvalue()
+
+    def __len__(self):
+        return self.size
+
+
+def spool_upload(fileobj, filename, max_bytes=None):
+    """
+    Copies a file-like object (e.g. a Streamlit UploadedFile) into a SpooledUpload.
+
+    Args:
+        fileobj: Readable binary file object
+        filename (str): Original name; the extension selects the parser
+        max_bytes (int): Size limit (default MAX_BYTES, 0 for none)
+
+    Returns:
+        SpooledUpload: The finished upload
+
+    Raises:
+        UploadRejected: For unsupported types or files over the size limit
+    """
+    upload = SpooledUpload(filename, max_bytes)
+    if hasattr(fileobj, "seek"):
+        fileobj.seek(0)
+    while True:
+        chunk = fileobj.read(CHUNK_BYTES)
+        if not chunk:
+            break
+        upload.write(chunk)
+    return upload.finish()
+
+
+def from_bytes(data, filename, max_bytes=None):
+    """SpooledUpload of bytes already in memory (scripts and benchmarks)."""
+    return spool_upload(io.BytesIO(data), filename, max_bytes)
+
+
+class _Mapped(mmap.mmap):
+    # zipfile (used by python-docx) asks for seekable(), which mmap lacks before Python 3.13
+    def seekable(self):
+        return True
+
+
+@contextmanager
+def open_input(data):
+    """
+    Opens a parser input as a seekable binary stream.
+
+    Args:
+        data (bytes | str): File contents, or the path of a spooled upload
+
+    Yields:
+        A BytesIO for bytes, or a read-only memory map of the file
+    """
+    if isinstance(data, (bytes, bytearray)):
+        yield io.BytesIO(data)
+        return
+    with open(data, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield io.BytesIO(b"")
+            return
+        with _Mapped(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+def _docx_pages(archive):
+    # Word stores the page count it last laid out in docProps/app.xml
+    try:
+        xml = archive.read("docProps/app.xml").decode("utf-8", "replace")
+    except KeyError:
+        return None
+    start = xml.find("<Pages>")
+    end = xml.find("</Pages>", start)
+    if start < 0 or end < 0:
+        return None
+    try:
+        return int(xml[start + len("<Pages>"):end])
+    except ValueError:
+        return None
+
+
+def check_limits(stream, kind, max_pages=None, max_bytes=None):
+    """
+    Rejects a file whose page count (or, for DOCX, unpacked size) is over the
+    limits, reading only the PDF cross-reference data or the DOCX zip directory.
+
+    Args:
+        stream: Seekable binary stream from open_input()
+        kind (str): "pdf" or "docx"
+        max_pages (int): Page limit (default MAX_PAGES, 0 for none)
+        max_bytes (int): Upload size limit the DOCX unpacked size is derived from
+
+    Raises:
+        UploadRejected: If the file is over a limit
+    """
+    max_pages = MAX_PAGES if max_pages is None else max_pages
+    max_bytes = MAX_BYTES if max_bytes is None else max_bytes
+    pages = None
+    if kind == "pdf":
+        import PyPDF2
+        try:
+            pages = len(PyPDF2.PdfReader(stream).pages)
+        except MemoryError:
+            raise
+        except Exception:
+            # Unreadable files are reported by the parser itself
+            pages = None
+    elif kind == "docx":
+        try:
+            archive = zipfile.ZipFile(stream)
+        except zipfile.BadZipFile:
+            archive = None
+        if archive is not None:
+            unpacked = sum(info.file_size for info in archive.infolist())
+            if max_bytes > 0 and unpacked > max_bytes * MAX_DOCX_EXPANSION:
+                raise UploadRejected("The document unpacks to more data than is allowed")
+            pages = _docx_pages(archive)
+    stream.seek(0)
+    if max_pages > 0 and pages is not None and pages > max_pages:
+        raise UploadRejected(f"The file has {pages} pages; at most {max_pages} are allowed")
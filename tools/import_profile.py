@@ -0,0 +1,83 @@
+"""
+Import-time profile for the app's cold start.
+
+Runs a fresh interpreter with `python -X importtime`, imports the modules the
+Streamlit app loads at startup, and reports the slowest imports.
+
+Usage:
+    python tools/import_profile.py                  # app startup modules
+    python tools/import_profile.py modules.scorer   # any module list
+    python tools/import_profile.py --top 40 --json report.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What `streamlit run app.py` imports before the first widget is drawn
+APP_MODULES = ["modules.ui", "modules.jobs", "modules.pipeline"]
+
+
+def profile_imports(modules):
+    """
+    Imports the modules in a clean subprocess and parses -X importtime output.
+
+    Args:
+        modules (list): Dotted module names
+
+    Returns:
+        dict: wall-clock total and per-module self/cumulative times (microseconds)
+    """
+    code = "import time; t = time.perf_counter(); " + "; ".join(f"import {m}" for m in modules) \
+        + "; print(int((time.perf_counter() - t) * 1e6))"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        tail = [l for l in result.stderr.splitlines() if not l.startswith("import time:")]
+        raise RuntimeError("\n".join(tail[-10:]) or f"exit code {result.returncode}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        entries.append({
+            "module": name.strip(),
+            # Leading spaces encode nesting; depth 0 means imported directly by our code
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+        })
+    return {"modules": modules, "total_us": int(result.stdout.strip()), "imports": entries}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report the slowest imports at app startup")
+    parser.add_argument("modules", nargs="*", default=APP_MODULES)
+    parser.add_argument("--top", type=int, default=20, help="number of imports to list")
+    parser.add_argument("--json", help="also write the full report to this file")
+    args = parser.parse_args()
+
+    try:
+        report = profile_imports(args.modules)
+    except RuntimeError as e:
+        print(f"❌ Import failed:\n{e}")
+        sys.exit(1)
+
+    print(f"⏱️ Importing {', '.join(args.modules)} took {report['total_us'] / 1000:.1f} ms")
+    print(f"\n{'cumulative ms':>14} {'self ms':>9}  module")
+    slowest = sorted(report["imports"], key=lambda e: e["cumulative_us"], reverse=True)
+    for e in slowest[:args.top]:
+        print(f"{e['cumulative_us'] / 1000:>14.1f} {e['self_us'] / 1000:>9.1f}  {'  ' * e['depth']}{e['module']}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n📄 Full report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()